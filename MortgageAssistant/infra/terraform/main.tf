@@ -87,3 +87,22 @@ resource "aws_opensearch_domain" "vectors" {
     enabled = true
   }
 }
+
+resource "aws_sqs_queue" "ingest_dead_letter" {
+  name                      = "${var.ingest_queue_name}-dlq"
+  message_retention_seconds = 1209600
+  kms_master_key_id         = aws_kms_key.vault.arn
+}
+
+resource "aws_sqs_queue" "ingest" {
+  name                       = var.ingest_queue_name
+  visibility_timeout_seconds = 300
+  receive_wait_time_seconds  = 20
+  kms_master_key_id          = aws_kms_key.vault.arn
+
+  # Dead-letters jobs whose workers keep dying before they can report a failure.
+  redrive_policy = jsonencode({
+    deadLetterTargetArn = aws_sqs_queue.ingest_dead_letter.arn
+    maxReceiveCount     = 6
+  })
+}
@@ -3,3 +3,5 @@ output "dynamodb_vault" { value = aws_dynamodb_table.vault.name }
 output "dynamodb_metadata" { value = aws_dynamodb_table.metadata.name }
 output "kms_key_arn" { value = aws_kms_key.vault.arn }
 output "opensearch_endpoint" { value = aws_opensearch_domain.vectors.endpoint }
+output "ingest_queue_url" { value = aws_sqs_queue.ingest.url }
+output "ingest_dead_letter_queue_url" { value = aws_sqs_queue.ingest_dead_letter.url }
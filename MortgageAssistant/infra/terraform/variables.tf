@@ -3,3 +3,4 @@ variable "s3_bucket_name" { type = string }
 variable "vault_table_name" { type = string }
 variable "metadata_table_name" { type = string }
 variable "opensearch_domain_name" { type = string }
+variable "ingest_queue_name" { type = string }
@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+# Requests per second for one worker (one event loop) when an async handler calls boto3
+# inline versus through shared.aws_async.run_aws. The handler is the API's
+# initiate-upload work: an S3 presign plus a DynamoDB put_item. Uses moto when it is
+# installed, otherwise stand-ins that sleep for --latency-ms per AWS call like a
+# network round trip would. Run from the MortgageAssistant directory with the service
+# environment loaded (.env).
+
+import argparse
+import asyncio
+import contextlib
+import sys
+import time
+from pathlib import Path
+from typing import Iterator
+from uuid import uuid4
+
+import httpx
+from fastapi import FastAPI
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from shared import aws_clients  # noqa: E402
+from shared.aws_async import run_aws, shutdown_aws_executor  # noqa: E402
+from shared.config import settings  # noqa: E402
+
+
+class _StubS3:
+    # Presigning is local signing work in boto3 too; only the table call waits.
+    def generate_presigned_url(self, ClientMethod: str, Params: dict, ExpiresIn: int) -> str:
+        return f"https://{Params['Bucket']}.s3.amazonaws.com/{Params['Key']}?X-Amz-Expires={ExpiresIn}"
+
+
+class _StubTable:
+    def __init__(self, latency_s: float) -> None:
+        self.latency_s = latency_s
+
+    def put_item(self, Item: dict) -> dict:
+        time.sleep(self.latency_s)
+        return {}
+
+
+class _StubDynamoDb:
+    def __init__(self, latency_s: float) -> None:
+        self._table = _StubTable(latency_s)
+
+    def Table(self, name: str) -> _StubTable:
+        return self._table
+
+
+@contextlib.contextmanager
+def _aws_backend(backend: str, latency_s: float) -> Iterator[str]:
+    if backend in ("auto", "moto"):
+        try:
+            from moto import mock_aws
+        except ImportError:
+            if backend == "moto":
+                raise SystemExit("moto is not installed")
+        else:
+            with mock_aws():
+                aws_clients._clients.clear()
+                aws_clients.s3_client().create_bucket(Bucket=settings.s3_bucket)
+                aws_clients.dynamodb_resource().create_table(
+                    TableName=settings.dynamodb_metadata_table,
+                    KeySchema=[{"AttributeName": "document_id", "KeyType": "HASH"}],
+                    AttributeDefinitions=[{"AttributeName": "document_id", "AttributeType": "S"}],
+                    BillingMode="PAY_PER_REQUEST",
+                )
+                yield "moto"
+            return
+    aws_clients.s3_client = lambda: _StubS3()
+    aws_clients.dynamodb_resource = lambda: _StubDynamoDb(latency_s)
+    yield f"stub ({latency_s * 1000:.0f} ms per call)"
+
+
+def _put_metadata(item: dict) -> None:
+    aws_clients.dynamodb_resource().Table(settings.dynamodb_metadata_table).put_item(Item=item)
+
+
+def _item(loan_id: str) -> tuple[dict, dict]:
+    document_id = str(uuid4())
+    key = f"{loan_id}/{document_id}/paystub.pdf"
+    params = {"Bucket": settings.s3_bucket, "Key": key, "ContentType": "application/pdf"}
+    return params, {"document_id": document_id, "loan_id": loan_id, "s3_key": key, "status": "UPLOADED"}
+
+
+app = FastAPI()
+
+
+@app.post("/inline/{loan_id}")
+async def inline(loan_id: str) -> dict:
+    params, item = _item(loan_id)
+    url = aws_clients.s3_client().generate_presigned_url(ClientMethod="put_object", Params=params, ExpiresIn=900)
+    _put_metadata(item)
+    return {"upload_url": url}
+
+
+@app.post("/offloaded/{loan_id}")
+async def offloaded(loan_id: str) -> dict:
+    params, item = _item(loan_id)
+    url = await run_aws(aws_clients.s3_client().generate_presigned_url, ClientMethod="put_object", Params=params, ExpiresIn=900)
+    await run_aws(_put_metadata, item)
+    return {"upload_url": url}
+
+
+async def _measure(route: str, requests: int, concurrency: int) -> float:
+    slots = asyncio.Semaphore(concurrency)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+
+        async def one(idx: int) -> None:
+            async with slots:
+                response = await client.post(f"/{route}/loan-{idx % 50}")
+                response.raise_for_status()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(idx) for idx in range(requests)))
+        return requests / (time.perf_counter() - started)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark inline vs offloaded boto3 calls in async handlers.")
+    parser.add_argument("--backend", choices=["auto", "moto", "stub"], default="auto")
+    parser.add_argument("--latency-ms", type=float, default=40.0)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=32)
+    args = parser.parse_args()
+
+    with _aws_backend(args.backend, args.latency_ms / 1000) as backend:
+        print(f"backend: {backend}, aws_max_workers={settings.aws_max_workers}")
+        print(f"{'handler':<10} {'concurrency':>11} {'req/s':>9}")
+        for route in ("inline", "offloaded"):
+            for level in (1, args.concurrency):
+                rate = asyncio.run(_measure(route, args.requests, level))
+                print(f"{route:<10} {level:>11} {rate:>9,.1f}")
+    shutdown_aws_executor()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+# Ingestion throughput against worker count. Enqueues jobs on a fresh SQLite queue and
+# drains it with the real worker pool (services/ingestion/app/worker.py), using a
+# stand-in pipeline that waits --latency-ms like the Textract/PII/RAG round trips and
+# burns --cpu-ms of CPU like text extraction. Run from the MortgageAssistant directory
+# with the service environment loaded (.env).
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+_queue_dir = tempfile.mkdtemp(prefix="ingest-bench-")
+os.environ.setdefault("INGEST_QUEUE_URL", f"sqlite:///{_queue_dir}/queue.db")
+
+from services.ingestion.app.worker import run_pool  # noqa: E402
+from shared.job_queue import get_job_queue  # noqa: E402
+
+
+async def simulated_ingest(body: dict) -> dict:
+    deadline = time.perf_counter() + body["cpu_ms"] / 1000
+    while time.perf_counter() < deadline:
+        pass
+    await asyncio.sleep(body["latency_ms"] / 1000)
+    return {"status": "indexed", "document_id": body["document_id"]}
+
+
+def _drain(workers: int, jobs: int, latency_ms: float, cpu_ms: float) -> float:
+    queue = get_job_queue()
+    for idx in range(jobs):
+        queue.enqueue({"document_id": f"doc-{workers}-{idx}", "latency_ms": latency_ms, "cpu_ms": cpu_ms}, f"job-{workers}-{idx}")
+    stop = threading.Event()
+    started = time.perf_counter()
+    finished = []
+
+    def watch() -> None:
+        while sum(queue.stats().values()) > 0:
+            time.sleep(0.05)
+        finished.append(time.perf_counter())
+        stop.set()
+
+    threading.Thread(target=watch, daemon=True).start()
+    run_pool(workers, handler=simulated_ingest, update=None, stop=stop)
+    return jobs / (finished[0] - started)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark ingestion throughput by worker count.")
+    parser.add_argument("--jobs", type=int, default=800)
+    parser.add_argument("--latency-ms", type=float, default=200.0)
+    parser.add_argument("--cpu-ms", type=float, default=20.0)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args()
+    print(f"{'workers':>7} {'jobs/s':>8}")
+    for workers in args.workers:
+        rate = _drain(workers, args.jobs, args.latency_ms, args.cpu_ms)
+        print(f"{workers:>7} {rate:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
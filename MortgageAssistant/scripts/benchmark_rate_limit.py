@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+# Decisions per second for the rate limiters, against the previous sliding-window
+# implementation. Run from the MortgageAssistant directory with the service environment
+# loaded (.env), e.g. `python scripts/benchmark_rate_limit.py --redis-url redis://localhost:6379/0`.
+
+import argparse
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Callable, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from shared.kv_store import InMemoryStore, RedisStore  # noqa: E402
+from shared.rate_limit import InMemoryRateLimiter, RateLimiter, SharedRateLimiter  # noqa: E402
+
+
+class SlidingWindowLimiter:
+    # The implementation InMemoryRateLimiter replaced, kept here as the baseline.
+    def __init__(self, rps: int) -> None:
+        self.rps = rps
+        self.calls = defaultdict(list)
+
+    def allow(self, key: str) -> bool:
+        now = time.time()
+        window = now - 1
+        calls = [t for t in self.calls[key] if t >= window]
+        self.calls[key] = calls
+        if len(calls) >= self.rps:
+            return False
+        self.calls[key].append(now)
+        return True
+
+
+def _run(limiter: RateLimiter, keys: List[str], decisions: int) -> float:
+    allow = limiter.allow
+    started = time.perf_counter()
+    for idx in range(decisions):
+        allow(keys[idx % len(keys)])
+    return decisions / (time.perf_counter() - started)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark rate limiter decisions per second.")
+    parser.add_argument("--rps", type=int, default=1000)
+    parser.add_argument("--decisions", type=int, default=200_000)
+    parser.add_argument("--keys", type=int, default=50_000)
+    parser.add_argument("--redis-url", default=None)
+    args = parser.parse_args()
+
+    limiters: List[tuple[str, Callable[[], RateLimiter]]] = [
+        ("sliding_window", lambda: SlidingWindowLimiter(args.rps)),
+        ("gcra_memory", lambda: InMemoryRateLimiter(args.rps)),
+        ("gcra_shared_memory", lambda: SharedRateLimiter(args.rps, InMemoryStore())),
+    ]
+    if args.redis_url:
+        limiters.append(("gcra_redis", lambda: SharedRateLimiter(args.rps, RedisStore(args.redis_url))))
+
+    scenarios = {
+        "hot_key": ["loan-hot"],
+        "many_keys": [f"loan-{idx}" for idx in range(args.keys)],
+    }
+    print(f"{'limiter':<20} {'scenario':<10} {'decisions/s':>12}")
+    for name, build in limiters:
+        decisions = args.decisions if name != "gcra_redis" else min(args.decisions, 20_000)
+        for scenario, keys in scenarios.items():
+            rate = _run(build(), keys, decisions)
+            print(f"{name:<20} {scenario:<10} {rate:>12,.0f}")
+
+    # Idle keys: the old limiter keeps every key it has seen, GCRA drops refilled buckets.
+    old, new = SlidingWindowLimiter(args.rps), InMemoryRateLimiter(args.rps)
+    for key in scenarios["many_keys"]:
+        old.allow(key)
+        new.allow(key)
+    time.sleep(new.capacity_s + 0.05)
+    old.allow("loan-after-idle")
+    new.allow("loan-after-idle")
+    print(f"keys retained after idle: sliding_window={len(old.calls)} gcra_memory={len(new)}")
+
+
+if __name__ == "__main__":
+    main()
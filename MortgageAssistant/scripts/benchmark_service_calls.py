@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+# Per-hop latency of inter-service calls: a new httpx.AsyncClient per call (the old
+# shared.llm.call_service) against the pooled ServiceClient. Starts a local uvicorn
+# echo service, so the numbers include real TCP connection setup. Run from the
+# MortgageAssistant directory with the service environment loaded (.env).
+
+import argparse
+import asyncio
+import socket
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Awaitable, Callable, List
+
+import httpx
+import uvicorn
+from fastapi import FastAPI
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from shared.http_client import ServiceClient  # noqa: E402
+
+echo = FastAPI()
+
+
+@echo.post("/v1/echo")
+async def echo_payload(payload: dict) -> dict:
+    return payload
+
+
+def _start_server() -> tuple[uvicorn.Server, str]:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(echo, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return server, f"http://127.0.0.1:{port}"
+
+
+async def _measure(call: Callable[[], Awaitable[dict]], calls: int, concurrency: int) -> dict:
+    latencies: List[float] = []
+    slots = asyncio.Semaphore(concurrency)
+
+    async def one() -> None:
+        async with slots:
+            started = time.perf_counter()
+            await call()
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(calls)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "calls_per_s": calls / elapsed,
+        "p50_ms": latencies[len(latencies) // 2],
+        "p95_ms": latencies[int(len(latencies) * 0.95)],
+    }
+
+
+async def _run(base_url: str, calls: int, concurrency: int) -> None:
+    payload = {"loan_id": "loan-1", "question": "What is the monthly income?"}
+
+    async def per_call_client() -> dict:
+        async with httpx.AsyncClient(timeout=20) as client:
+            response = await client.post(f"{base_url}/v1/echo", json=payload)
+            response.raise_for_status()
+            return response.json()
+
+    pooled = ServiceClient("echo", base_url)
+    await pooled.start()
+    print(f"{'client':<16} {'concurrency':>11} {'calls/s':>9} {'p50 ms':>8} {'p95 ms':>8}")
+    for name, call in (("per_call_client", per_call_client), ("pooled", lambda: pooled.post("/v1/echo", payload))):
+        for level in (1, concurrency):
+            result = await _measure(call, calls, level)
+            print(f"{name:<16} {level:>11} {result['calls_per_s']:>9,.0f} {result['p50_ms']:>8.2f} {result['p95_ms']:>8.2f}")
+    await pooled.aclose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark per-hop latency of inter-service calls.")
+    parser.add_argument("--calls", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+    server, base_url = _start_server()
+    try:
+        asyncio.run(_run(base_url, args.calls, args.concurrency))
+    finally:
+        server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
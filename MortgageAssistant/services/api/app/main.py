@@ -3,26 +3,31 @@ from __future__ import annotations
 import logging
 from uuid import uuid4
 
+from botocore.exceptions import ClientError
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.responses import JSONResponse
 
+from shared.aws_async import run_aws, shutdown_aws_executor
 from shared.aws_clients import dynamodb_resource, s3_client
 from shared.config import settings
+from shared.http_client import ServiceClient
+from shared.job_queue import get_job_queue
 from shared.logging import configure_logging
 from shared.middleware import RequestIdMiddleware
 from shared.models import (
+    DocumentStatusResponse,
     QueryRequest,
     QueryResponse,
     UploadCompleteRequest,
     UploadInitRequest,
     UploadInitResponse,
 )
-from shared.rate_limit import InMemoryRateLimiter
-from shared.llm import call_service
+from shared.rate_limit import build_rate_limiter
 
 
 logger = logging.getLogger("api")
-rate_limiter = InMemoryRateLimiter(settings.rate_limit_rps)
+rate_limiter = build_rate_limiter()
+rag_service = ServiceClient("rag", settings.rag_service_url)
 
 app = FastAPI(title="Mortgage Assistant API", version="1.0.0")
 app.add_middleware(RequestIdMiddleware)
@@ -31,6 +36,13 @@ app.add_middleware(RequestIdMiddleware)
 @app.on_event("startup")
 async def startup() -> None:
     configure_logging("api")
+    await rag_service.start()
+
+
+@app.on_event("shutdown")
+async def shutdown() -> None:
+    await rag_service.aclose()
+    shutdown_aws_executor()
 
 
 @app.exception_handler(HTTPException)
@@ -43,15 +55,29 @@ async def health() -> dict:
     return {"status": "ok"}
 
 
+@app.get("/metrics")
+async def metrics() -> dict:
+    return {
+        "downstream": {rag_service.name: rag_service.stats()},
+        "ingest_queue": await run_aws(get_job_queue().stats),
+    }
+
+
+def _put_metadata(item: dict) -> None:
+    # Runs on an AWS executor thread; DynamoDB resources are per thread.
+    dynamodb_resource().Table(settings.dynamodb_metadata_table).put_item(Item=item)
+
+
 @app.post("/v1/documents/initiate-upload", response_model=UploadInitResponse)
 async def initiate_upload(request: UploadInitRequest) -> UploadInitResponse:
-    if not rate_limiter.allow(request.loan_id):
+    if not await rate_limiter.allow_async(request.loan_id):
         raise HTTPException(status_code=429, detail="Rate limit exceeded")
 
     document_id = str(uuid4())
     object_key = f"{request.loan_id}/{document_id}/{request.file_name}"
 
-    presigned_url = s3_client().generate_presigned_url(
+    presigned_url = await run_aws(
+        s3_client().generate_presigned_url,
         ClientMethod="put_object",
         Params={
             "Bucket": settings.s3_bucket,
@@ -61,29 +87,66 @@ async def initiate_upload(request: UploadInitRequest) -> UploadInitResponse:
         ExpiresIn=900,
     )
 
-    metadata_table = dynamodb_resource().Table(settings.dynamodb_metadata_table)
-    metadata_table.put_item(
-        Item={
+    await run_aws(
+        _put_metadata,
+        {
             "document_id": document_id,
             "loan_id": request.loan_id,
             "document_type": request.document_type.value,
             "s3_key": object_key,
             "status": "UPLOADED",
-        }
+        },
     )
 
     return UploadInitResponse(document_id=document_id, upload_url=presigned_url, expires_in=900)
 
 
+def _mark_queued(document_id: str, job_id: str) -> None:
+    dynamodb_resource().Table(settings.dynamodb_metadata_table).update_item(
+        Key={"document_id": document_id},
+        UpdateExpression="SET #status=:s, job_id=:j, ingest_attempts=:a REMOVE last_error",
+        ConditionExpression="attribute_exists(document_id)",
+        ExpressionAttributeNames={"#status": "status"},
+        ExpressionAttributeValues={":s": "QUEUED", ":j": job_id, ":a": 0},
+    )
+
+
+def _get_metadata(document_id: str) -> dict | None:
+    return dynamodb_resource().Table(settings.dynamodb_metadata_table).get_item(Key={"document_id": document_id}).get("Item")
+
+
 @app.post("/v1/documents/complete")
 async def complete_upload(request: UploadCompleteRequest) -> dict:
-    payload = request.model_dump()
-    await call_service(f"{settings.ingestion_service_url}/v1/ingest", payload)
-    return {"status": "queued", "document_id": request.document_id}
+    # Ingestion runs in the worker pool (services/ingestion/app/worker.py); this only
+    # records the job and enqueues it. Progress is at /v1/documents/{document_id}/status.
+    job_id = str(uuid4())
+    try:
+        # Marked before enqueueing so a fast worker's status update is never overwritten.
+        await run_aws(_mark_queued, request.document_id, job_id)
+    except ClientError as exc:
+        if exc.response.get("Error", {}).get("Code") == "ConditionalCheckFailedException":
+            raise HTTPException(status_code=404, detail="Document not found") from exc
+        raise
+    await run_aws(get_job_queue().enqueue, request.model_dump(mode="json"), job_id)
+    return {"status": "queued", "document_id": request.document_id, "job_id": job_id}
+
+
+@app.get("/v1/documents/{document_id}/status", response_model=DocumentStatusResponse)
+async def document_status(document_id: str) -> DocumentStatusResponse:
+    item = await run_aws(_get_metadata, document_id)
+    if not item:
+        raise HTTPException(status_code=404, detail="Document not found")
+    return DocumentStatusResponse(
+        document_id=document_id,
+        status=item.get("status", "UNKNOWN"),
+        job_id=item.get("job_id"),
+        attempts=int(item.get("ingest_attempts", 0)),
+        last_error=item.get("last_error"),
+    )
 
 
 @app.post("/v1/query", response_model=QueryResponse)
 async def query(request: QueryRequest) -> QueryResponse:
     payload = request.model_dump()
-    response = await call_service(f"{settings.rag_service_url}/v1/query", payload)
+    response = await rag_service.post("/v1/query", payload)
     return QueryResponse(**response)
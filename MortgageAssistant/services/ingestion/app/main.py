@@ -8,14 +8,17 @@ from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
 
 from shared.audit import audit_log
+from shared.aws_async import run_aws, shutdown_aws_executor
 from shared.aws_clients import dynamodb_resource, s3_client, textract_client
 from shared.config import settings
+from shared.http_client import ServiceClient
 from shared.logging import configure_logging
 from shared.models import DocumentType, ExtractedDocument, MortgageFields
-from shared.llm import call_service
 
 
 logger = logging.getLogger("ingestion")
+pii_service = ServiceClient("pii", settings.pii_service_url)
+rag_service = ServiceClient("rag", settings.rag_service_url)
 
 
 class IngestRequest(BaseModel):
@@ -30,6 +33,15 @@ app = FastAPI(title="Mortgage Assistant Ingestion", version="1.0.0")
 @app.on_event("startup")
 async def startup() -> None:
     configure_logging("ingestion")
+    await pii_service.start()
+    await rag_service.start()
+
+
+@app.on_event("shutdown")
+async def shutdown() -> None:
+    await pii_service.aclose()
+    await rag_service.aclose()
+    shutdown_aws_executor()
 
 
 @app.get("/health")
@@ -37,6 +49,11 @@ async def health() -> dict:
     return {"status": "ok"}
 
 
+@app.get("/metrics")
+async def metrics() -> dict:
+    return {"downstream": {client.name: client.stats() for client in (pii_service, rag_service)}}
+
+
 def _extract_text_from_s3(s3_key: str) -> str:
     response = textract_client().detect_document_text(
         Document={"S3Object": {"Bucket": settings.s3_bucket, "Name": s3_key}}
@@ -45,6 +62,24 @@ def _extract_text_from_s3(s3_key: str) -> str:
     return "\n".join(lines)
 
 
+def _metadata_table():
+    # Called on AWS executor threads; DynamoDB resources are per thread.
+    return dynamodb_resource().Table(settings.dynamodb_metadata_table)
+
+
+def _get_metadata(document_id: str) -> dict | None:
+    return _metadata_table().get_item(Key={"document_id": document_id}).get("Item")
+
+
+def _mark_indexed(document_id: str, fields: MortgageFields) -> None:
+    _metadata_table().update_item(
+        Key={"document_id": document_id},
+        UpdateExpression="SET #status=:s, extracted_fields=:f REMOVE last_error",
+        ExpressionAttributeNames={"#status": "status"},
+        ExpressionAttributeValues={":s": "INDEXED", ":f": fields.model_dump()},
+    )
+
+
 def _extract_mortgage_fields(text: str) -> MortgageFields:
     employer_match = re.search(r"Employer\s*:?\s*(.+)", text, re.IGNORECASE)
     income_match = re.search(r"(Gross\s*Pay|Income)\s*:?\s*\$?([0-9,\.]+)", text, re.IGNORECASE)
@@ -67,7 +102,7 @@ async def _redact_pii(document: ExtractedDocument) -> dict:
         "text": document.raw_text,
         "role": "internal",
     }
-    return await call_service(f"{settings.pii_service_url}/v1/redact", payload)
+    return await pii_service.post("/v1/redact", payload)
 
 
 async def _index_redacted(document: ExtractedDocument, redacted_text: str) -> None:
@@ -77,13 +112,11 @@ async def _index_redacted(document: ExtractedDocument, redacted_text: str) -> No
         "document_type": document.document_type.value,
         "redacted_text": redacted_text,
     }
-    await call_service(f"{settings.rag_service_url}/v1/index", payload)
+    await rag_service.post("/v1/index", payload)
 
 
-@app.post("/v1/ingest")
-async def ingest(request: IngestRequest) -> dict:
-    metadata_table = dynamodb_resource().Table(settings.dynamodb_metadata_table)
-    item = metadata_table.get_item(Key={"document_id": request.document_id}).get("Item")
+async def run_ingestion(request: IngestRequest) -> dict:
+    item = await run_aws(_get_metadata, request.document_id)
     if not item:
         raise HTTPException(status_code=404, detail="Document not found")
 
@@ -91,7 +124,7 @@ async def ingest(request: IngestRequest) -> dict:
     if not s3_key:
         raise HTTPException(status_code=400, detail="Missing S3 key")
 
-    raw_text = _extract_text_from_s3(s3_key)
+    raw_text = await run_aws(_extract_text_from_s3, s3_key)
     fields = _extract_mortgage_fields(raw_text)
 
     extracted = ExtractedDocument(
@@ -105,12 +138,7 @@ async def ingest(request: IngestRequest) -> dict:
     redaction_result = await _redact_pii(extracted)
     await _index_redacted(extracted, redaction_result["redacted_text"])
 
-    metadata_table.update_item(
-        Key={"document_id": request.document_id},
-        UpdateExpression="SET #status=:s, extracted_fields=:f",
-        ExpressionAttributeNames={"#status": "status"},
-        ExpressionAttributeValues={":s": "INDEXED", ":f": fields.model_dump()},
-    )
+    await run_aws(_mark_indexed, request.document_id, fields)
 
     audit_log(
         "document_ingested",
@@ -118,3 +146,8 @@ async def ingest(request: IngestRequest) -> dict:
     )
 
     return {"status": "indexed", "document_id": request.document_id}
+
+
+@app.post("/v1/ingest")
+async def ingest(request: IngestRequest) -> dict:
+    return await run_ingestion(request)
@@ -0,0 +1,214 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import random
+import signal
+import threading
+from typing import Awaitable, Callable, Set
+
+import httpx
+from fastapi import HTTPException
+from pydantic import ValidationError
+
+from shared.aws_async import run_aws, shutdown_aws_executor
+from shared.aws_clients import dynamodb_resource
+from shared.config import settings
+from shared.job_queue import JobQueue, ReceivedJob, get_job_queue
+from shared.logging import configure_logging
+from .main import IngestRequest, pii_service, rag_service, run_ingestion
+
+
+# Pulls ingestion jobs enqueued by the API's /v1/documents/complete and runs the
+# pipeline. Each worker process handles up to INGEST_JOBS_PER_WORKER jobs at once, so
+# throughput scales with --workers. Run with `python -m services.ingestion.app.worker`.
+
+logger = logging.getLogger("ingestion_worker")
+
+Handler = Callable[[dict], Awaitable[dict]]
+StatusUpdate = Callable[..., None]
+
+
+async def ingest_job(body: dict) -> dict:
+    return await run_ingestion(IngestRequest(**body))
+
+
+def set_document_status(document_id: str, status: str, attempts: int, error: str | None = None) -> None:
+    expression = "SET #status=:s, ingest_attempts=:a"
+    values = {":s": status, ":a": attempts}
+    if error is not None:
+        expression += ", last_error=:e"
+        values[":e"] = error[:1000]
+    dynamodb_resource().Table(settings.dynamodb_metadata_table).update_item(
+        Key={"document_id": document_id},
+        UpdateExpression=expression,
+        ExpressionAttributeNames={"#status": "status"},
+        ExpressionAttributeValues=values,
+    )
+
+
+def _permanent(exc: Exception) -> bool:
+    # Bad input or a missing document will fail the same way on every attempt.
+    if isinstance(exc, ValidationError):
+        return True
+    if isinstance(exc, HTTPException):
+        return exc.status_code < 500
+    return isinstance(exc, httpx.HTTPStatusError) and exc.response.status_code < 500
+
+
+def _retry_delay_s(attempts: int) -> float:
+    delay = settings.ingest_retry_base_s * 2 ** (attempts - 1) * random.uniform(0.5, 1.5)
+    return min(delay, settings.ingest_visibility_timeout_s)
+
+
+async def _report(update: StatusUpdate | None, job: ReceivedJob, status: str, error: str | None = None) -> None:
+    if update is None:
+        return
+    try:
+        await run_aws(update, job.body.get("document_id"), status, job.attempts, error)
+    except Exception:
+        logger.warning("ingest_status_update_failed", extra={"job_id": job.job_id, "status": status}, exc_info=True)
+
+
+async def _keep_invisible(queue: JobQueue, job: ReceivedJob, done: asyncio.Event, context: dict) -> None:
+    # Textract, PII and embedding can outlast the visibility timeout; without renewing it the
+    # job would be redelivered to another worker and ingested (and the answer cache bumped) twice.
+    # Renewing at a third of the timeout leaves room for two failed renewals.
+    interval_s = max(0.1, settings.ingest_visibility_timeout_s / 3)
+    while True:
+        try:
+            await asyncio.wait_for(done.wait(), interval_s)
+            return
+        except asyncio.TimeoutError:
+            pass
+        try:
+            extended = await run_aws(queue.extend, job, settings.ingest_visibility_timeout_s)
+        except Exception:
+            logger.warning("ingest_job_visibility_extend_failed", extra=context, exc_info=True)
+            continue
+        if not extended:
+            logger.warning("ingest_job_lease_lost", extra=context)
+            return
+
+
+async def process_job(queue: JobQueue, job: ReceivedJob, handler: Handler, update: StatusUpdate | None) -> None:
+    context = {"job_id": job.job_id, "document_id": job.body.get("document_id"), "attempts": job.attempts}
+    if job.attempts > settings.ingest_max_attempts:
+        # Earlier deliveries never reported back: the worker died or overran the visibility timeout.
+        await run_aws(queue.dead_letter, job, "exceeded max attempts without completing")
+        await _report(update, job, "FAILED", "exceeded max attempts without completing")
+        logger.error("ingest_job_dead_lettered", extra=context)
+        return
+
+    await _report(update, job, "PROCESSING")
+    done = asyncio.Event()
+    heartbeat = asyncio.create_task(_keep_invisible(queue, job, done, context))
+    failure: Exception | None = None
+    try:
+        await handler(job.body)
+    except Exception as exc:
+        failure = exc
+    finally:
+        # Let an in-flight renewal finish first, so it cannot undo the retry delay set below.
+        done.set()
+        await heartbeat
+
+    if failure is not None:
+        error = f"{type(failure).__name__}: {failure}"
+        if _permanent(failure) or job.attempts >= settings.ingest_max_attempts:
+            await run_aws(queue.dead_letter, job, error)
+            await _report(update, job, "FAILED", error)
+            logger.error("ingest_job_dead_lettered", extra=context, exc_info=failure)
+        else:
+            delay_s = _retry_delay_s(job.attempts)
+            await run_aws(queue.release, job, delay_s)
+            await _report(update, job, "RETRYING", error)
+            logger.warning("ingest_job_retrying", extra={**context, "delay_s": round(delay_s, 2)}, exc_info=failure)
+        return
+
+    await run_aws(queue.ack, job)
+    logger.info("ingest_job_done", extra=context)
+
+
+async def consume(handler: Handler, update: StatusUpdate | None, stop: threading.Event) -> None:
+    queue = get_job_queue()
+    in_flight: Set[asyncio.Task] = set()
+    await pii_service.start()
+    await rag_service.start()
+    try:
+        while not stop.is_set():
+            free = settings.ingest_jobs_per_worker - len(in_flight)
+            if free <= 0:
+                await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                continue
+            # Short polls so a stop request is noticed within a second.
+            jobs = await run_aws(queue.receive, free, settings.ingest_visibility_timeout_s, 1.0)
+            for job in jobs:
+                task = asyncio.create_task(process_job(queue, job, handler, update))
+                in_flight.add(task)
+                task.add_done_callback(in_flight.discard)
+        if in_flight:
+            await asyncio.wait(in_flight)
+    finally:
+        await pii_service.aclose()
+        await rag_service.aclose()
+
+
+def _worker_process(index: int, handler: Handler, update: StatusUpdate | None) -> None:
+    configure_logging("ingestion_worker")
+    stop = threading.Event()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, lambda *_: stop.set())
+    logger.info("ingest_worker_started", extra={"worker": index})
+    asyncio.run(consume(handler, update, stop))
+    shutdown_aws_executor()
+    logger.info("ingest_worker_stopped", extra={"worker": index})
+
+
+def run_pool(
+    workers: int,
+    handler: Handler = ingest_job,
+    update: StatusUpdate | None = set_document_status,
+    stop: threading.Event | None = None,
+) -> None:
+    # Workers are separate processes so CPU-bound extraction in one job does not hold
+    # the GIL for the others. A worker that dies is replaced; its in-flight jobs come
+    # back after the visibility timeout.
+    context = multiprocessing.get_context("spawn")
+    stopping = stop or threading.Event()
+
+    def spawn(index: int) -> multiprocessing.Process:
+        process = context.Process(target=_worker_process, args=(index, handler, update), name=f"ingest-worker-{index}")
+        process.start()
+        return process
+
+    def request_stop(*_: object) -> None:
+        stopping.set()
+
+    signal.signal(signal.SIGTERM, request_stop)
+    signal.signal(signal.SIGINT, request_stop)
+    processes = [spawn(index) for index in range(workers)]
+    while not stopping.wait(1.0):
+        for index, process in enumerate(processes):
+            if not process.is_alive():
+                logger.error("ingest_worker_exited", extra={"worker": index, "exitcode": process.exitcode})
+                processes[index] = spawn(index)
+    for process in processes:
+        if process.is_alive():
+            process.terminate()
+    for process in processes:
+        process.join()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the ingestion worker pool.")
+    parser.add_argument("--workers", type=int, default=settings.ingest_workers)
+    args = parser.parse_args()
+    configure_logging("ingestion_worker")
+    run_pool(args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,13 @@
 from __future__ import annotations
 
+import asyncio
 import logging
 from typing import Optional
 
 from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
 
+from shared.aws_async import run_aws, shutdown_aws_executor
 from shared.config import settings
 from shared.llm import LlmProvider
 from shared.logging import configure_logging
@@ -31,6 +33,11 @@ async def startup() -> None:
     configure_logging("llm_router")
 
 
+@app.on_event("shutdown")
+async def shutdown() -> None:
+    shutdown_aws_executor()
+
+
 @app.get("/health")
 async def health() -> dict:
     return {"status": "ok"}
@@ -58,10 +65,10 @@ async def route(request: RouteRequest) -> LlmResponse:
 
     try:
         if provider_choice == "openai":
-            content = provider.chat_openai(request.prompt, request.max_tokens, request.temperature)
+            content = await asyncio.to_thread(provider.chat_openai, request.prompt, request.max_tokens, request.temperature)
             return LlmResponse(provider="openai", model=settings.openai_chat_model, content=content)
 
-        content = provider.chat_bedrock(request.prompt, request.max_tokens, request.temperature)
+        content = await run_aws(provider.chat_bedrock, request.prompt, request.max_tokens, request.temperature)
         return LlmResponse(provider="bedrock", model=settings.bedrock_chat_model, content=content)
     except Exception as exc:
         logger.exception("primary_llm_failed", extra={"provider": provider_choice})
@@ -71,10 +78,10 @@ async def route(request: RouteRequest) -> LlmResponse:
 
         try:
             if fallback == "openai":
-                content = provider.chat_openai(request.prompt, request.max_tokens, request.temperature)
+                content = await asyncio.to_thread(provider.chat_openai, request.prompt, request.max_tokens, request.temperature)
                 return LlmResponse(provider="openai", model=settings.openai_chat_model, content=content)
 
-            content = provider.chat_bedrock(request.prompt, request.max_tokens, request.temperature)
+            content = await run_aws(provider.chat_bedrock, request.prompt, request.max_tokens, request.temperature)
             return LlmResponse(provider="bedrock", model=settings.bedrock_chat_model, content=content)
         except Exception as fallback_exc:
             logger.exception("fallback_llm_failed", extra={"provider": fallback})
@@ -7,6 +7,7 @@ from fastapi import FastAPI
 from pydantic import BaseModel
 
 from shared.audit import audit_log
+from shared.aws_async import run_aws, shutdown_aws_executor
 from shared.logging import configure_logging
 from shared.models import PiiEntity, RedactionResult
 from shared.vault import SecureVault
@@ -14,6 +15,7 @@ from .redaction import apply_redaction, detect_pii
 
 
 logger = logging.getLogger("pii")
+vault = SecureVault()
 
 
 class RedactRequest(BaseModel):
@@ -30,6 +32,11 @@ async def startup() -> None:
     configure_logging("pii")
 
 
+@app.on_event("shutdown")
+async def shutdown() -> None:
+    shutdown_aws_executor()
+
+
 @app.get("/health")
 async def health() -> dict:
     return {"status": "ok"}
@@ -37,11 +44,10 @@ async def health() -> dict:
 
 @app.post("/v1/redact", response_model=RedactionResult)
 async def redact(request: RedactRequest) -> RedactionResult:
-    entities = detect_pii(request.text)
-    vault = SecureVault()
+    entities = await run_aws(detect_pii, request.text)
 
     pii_values: Dict[str, str] = {entity.text: entity.type.value for entity in entities}
-    token_map = vault.store_pii(request.document_id, pii_values)
+    token_map = await run_aws(vault.store_pii, request.document_id, pii_values)
 
     redacted_text = apply_redaction(request.text, entities, token_map, request.role)
 
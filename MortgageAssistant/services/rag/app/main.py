@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import asyncio
 import logging
 from typing import Dict, List
 
@@ -7,17 +8,34 @@ from fastapi import FastAPI
 from pydantic import BaseModel
 
 from shared.config import settings
-from shared.cache import EmbeddingCache
-from shared.llm import LlmProvider, call_service
+from shared.aws_async import run_aws, shutdown_aws_executor
+from shared.cache import AnswerCache, EmbeddingCache
+from shared.kv_store import get_shared_store
+from shared.http_client import ServiceClient
+from shared.llm import LlmProvider
 from shared.logging import configure_logging
 from shared.models import QueryRequest, QueryResponse
 from shared.utils import chunk_text, stable_hash
-from shared.vector_store import index_embedding, search_embeddings
+from shared.vector_store import bulk_index_embeddings, close_opensearch_client, get_opensearch_client, search_embeddings
 
 
 logger = logging.getLogger("rag")
 provider = LlmProvider()
-embedding_cache = EmbeddingCache()
+embedding_cache = EmbeddingCache(
+    ttl_seconds=settings.embedding_cache_ttl_s,
+    max_entries=settings.embedding_cache_max_entries,
+    max_bytes=settings.embedding_cache_max_mb * 1024 * 1024,
+    sweep_interval_s=settings.embedding_cache_sweep_interval_s,
+    shared=get_shared_store(),
+    namespace=f"emb:{settings.bedrock_embed_model}",
+)
+answer_cache = AnswerCache(
+    ttl_seconds=settings.answer_cache_ttl_s,
+    max_entries=settings.answer_cache_max_entries,
+    shared=get_shared_store(),
+)
+embed_slots = asyncio.Semaphore(settings.embed_concurrency)
+llm_router_service = ServiceClient("llm_router", settings.llm_router_url)
 
 
 class IndexRequest(BaseModel):
@@ -33,6 +51,16 @@ app = FastAPI(title="Mortgage Assistant RAG", version="1.0.0")
 @app.on_event("startup")
 async def startup() -> None:
     configure_logging("rag")
+    embedding_cache.start()
+    await llm_router_service.start()
+
+
+@app.on_event("shutdown")
+async def shutdown() -> None:
+    embedding_cache.stop()
+    await llm_router_service.aclose()
+    close_opensearch_client()
+    shutdown_aws_executor()
 
 
 @app.get("/health")
@@ -40,17 +68,35 @@ async def health() -> dict:
     return {"status": "ok"}
 
 
+@app.get("/metrics")
+async def metrics() -> dict:
+    client = get_opensearch_client()
+    # Only the in-memory stand-in records per-operation latencies.
+    return {
+        "embedding_cache": embedding_cache.stats(),
+        "answer_cache": answer_cache.stats(),
+        "downstream": {llm_router_service.name: llm_router_service.stats()},
+        "opensearch": client.stats() if hasattr(client, "stats") else {},
+    }
+
+
+async def _embed_chunk(chunk: str) -> List[float]:
+    cache_key = stable_hash(chunk)
+    embedding = await embedding_cache.aget(cache_key)
+    if embedding is None:
+        async with embed_slots:
+            embedding = await run_aws(provider.embed_bedrock, chunk)
+        await embedding_cache.aset(cache_key, embedding)
+    return embedding
+
+
 @app.post("/v1/index")
 async def index_document(request: IndexRequest) -> dict:
     chunks = chunk_text(request.redacted_text, settings.max_chunk_tokens, settings.chunk_overlap_tokens)
+    embeddings = await asyncio.gather(*(_embed_chunk(chunk) for chunk in chunks))
 
-    for idx, chunk in enumerate(chunks):
-        cache_key = stable_hash(chunk)
-        embedding = embedding_cache.get(cache_key)
-        if embedding is None:
-            embedding = provider.embed_bedrock(chunk)
-            embedding_cache.set(cache_key, embedding)
-        record = {
+    records = [
+        {
             "document_id": request.document_id,
             "loan_id": request.loan_id,
             "document_type": request.document_type,
@@ -63,22 +109,33 @@ async def index_document(request: IndexRequest) -> dict:
                 "chunk_index": idx,
             },
         }
-        index_embedding(record)
+        for idx, (chunk, embedding) in enumerate(zip(chunks, embeddings))
+    ]
+    # Returns once the chunks are searchable, so no query can cache a pre-index answer under the new version.
+    await asyncio.to_thread(bulk_index_embeddings, records)
+    if records:
+        await asyncio.to_thread(answer_cache.bump, request.loan_id)
 
     return {"status": "indexed", "chunks": len(chunks)}
 
 
 @app.post("/v1/query", response_model=QueryResponse)
 async def query_documents(request: QueryRequest) -> QueryResponse:
-    query_key = stable_hash(request.question)
-    query_embedding = embedding_cache.get(query_key)
-    if query_embedding is None:
-        query_embedding = provider.embed_bedrock(request.question)
-        embedding_cache.set(query_key, query_embedding)
-    hits = search_embeddings(
+    document_types = [doc.value for doc in request.document_types] if request.document_types else None
+    # Read the version before searching: if the loan is re-indexed mid-query, this
+    # answer is stored under the old version and never served.
+    version = await asyncio.to_thread(answer_cache.version, request.loan_id)
+    answer_key = answer_cache.key(request.loan_id, request.question, document_types, version)
+    cached = await asyncio.to_thread(answer_cache.get, answer_key)
+    if cached is not None:
+        return QueryResponse.model_validate_json(cached)
+
+    query_embedding = await _embed_chunk(request.question)
+    hits = await asyncio.to_thread(
+        search_embeddings,
         query_vector=query_embedding,
         loan_id=request.loan_id,
-        document_types=[doc.value for doc in request.document_types] if request.document_types else None,
+        document_types=document_types,
         k=5,
     )
 
@@ -89,8 +146,8 @@ async def query_documents(request: QueryRequest) -> QueryResponse:
         f"Context:\n{context}\n\nQuestion: {request.question}\nAnswer:"
     )
 
-    llm_response = await call_service(
-        f"{settings.llm_router_url}/v1/route",
+    llm_response = await llm_router_service.post(
+        "/v1/route",
         {
             "task_type": "rag_answer",
             "prompt": prompt,
@@ -111,4 +168,6 @@ async def query_documents(request: QueryRequest) -> QueryResponse:
         for hit in hits
     ]
 
-    return QueryResponse(answer=llm_response["content"], sources=sources, model_provider=llm_response["provider"])
+    response = QueryResponse(answer=llm_response["content"], sources=sources, model_provider=llm_response["provider"])
+    await asyncio.to_thread(answer_cache.set, answer_key, response.model_dump_json().encode())
+    return response
@@ -1,5 +1,8 @@
 from __future__ import annotations
 
+import threading
+from typing import Any, Dict, Tuple
+
 from botocore.config import Config
 import boto3
 
@@ -10,28 +13,57 @@ _default_config = Config(
     retries={"max_attempts": 5, "mode": "standard"},
     connect_timeout=settings.request_timeout_s,
     read_timeout=settings.request_timeout_s,
+    # Every thread of the AWS executor may hold a connection at once.
+    max_pool_connections=settings.aws_max_workers,
 )
 
+# boto3 clients are thread-safe and expensive to build, so each is created once per
+# process. Sessions and resources are not thread-safe: clients are built from a
+# session under a lock, and DynamoDB resources are kept per thread.
+_session_lock = threading.Lock()
+_clients: Dict[Tuple[str, str], Any] = {}
+_local = threading.local()
+
+
+def _client(service: str, region: str):
+    client = _clients.get((service, region))
+    if client is None:
+        with _session_lock:
+            client = _clients.get((service, region))
+            if client is None:
+                client = boto3.session.Session().client(service, region_name=region, config=_default_config)
+                _clients[(service, region)] = client
+    return client
+
 
 def s3_client():
-    return boto3.client("s3", region_name=settings.aws_region, config=_default_config)
+    return _client("s3", settings.aws_region)
 
 
 def textract_client():
-    return boto3.client("textract", region_name=settings.aws_region, config=_default_config)
+    return _client("textract", settings.aws_region)
 
 
 def comprehend_client():
-    return boto3.client("comprehend", region_name=settings.aws_region, config=_default_config)
+    return _client("comprehend", settings.aws_region)
 
 
 def dynamodb_resource():
-    return boto3.resource("dynamodb", region_name=settings.aws_region, config=_default_config)
+    resource = getattr(_local, "dynamodb", None)
+    if resource is None:
+        with _session_lock:
+            resource = boto3.session.Session().resource("dynamodb", region_name=settings.aws_region, config=_default_config)
+        _local.dynamodb = resource
+    return resource
+
+
+def sqs_client():
+    return _client("sqs", settings.aws_region)
 
 
 def kms_client():
-    return boto3.client("kms", region_name=settings.aws_region, config=_default_config)
+    return _client("kms", settings.aws_region)
 
 
 def bedrock_runtime_client():
-    return boto3.client("bedrock-runtime", region_name=settings.bedrock_region, config=_default_config)
+    return _client("bedrock-runtime", settings.bedrock_region)
@@ -1,23 +1,301 @@
 from __future__ import annotations
 
+import asyncio
+import logging
+import re
+import threading
 import time
-from typing import Dict, List, Tuple
+from array import array
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Tuple
+from uuid import uuid4
+
+from shared.kv_store import SharedStore
+from shared.utils import stable_hash
+
+
+logger = logging.getLogger("cache")
 
 
 class EmbeddingCache:
-    def __init__(self, ttl_seconds: int = 3600) -> None:
+    # LRU bounded by entry count and bytes, with a fixed TTL. Vectors are kept as
+    # float32 arrays (4 bytes per value instead of ~28 for a list of Python floats).
+    # With a shared store, misses are looked up there and sets are written through,
+    # so replicas reuse each other's embeddings.
+    def __init__(
+        self,
+        ttl_seconds: int = 3600,
+        max_entries: int = 50_000,
+        max_bytes: int = 256 * 1024 * 1024,
+        sweep_interval_s: float = 60.0,
+        shared: SharedStore | None = None,
+        namespace: str = "emb",
+    ) -> None:
         self.ttl_seconds = ttl_seconds
-        self._store: Dict[str, Tuple[float, List[float]]] = {}
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sweep_interval_s = sweep_interval_s
+        self.namespace = namespace
+        self._shared = shared
+        self._store: OrderedDict[str, Tuple[float, array]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sweeper: threading.Thread | None = None
+        self.bytes = 0
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.shared_errors = 0
+
+    @staticmethod
+    def _entry_bytes(key: str, vector: array) -> int:
+        return len(key) + len(vector) * vector.itemsize
+
+    def _remove(self, key: str) -> None:
+        _, vector = self._store.pop(key)
+        self.bytes -= self._entry_bytes(key, vector)
+
+    def _put(self, key: str, vector: array) -> None:
+        with self._lock:
+            if key in self._store:
+                self._remove(key)
+            self._store[key] = (time.monotonic() + self.ttl_seconds, vector)
+            self.bytes += self._entry_bytes(key, vector)
+            while self._store and (len(self._store) > self.max_entries or self.bytes > self.max_bytes):
+                self._remove(next(iter(self._store)))
+                self.evictions += 1
+
+    def _shared_key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    def _get_local(self, key: str) -> List[float] | None:
+        with self._lock:
+            entry = self._store.get(key)
+            if entry is not None:
+                expires_at, vector = entry
+                if expires_at > time.monotonic():
+                    self._store.move_to_end(key)
+                    self.hits += 1
+                    return vector.tolist()
+                self._remove(key)
+                self.expirations += 1
+        return None
+
+    def _get_shared(self, key: str) -> List[float] | None:
+        if self._shared is not None:
+            try:
+                payload = self._shared.get(self._shared_key(key))
+            except Exception:
+                self.shared_errors += 1
+                logger.warning("shared_cache_get_failed", exc_info=True)
+                payload = None
+            if payload:
+                vector = array("f")
+                vector.frombytes(payload)
+                self._put(key, vector)
+                with self._lock:
+                    self.shared_hits += 1
+                return vector.tolist()
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def _set_shared(self, key: str, vector: array) -> None:
+        try:
+            self._shared.set(self._shared_key(key), vector.tobytes(), self.ttl_seconds)
+        except Exception:
+            self.shared_errors += 1
+            logger.warning("shared_cache_set_failed", exc_info=True)
 
     def get(self, key: str) -> List[float] | None:
-        entry = self._store.get(key)
-        if not entry:
-            return None
-        created_at, value = entry
-        if time.time() - created_at > self.ttl_seconds:
-            self._store.pop(key, None)
-            return None
-        return value
+        value = self._get_local(key)
+        return value if value is not None else self._get_shared(key)
 
     def set(self, key: str, value: List[float]) -> None:
-        self._store[key] = (time.time(), value)
+        vector = array("f", value)
+        self._put(key, vector)
+        if self._shared is not None:
+            self._set_shared(key, vector)
+
+    # For async callers: local hits are answered inline; only a shared-store round trip
+    # runs in a thread, so Redis latency never blocks the event loop.
+    async def aget(self, key: str) -> List[float] | None:
+        value = self._get_local(key)
+        if value is not None:
+            return value
+        if self._shared is None:
+            return self._get_shared(key)
+        return await asyncio.to_thread(self._get_shared, key)
+
+    async def aset(self, key: str, value: List[float]) -> None:
+        vector = array("f", value)
+        self._put(key, vector)
+        if self._shared is not None:
+            await asyncio.to_thread(self._set_shared, key, vector)
+
+    def expire(self) -> int:
+        now = time.monotonic()
+        with self._lock:
+            expired = [key for key, (expires_at, _) in self._store.items() if expires_at <= now]
+            for key in expired:
+                self._remove(key)
+            self.expirations += len(expired)
+        return len(expired)
+
+    def _sweep(self) -> None:
+        while not self._stop.wait(self.sweep_interval_s):
+            expired = self.expire()
+            if expired:
+                logger.info("embedding_cache_expired", extra={"entries": expired})
+
+    def start(self) -> None:
+        if self._sweeper is None or not self._sweeper.is_alive():
+            self._stop.clear()
+            self._sweeper = threading.Thread(target=self._sweep, name="embedding-cache-expiry", daemon=True)
+            self._sweeper.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._sweeper is not None:
+            self._sweeper.join()
+            self._sweeper = None
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.shared_hits + self.misses
+            return {
+                "entries": len(self._store),
+                "bytes": self.bytes,
+                "hits": self.hits,
+                "shared_hits": self.shared_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "shared_errors": self.shared_errors,
+                "hit_ratio": round((self.hits + self.shared_hits) / lookups, 4) if lookups else 0.0,
+            }
+
+
+class AnswerCache:
+    # Serialized answers keyed by (loan, normalized question, document types, loan index
+    # version). Indexing a loan replaces its version token, so answers computed before
+    # the new chunks landed are never served again and simply age out. Tokens are random
+    # rather than counters: if the shared store loses a loan's version, a fresh token is
+    # created and lookups miss instead of matching answers from an older index.
+    def __init__(
+        self,
+        ttl_seconds: int = 900,
+        max_entries: int = 10_000,
+        version_ttl_seconds: int = 7 * 24 * 3600,
+        shared: SharedStore | None = None,
+        namespace: str = "answer",
+    ) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.version_ttl_seconds = version_ttl_seconds
+        self.namespace = namespace
+        self._shared = shared
+        self._store: OrderedDict[str, Tuple[float, bytes]] = OrderedDict()
+        self._versions: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.shared_errors = 0
+
+    @staticmethod
+    def normalize_question(question: str) -> str:
+        return re.sub(r"\s+", " ", question).strip().lower().rstrip("?.! ")
+
+    def key(self, loan_id: str, question: str, document_types: Iterable[str] | None, version: str) -> str:
+        types = ",".join(sorted(set(document_types))) if document_types else "*"
+        return stable_hash("\x1f".join([loan_id, self.normalize_question(question), types, version]))
+
+    def _version_key(self, loan_id: str) -> str:
+        return f"{self.namespace}:version:{loan_id}"
+
+    def _shared_call(self, operation: str, call):
+        try:
+            return call()
+        except Exception:
+            with self._lock:
+                self.shared_errors += 1
+            logger.warning(f"shared_answer_cache_{operation}_failed", exc_info=True)
+            return None
+
+    def version(self, loan_id: str) -> str:
+        if self._shared is None:
+            with self._lock:
+                return self._versions.setdefault(loan_id, uuid4().hex)
+        version_key = self._version_key(loan_id)
+        stored = self._shared_call("get", lambda: self._shared.get(version_key))
+        if stored is None:
+            self._shared_call("set", lambda: self._shared.add(version_key, uuid4().hex.encode(), self.version_ttl_seconds))
+            stored = self._shared_call("get", lambda: self._shared.get(version_key))
+        # Without a readable version nothing can be cached safely; a one-off token forces a miss.
+        return stored.decode() if stored else f"unversioned-{uuid4().hex}"
+
+    def bump(self, loan_id: str) -> None:
+        token = uuid4().hex
+        if self._shared is None:
+            with self._lock:
+                self._versions[loan_id] = token
+        else:
+            self._shared_call("set", lambda: self._shared.set(self._version_key(loan_id), token.encode(), self.version_ttl_seconds))
+        with self._lock:
+            self.invalidations += 1
+
+    def get(self, key: str) -> bytes | None:
+        with self._lock:
+            entry = self._store.get(key)
+            if entry is not None:
+                expires_at, payload = entry
+                if expires_at > time.monotonic():
+                    self._store.move_to_end(key)
+                    self.hits += 1
+                    return payload
+                del self._store[key]
+
+        if self._shared is not None:
+            payload = self._shared_call("get", lambda: self._shared.get(f"{self.namespace}:{key}"))
+            if payload:
+                self._put(key, payload)
+                with self._lock:
+                    self.shared_hits += 1
+                return payload
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def _put(self, key: str, payload: bytes) -> None:
+        with self._lock:
+            self._store[key] = (time.monotonic() + self.ttl_seconds, payload)
+            self._store.move_to_end(key)
+            while len(self._store) > self.max_entries:
+                self._store.popitem(last=False)
+                self.evictions += 1
+
+    def set(self, key: str, payload: bytes) -> None:
+        self._put(key, payload)
+        if self._shared is not None:
+            self._shared_call("set", lambda: self._shared.set(f"{self.namespace}:{key}", payload, self.ttl_seconds))
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.shared_hits + self.misses
+            return {
+                "entries": len(self._store),
+                "hits": self.hits,
+                "shared_hits": self.shared_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "shared_errors": self.shared_errors,
+                "hit_ratio": round((self.hits + self.shared_hits) / lookups, 4) if lookups else 0.0,
+            }
@@ -1,3 +1,5 @@
+from typing import Dict
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -6,6 +8,8 @@ class Settings(BaseSettings):
 
     env: str = "dev"
     aws_region: str = "us-east-1"
+    # Threads (and botocore connections) for blocking AWS calls made from async handlers.
+    aws_max_workers: int = 32
 
     s3_bucket: str
     dynamodb_table: str
@@ -14,6 +18,12 @@ class Settings(BaseSettings):
 
     opensearch_endpoint: str
     opensearch_index: str = "mortgage-docs"
+    opensearch_pool_maxsize: int = 32
+    opensearch_timeout_s: int = 10
+    opensearch_max_retries: int = 3
+    opensearch_memory_latency_ms: float = 0.0
+    # Near-real-time visibility in the memory:// stand-in, like a cluster's default 1s refresh.
+    opensearch_memory_refresh_interval_s: float = 1.0
 
     bedrock_region: str = "us-east-1"
     bedrock_embed_model: str
@@ -29,9 +39,44 @@ class Settings(BaseSettings):
     llm_router_url: str
 
     request_timeout_s: int = 20
+    # Routes that legitimately take longer than request_timeout_s (JSON object in the env).
+    http_route_timeouts_s: Dict[str, float] = {"/v1/ingest": 120.0, "/v1/query": 60.0, "/v1/route": 45.0}
+    http_max_connections: int = 100
+    http_max_keepalive_connections: int = 20
+    http_keepalive_expiry_s: float = 30.0
+    http2_enabled: bool = False
+    http_retry_attempts: int = 3
+    http_retry_max_backoff_s: float = 2.0
+    circuit_failure_threshold: int = 5
+    circuit_reset_timeout_s: float = 30.0
     max_chunk_tokens: int = 700
     chunk_overlap_tokens: int = 120
     rate_limit_rps: int = 10
+    # Requests a loan may send at once before being held to rate_limit_rps; defaults to rate_limit_rps.
+    rate_limit_burst: int | None = None
+
+    embed_concurrency: int = 8
+    embedding_cache_ttl_s: int = 3600
+    embedding_cache_max_entries: int = 50_000
+    embedding_cache_max_mb: int = 256
+    embedding_cache_sweep_interval_s: float = 60.0
+    answer_cache_ttl_s: int = 900
+    answer_cache_max_entries: int = 10_000
+
+    # redis://... shares caches across replicas; memory:// is a process-local stand-in.
+    shared_store_url: str | None = None
+    shared_store_timeout_s: float = 0.5
+    opensearch_bulk_batch_size: int = 500
+    opensearch_bulk_refresh_off_min_chunks: int = 100
+
+    # sqlite:///path is a local stand-in shared by processes on one host; otherwise an SQS queue URL.
+    ingest_queue_url: str = "sqlite:///ingest_queue.db"
+    ingest_dead_letter_queue_url: str | None = None
+    ingest_workers: int = 4
+    ingest_jobs_per_worker: int = 4
+    ingest_visibility_timeout_s: int = 300
+    ingest_max_attempts: int = 5
+    ingest_retry_base_s: float = 5.0
 
 
 settings = Settings()
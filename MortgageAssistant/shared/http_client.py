@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+import asyncio
+import importlib.util
+import logging
+import time
+from collections import defaultdict, deque
+from typing import Deque, Dict
+
+import httpx
+from fastapi import HTTPException
+from tenacity import AsyncRetrying, retry_if_exception, stop_after_attempt, wait_random_exponential
+
+from shared.config import settings
+
+
+logger = logging.getLogger("http_client")
+
+_LATENCY_SAMPLES = 2048
+_RETRYABLE_STATUSES = {502, 503, 504}
+
+
+class CircuitOpenError(HTTPException):
+    def __init__(self, service: str) -> None:
+        super().__init__(status_code=503, detail=f"{service} service unavailable")
+        self.service = service
+
+
+class CircuitBreaker:
+    # Opens after failure_threshold consecutive failures and fails fast until
+    # reset_timeout_s has passed. Then a single probe is let through: success closes
+    # the circuit, failure opens it for another reset_timeout_s.
+    def __init__(self, name: str, failure_threshold: int, reset_timeout_s: float) -> None:
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout_s = reset_timeout_s
+        self.failures = 0
+        self.opened_at: float | None = None
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if self._probing or time.monotonic() - self.opened_at >= self.reset_timeout_s:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        if self.opened_at is None:
+            return True
+        if self._probing or time.monotonic() - self.opened_at < self.reset_timeout_s:
+            return False
+        self._probing = True
+        return True
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+
+    def release_probe(self) -> None:
+        self._probing = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self._probing or (self.opened_at is None and self.failures >= self.failure_threshold):
+            logger.warning("circuit_opened", extra={"service": self.name, "failures": self.failures})
+            self.opened_at = time.monotonic()
+        self._probing = False
+
+
+def _retryable(exc: BaseException) -> bool:
+    # Only retry when the request cannot have been processed (no connection) or the
+    # downstream said it is temporarily unavailable; a read timeout is not retried.
+    if isinstance(exc, (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)):
+        return True
+    return isinstance(exc, httpx.HTTPStatusError) and exc.response.status_code in _RETRYABLE_STATUSES
+
+
+class ServiceClient:
+    # One long-lived connection pool per downstream service, opened in the app's startup
+    # hook and closed on shutdown, so calls reuse keep-alive connections.
+    def __init__(self, name: str, base_url: str) -> None:
+        self.name = name
+        self.base_url = base_url.rstrip("/")
+        self.breaker = CircuitBreaker(name, settings.circuit_failure_threshold, settings.circuit_reset_timeout_s)
+        self._client: httpx.AsyncClient | None = None
+        self._latencies: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=_LATENCY_SAMPLES))
+        self._counts: Dict[str, int] = defaultdict(int)
+        self._errors: Dict[str, int] = defaultdict(int)
+        self.rejected = 0
+        self.retries = 0
+
+    async def start(self) -> None:
+        if self._client is not None:
+            return
+        http2 = settings.http2_enabled and importlib.util.find_spec("h2") is not None
+        if settings.http2_enabled and not http2:
+            logger.warning("http2_unavailable", extra={"service": self.name, "reason": "h2 package not installed"})
+        self._client = httpx.AsyncClient(
+            base_url=self.base_url,
+            http2=http2,
+            timeout=settings.request_timeout_s,
+            limits=httpx.Limits(
+                max_connections=settings.http_max_connections,
+                max_keepalive_connections=settings.http_max_keepalive_connections,
+                keepalive_expiry=settings.http_keepalive_expiry_s,
+            ),
+        )
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _send(self, path: str, payload: dict, timeout: float) -> dict:
+        response = await self._client.post(path, json=payload, timeout=timeout)
+        response.raise_for_status()
+        return response.json()
+
+    async def post(self, path: str, payload: dict) -> dict:
+        if self._client is None:
+            await self.start()
+        if not self.breaker.allow():
+            self.rejected += 1
+            raise CircuitOpenError(self.name)
+
+        timeout = settings.http_route_timeouts_s.get(path, settings.request_timeout_s)
+        started = time.perf_counter()
+        try:
+            async for attempt in AsyncRetrying(
+                retry=retry_if_exception(_retryable),
+                stop=stop_after_attempt(settings.http_retry_attempts),
+                wait=wait_random_exponential(multiplier=0.1, max=settings.http_retry_max_backoff_s),
+                reraise=True,
+            ):
+                with attempt:
+                    if attempt.retry_state.attempt_number > 1:
+                        self.retries += 1
+                    result = await self._send(path, payload, timeout)
+        except httpx.HTTPStatusError as exc:
+            self._errors[path] += 1
+            # A 4xx means the service is up and rejected this request.
+            if exc.response.status_code >= 500:
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+            raise
+        except asyncio.CancelledError:
+            # Our caller went away; that says nothing about the downstream service, but
+            # a half-open probe must still be handed back or the circuit never closes.
+            self.breaker.release_probe()
+            raise
+        except BaseException:
+            # Transport errors, undecodable bodies and anything else unexpected.
+            self._errors[path] += 1
+            self.breaker.record_failure()
+            raise
+        finally:
+            self._counts[path] += 1
+            self._latencies[path].append((time.perf_counter() - started) * 1000)
+        self.breaker.record_success()
+        return result
+
+    def stats(self) -> Dict[str, object]:
+        routes = {}
+        for path, samples in self._latencies.items():
+            ordered = sorted(samples)
+            routes[path] = {
+                "count": self._counts[path],
+                "errors": self._errors[path],
+                "mean_ms": round(sum(ordered) / len(ordered), 3),
+                "p50_ms": round(ordered[len(ordered) // 2], 3),
+                "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 3),
+                "max_ms": round(ordered[-1], 3),
+            }
+        return {
+            "circuit": self.breaker.state,
+            "retries": self.retries,
+            "rejected": self.rejected,
+            "routes": routes,
+        }
@@ -0,0 +1,243 @@
+from __future__ import annotations
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Protocol
+from uuid import uuid4
+
+from botocore.exceptions import ClientError
+
+from shared.aws_clients import sqs_client
+from shared.config import settings
+
+
+logger = logging.getLogger("job_queue")
+
+SQLITE_PREFIX = "sqlite:///"
+
+
+@dataclass
+class ReceivedJob:
+    job_id: str
+    body: Dict[str, Any]
+    receipt: str
+    attempts: int
+
+
+class JobQueue(Protocol):
+    # At-least-once delivery, SQS semantics: a received job is hidden for the visibility
+    # timeout and comes back if it is neither acked nor released before then. attempts
+    # counts deliveries, including ones whose worker died. extend keeps a job that is still
+    # running hidden; it returns False once the delivery is stale (acked, released or redelivered).
+    def enqueue(self, body: Dict[str, Any], job_id: str) -> str: ...
+
+    def receive(self, max_jobs: int, visibility_timeout_s: int, wait_s: float) -> List[ReceivedJob]: ...
+
+    def ack(self, job: ReceivedJob) -> None: ...
+
+    def release(self, job: ReceivedJob, delay_s: float) -> None: ...
+
+    def extend(self, job: ReceivedJob, visibility_timeout_s: int) -> bool: ...
+
+    def dead_letter(self, job: ReceivedJob, error: str) -> None: ...
+
+    def stats(self) -> Dict[str, int]: ...
+
+
+class SqsJobQueue:
+    def __init__(self, queue_url: str, dead_letter_url: str | None) -> None:
+        self.queue_url = queue_url
+        self.dead_letter_url = dead_letter_url
+
+    def enqueue(self, body: Dict[str, Any], job_id: str) -> str:
+        sqs_client().send_message(
+            QueueUrl=self.queue_url,
+            MessageBody=json.dumps(body),
+            MessageAttributes={"job_id": {"DataType": "String", "StringValue": job_id}},
+        )
+        return job_id
+
+    def receive(self, max_jobs: int, visibility_timeout_s: int, wait_s: float) -> List[ReceivedJob]:
+        response = sqs_client().receive_message(
+            QueueUrl=self.queue_url,
+            MaxNumberOfMessages=max(1, min(max_jobs, 10)),
+            VisibilityTimeout=visibility_timeout_s,
+            WaitTimeSeconds=int(min(wait_s, 20)),
+            AttributeNames=["ApproximateReceiveCount"],
+            MessageAttributeNames=["job_id"],
+        )
+        return [
+            ReceivedJob(
+                job_id=message.get("MessageAttributes", {}).get("job_id", {}).get("StringValue", message["MessageId"]),
+                body=json.loads(message["Body"]),
+                receipt=message["ReceiptHandle"],
+                attempts=int(message.get("Attributes", {}).get("ApproximateReceiveCount", 1)),
+            )
+            for message in response.get("Messages", [])
+        ]
+
+    def ack(self, job: ReceivedJob) -> None:
+        sqs_client().delete_message(QueueUrl=self.queue_url, ReceiptHandle=job.receipt)
+
+    def release(self, job: ReceivedJob, delay_s: float) -> None:
+        sqs_client().change_message_visibility(
+            QueueUrl=self.queue_url, ReceiptHandle=job.receipt, VisibilityTimeout=int(delay_s)
+        )
+
+    def extend(self, job: ReceivedJob, visibility_timeout_s: int) -> bool:
+        try:
+            sqs_client().change_message_visibility(
+                QueueUrl=self.queue_url, ReceiptHandle=job.receipt, VisibilityTimeout=int(visibility_timeout_s)
+            )
+        except ClientError as exc:
+            # The receipt handle stops working once the message was deleted or received again.
+            if exc.response.get("Error", {}).get("Code") in ("ReceiptHandleIsInvalid", "InvalidParameterValue"):
+                return False
+            raise
+        return True
+
+    def dead_letter(self, job: ReceivedJob, error: str) -> None:
+        # The queue's redrive policy also dead-letters jobs whose workers keep dying.
+        if self.dead_letter_url:
+            sqs_client().send_message(
+                QueueUrl=self.dead_letter_url,
+                MessageBody=json.dumps(job.body),
+                MessageAttributes={
+                    "job_id": {"DataType": "String", "StringValue": job.job_id},
+                    "error": {"DataType": "String", "StringValue": error[:1000]},
+                },
+            )
+        else:
+            logger.error("job_dropped_without_dead_letter_queue", extra={"job_id": job.job_id, "error": error})
+        self.ack(job)
+
+    def stats(self) -> Dict[str, int]:
+        names = ["ApproximateNumberOfMessages", "ApproximateNumberOfMessagesNotVisible"]
+        attributes = sqs_client().get_queue_attributes(QueueUrl=self.queue_url, AttributeNames=names)["Attributes"]
+        dead = 0
+        if self.dead_letter_url:
+            dead_attributes = sqs_client().get_queue_attributes(QueueUrl=self.dead_letter_url, AttributeNames=names[:1])
+            dead = int(dead_attributes["Attributes"]["ApproximateNumberOfMessages"])
+        return {
+            "visible": int(attributes["ApproximateNumberOfMessages"]),
+            "in_flight": int(attributes["ApproximateNumberOfMessagesNotVisible"]),
+            "dead": dead,
+        }
+
+
+class SqliteJobQueue:
+    # Local stand-in with the same semantics, shared between processes through one
+    # SQLite file. Claims run in an IMMEDIATE transaction, so two workers never receive
+    # the same delivery; acks and releases with a stale receipt are ignored, like SQS.
+    _POLL_S = 0.1
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " job_id TEXT PRIMARY KEY, body TEXT NOT NULL, dead INTEGER NOT NULL DEFAULT 0,"
+                " visible_at REAL NOT NULL, receipt TEXT, attempts INTEGER NOT NULL DEFAULT 0, last_error TEXT)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_visible ON jobs (dead, visible_at)")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def enqueue(self, body: Dict[str, Any], job_id: str) -> str:
+        self._connect().execute(
+            "INSERT INTO jobs (job_id, body, visible_at) VALUES (?, ?, ?)", (job_id, json.dumps(body), time.time())
+        )
+        return job_id
+
+    def _claim(self, max_jobs: int, visibility_timeout_s: int) -> List[ReceivedJob]:
+        conn = self._connect()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            rows = conn.execute(
+                "SELECT job_id, body, attempts FROM jobs WHERE dead = 0 AND visible_at <= ? ORDER BY visible_at LIMIT ?",
+                (now, max_jobs),
+            ).fetchall()
+            jobs = []
+            for job_id, body, attempts in rows:
+                receipt = uuid4().hex
+                conn.execute(
+                    "UPDATE jobs SET receipt = ?, visible_at = ?, attempts = ? WHERE job_id = ?",
+                    (receipt, now + visibility_timeout_s, attempts + 1, job_id),
+                )
+                jobs.append(ReceivedJob(job_id=job_id, body=json.loads(body), receipt=receipt, attempts=attempts + 1))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return jobs
+
+    def receive(self, max_jobs: int, visibility_timeout_s: int, wait_s: float) -> List[ReceivedJob]:
+        deadline = time.monotonic() + wait_s
+        while True:
+            jobs = self._claim(max_jobs, visibility_timeout_s)
+            if jobs or time.monotonic() >= deadline:
+                return jobs
+            time.sleep(self._POLL_S)
+
+    def ack(self, job: ReceivedJob) -> None:
+        self._connect().execute("DELETE FROM jobs WHERE job_id = ? AND receipt = ?", (job.job_id, job.receipt))
+
+    def release(self, job: ReceivedJob, delay_s: float) -> None:
+        self._connect().execute(
+            "UPDATE jobs SET visible_at = ? WHERE job_id = ? AND receipt = ?",
+            (time.time() + delay_s, job.job_id, job.receipt),
+        )
+
+    def extend(self, job: ReceivedJob, visibility_timeout_s: int) -> bool:
+        cursor = self._connect().execute(
+            "UPDATE jobs SET visible_at = ? WHERE job_id = ? AND receipt = ? AND dead = 0",
+            (time.time() + visibility_timeout_s, job.job_id, job.receipt),
+        )
+        return cursor.rowcount > 0
+
+    def dead_letter(self, job: ReceivedJob, error: str) -> None:
+        self._connect().execute(
+            "UPDATE jobs SET dead = 1, last_error = ? WHERE job_id = ? AND receipt = ?",
+            (error[:1000], job.job_id, job.receipt),
+        )
+
+    def stats(self) -> Dict[str, int]:
+        now = time.time()
+        visible, in_flight, dead = self._connect().execute(
+            "SELECT"
+            " COALESCE(SUM(dead = 0 AND visible_at <= ?), 0),"
+            " COALESCE(SUM(dead = 0 AND visible_at > ?), 0),"
+            " COALESCE(SUM(dead = 1), 0) FROM jobs",
+            (now, now),
+        ).fetchone()
+        # Jobs waiting out a retry delay count as in flight, as they do on SQS.
+        return {"visible": visible, "in_flight": in_flight, "dead": dead}
+
+
+_queue: JobQueue | None = None
+_queue_lock = threading.Lock()
+
+
+def get_job_queue() -> JobQueue:
+    global _queue
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                if settings.ingest_queue_url.startswith(SQLITE_PREFIX):
+                    _queue = SqliteJobQueue(settings.ingest_queue_url[len(SQLITE_PREFIX):])
+                else:
+                    _queue = SqsJobQueue(settings.ingest_queue_url, settings.ingest_dead_letter_queue_url)
+                logger.info("job_queue_configured", extra={"backend": type(_queue).__name__})
+    return _queue
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from typing import Dict, Protocol, Tuple
+
+from shared.config import settings
+
+
+logger = logging.getLogger("kv_store")
+
+MEMORY_URL = "memory://"
+
+# GCRA: the key holds the bucket's theoretical arrival time (TAT), on the server clock
+# so replicas agree. It expires once the bucket is full again, keeping memory bounded.
+_GCRA_SCRIPT = """
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local interval = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local tat = tonumber(redis.call('GET', KEYS[1]) or now)
+if tat < now then tat = now end
+local new_tat = tat + interval
+if new_tat - now > capacity then return 0 end
+redis.call('SET', KEYS[1], string.format('%.6f', new_tat), 'PX', math.ceil((new_tat - now) * 1000))
+return 1
+"""
+
+
+class SharedStore(Protocol):
+    def get(self, key: str) -> bytes | None: ...
+
+    def set(self, key: str, value: bytes, ttl_seconds: int) -> None: ...
+
+    def add(self, key: str, value: bytes, ttl_seconds: int) -> bool: ...
+
+    def gcra(self, key: str, interval_s: float, capacity_s: float) -> bool: ...
+
+
+class InMemoryStore:
+    # Process-local stand-in for the shared store, for tests and single-replica development.
+    def __init__(self) -> None:
+        self._items: Dict[str, Tuple[float, bytes]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> bytes | None:
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at <= time.monotonic():
+                del self._items[key]
+                return None
+            return value
+
+    def set(self, key: str, value: bytes, ttl_seconds: int) -> None:
+        with self._lock:
+            self._items[key] = (time.monotonic() + ttl_seconds, value)
+
+    def add(self, key: str, value: bytes, ttl_seconds: int) -> bool:
+        with self._lock:
+            item = self._items.get(key)
+            if item is not None and item[0] > time.monotonic():
+                return False
+            self._items[key] = (time.monotonic() + ttl_seconds, value)
+            return True
+
+    def gcra(self, key: str, interval_s: float, capacity_s: float) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            item = self._items.get(key)
+            tat = float(item[1]) if item is not None and item[0] > now else now
+            new_tat = max(tat, now) + interval_s
+            if new_tat - now > capacity_s:
+                return False
+            self._items[key] = (new_tat, repr(new_tat).encode())
+            return True
+
+
+class RedisStore:
+    def __init__(self, url: str) -> None:
+        try:
+            import redis
+        except ImportError as exc:
+            raise RuntimeError("SHARED_STORE_URL points at Redis but the redis package is not installed") from exc
+        self._client = redis.Redis.from_url(
+            url,
+            socket_timeout=settings.shared_store_timeout_s,
+            socket_connect_timeout=settings.shared_store_timeout_s,
+        )
+        self._gcra = self._client.register_script(_GCRA_SCRIPT)
+
+    def get(self, key: str) -> bytes | None:
+        return self._client.get(key)
+
+    def set(self, key: str, value: bytes, ttl_seconds: int) -> None:
+        self._client.set(key, value, ex=ttl_seconds)
+
+    def add(self, key: str, value: bytes, ttl_seconds: int) -> bool:
+        return bool(self._client.set(key, value, ex=ttl_seconds, nx=True))
+
+    def gcra(self, key: str, interval_s: float, capacity_s: float) -> bool:
+        return bool(self._gcra(keys=[key], args=[interval_s, capacity_s]))
+
+
+_store: SharedStore | None = None
+_store_lock = threading.Lock()
+
+
+def get_shared_store() -> SharedStore | None:
+    global _store
+    if not settings.shared_store_url:
+        return None
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                if settings.shared_store_url.startswith(MEMORY_URL):
+                    _store = InMemoryStore()
+                else:
+                    _store = RedisStore(settings.shared_store_url)
+                logger.info("shared_store_configured", extra={"backend": type(_store).__name__})
+    return _store
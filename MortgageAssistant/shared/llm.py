@@ -3,7 +3,6 @@ from __future__ import annotations
 import json
 from typing import List
 
-import httpx
 from openai import OpenAI
 
 from shared.aws_clients import bedrock_runtime_client
@@ -60,9 +59,3 @@ class LlmProvider:
             return content.get("text", "")
         return content or ""
 
-
-async def call_service(url: str, payload: dict) -> dict:
-    async with httpx.AsyncClient(timeout=settings.request_timeout_s) as client:
-        response = await client.post(url, json=payload)
-        response.raise_for_status()
-        return response.json()
@@ -33,6 +33,14 @@ class UploadCompleteRequest(BaseModel):
     document_type: DocumentType
 
 
+class DocumentStatusResponse(BaseModel):
+    document_id: str
+    status: str
+    job_id: Optional[str] = None
+    attempts: int = 0
+    last_error: Optional[str] = None
+
+
 class MortgageFields(BaseModel):
     employer: Optional[str] = None
     income: Optional[str] = None
@@ -0,0 +1,309 @@
+from __future__ import annotations
+
+import json
+import random
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator, List, Tuple
+from uuid import uuid4
+
+from opensearchpy.serializer import JSONSerializer
+
+
+# In-process stand-in for the subset of the OpenSearch API the services use: index,
+# bulk (through opensearchpy.helpers.bulk too), get/count, filtered k-NN search and the
+# index settings/refresh calls. Select it with OPENSEARCH_ENDPOINT=memory:// for local
+# load and unit testing. With refresh_interval_s set, writes become searchable like on a
+# cluster: after a refresh (explicit, a write's refresh parameter, or the interval elapsing
+# while the index's refresh_interval is not "-1"); get is realtime either way. Without it,
+# documents are searchable immediately. k-NN is exact and applied after the filters, so
+# results can be a superset of approximate k-NN on a cluster.
+
+_LATENCY_SAMPLES = 2048
+
+
+def _field(source: Dict[str, Any], path: str) -> Any:
+    value: Any = source
+    for part in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+def _matches(source: Dict[str, Any], clause: Dict[str, Any]) -> bool:
+    if "match_all" in clause:
+        return True
+    if "term" in clause:
+        field, expected = next(iter(clause["term"].items()))
+        if isinstance(expected, dict):
+            expected = expected.get("value")
+        return _field(source, field) == expected
+    if "terms" in clause:
+        field, allowed = next(iter(clause["terms"].items()))
+        return _field(source, field) in allowed
+    raise ValueError(f"Unsupported query clause: {sorted(clause)}")
+
+
+def _split_query(query: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], Dict[str, Any] | None]:
+    if "knn" in query:
+        return [], query["knn"]
+    if "bool" not in query:
+        return [query], None
+    bool_query = query["bool"]
+    filters = bool_query.get("filter", [])
+    filters = [filters] if isinstance(filters, dict) else list(filters)
+    must = bool_query.get("must", [])
+    knn = None
+    for clause in [must] if isinstance(must, dict) else must:
+        if "knn" in clause:
+            knn = clause["knn"]
+        else:
+            filters.append(clause)
+    return filters, knn
+
+
+def _l2_score(left: List[float], right: List[float]) -> float:
+    # Same scoring as the k-NN plugin's l2 space: 1 / (1 + squared distance).
+    return 1.0 / (1.0 + sum((a - b) ** 2 for a, b in zip(left, right)))
+
+
+class _Transport:
+    # opensearchpy.helpers.bulk serializes actions with client.transport.serializer.
+    serializer = JSONSerializer()
+
+
+class _Indices:
+    def __init__(self, client: "InMemoryOpenSearch") -> None:
+        self._client = client
+
+    def exists(self, index: str, **_: Any) -> bool:
+        with self._client._timed("indices.exists"):
+            return index in self._client._docs
+
+    def create(self, index: str, body: Dict[str, Any] | None = None, **_: Any) -> Dict[str, Any]:
+        with self._client._timed("indices.create"):
+            with self._client._lock:
+                self._client._docs.setdefault(index, {})
+                self._client._settings[index].update((body or {}).get("settings", {}).get("index", {}))
+            return {"acknowledged": True, "index": index}
+
+    def delete(self, index: str, **_: Any) -> Dict[str, Any]:
+        with self._client._timed("indices.delete"):
+            with self._client._lock:
+                self._client._docs.pop(index, None)
+                self._client._settings.pop(index, None)
+            return {"acknowledged": True}
+
+    def put_settings(self, body: Dict[str, Any], index: str | None = None, **_: Any) -> Dict[str, Any]:
+        with self._client._timed("indices.put_settings"):
+            with self._client._lock:
+                for name, value in body.get("index", {}).items():
+                    if value is None:
+                        self._client._settings[index].pop(name, None)
+                    else:
+                        self._client._settings[index][name] = value
+            return {"acknowledged": True}
+
+    def get_settings(self, index: str | None = None, **_: Any) -> Dict[str, Any]:
+        with self._client._timed("indices.get_settings"):
+            with self._client._lock:
+                return {index: {"settings": {"index": dict(self._client._settings.get(index, {}))}}}
+
+    def refresh(self, index: str | None = None, **_: Any) -> Dict[str, Any]:
+        with self._client._timed("indices.refresh"):
+            self._client._refresh(index)
+            return {"_shards": {"failed": 0}}
+
+
+class InMemoryOpenSearch:
+    def __init__(self, latency_ms: float = 0.0, jitter_ms: float = 0.0, refresh_interval_s: float | None = None) -> None:
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.refresh_interval_s = refresh_interval_s
+        self.transport = _Transport()
+        self.indices = _Indices(self)
+        self._docs: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._settings: Dict[str, Dict[str, Any]] = defaultdict(dict)
+        # Written but not yet searchable (only used with refresh_interval_s); None marks a delete.
+        self._pending: Dict[str, Dict[str, Dict[str, Any] | None]] = defaultdict(dict)
+        self._last_refresh: Dict[str, float] = defaultdict(time.monotonic)
+        self._lock = threading.Lock()
+        self._latencies: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=_LATENCY_SAMPLES))
+        self._counts: Dict[str, int] = defaultdict(int)
+
+    @contextmanager
+    def _timed(self, operation: str) -> Iterator[None]:
+        started = time.perf_counter()
+        delay_ms = self.latency_ms + random.uniform(0, self.jitter_ms)
+        if delay_ms > 0:
+            # Blocking, like the real client, so callers exercise the same threading.
+            time.sleep(delay_ms / 1000)
+        try:
+            yield
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            with self._lock:
+                self._counts[operation] += 1
+                self._latencies[operation].append(elapsed_ms)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            snapshot = {operation: (self._counts[operation], sorted(samples)) for operation, samples in self._latencies.items()}
+        report = {}
+        for operation, (count, samples) in snapshot.items():
+            report[operation] = {
+                "count": count,
+                "mean_ms": round(sum(samples) / len(samples), 3),
+                "p50_ms": round(samples[len(samples) // 2], 3),
+                "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 3),
+                "max_ms": round(samples[-1], 3),
+            }
+        return report
+
+    def ping(self, **_: Any) -> bool:
+        return True
+
+    def close(self) -> None:
+        return None
+
+    def _refresh(self, index: str | None) -> None:
+        with self._lock:
+            for name in [index] if index else list(self._pending):
+                for doc_id, source in self._pending.pop(name, {}).items():
+                    docs = self._docs.setdefault(name, {})
+                    if source is None:
+                        docs.pop(doc_id, None)
+                    else:
+                        docs[doc_id] = source
+                self._last_refresh[name] = time.monotonic()
+
+    def _searchable(self, index: str) -> List[Tuple[str, Dict[str, Any]]]:
+        if self.refresh_interval_s is not None:
+            with self._lock:
+                due = (
+                    self._settings[index].get("refresh_interval") != "-1"
+                    and time.monotonic() - self._last_refresh[index] >= self.refresh_interval_s
+                )
+            if due:
+                self._refresh(index)
+        with self._lock:
+            return list(self._docs.get(index, {}).items())
+
+    def _current(self, index: str, doc_id: str) -> Dict[str, Any] | None:
+        # Realtime view, as get and update see it: unrefreshed writes included. Caller holds the lock.
+        pending = self._pending.get(index, {})
+        if doc_id in pending:
+            return pending[doc_id]
+        return self._docs.get(index, {}).get(doc_id)
+
+    def _write(self, index: str, doc_id: str | None, source: Dict[str, Any] | None, create: bool = False) -> Tuple[str, int, str]:
+        doc_id = doc_id or uuid4().hex
+        with self._lock:
+            exists = self._current(index, doc_id) is not None
+            if create and exists:
+                return doc_id, 409, "conflict"
+            if source is None:
+                result = "deleted" if exists else "not_found"
+            else:
+                result = "updated" if exists else "created"
+                source = json.loads(json.dumps(source))
+            if self.refresh_interval_s is None:
+                docs = self._docs.setdefault(index, {})
+                if source is None:
+                    docs.pop(doc_id, None)
+                else:
+                    docs[doc_id] = source
+            else:
+                self._docs.setdefault(index, {})
+                self._pending[index][doc_id] = source
+        status = {"updated": 200, "created": 201, "deleted": 200, "not_found": 404}[result]
+        return doc_id, status, result
+
+    @staticmethod
+    def _refresh_requested(refresh: Any) -> bool:
+        return refresh in (True, "true", "wait_for", "")
+
+    def index(self, index: str, body: Dict[str, Any], id: str | None = None, refresh: Any = None, **_: Any) -> Dict[str, Any]:
+        with self._timed("index"):
+            doc_id, _status, result = self._write(index, id, body)
+            if self._refresh_requested(refresh):
+                self._refresh(index)
+            return {"_index": index, "_id": doc_id, "result": result}
+
+    def get(self, index: str, id: str, **_: Any) -> Dict[str, Any]:
+        with self._timed("get"):
+            with self._lock:
+                source = self._current(index, id)
+            return {"_index": index, "_id": id, "found": source is not None, "_source": source}
+
+    def count(self, index: str, body: Dict[str, Any] | None = None, **_: Any) -> Dict[str, Any]:
+        with self._timed("count"):
+            filters, _ = _split_query((body or {}).get("query", {"match_all": {}}))
+            sources = [source for _, source in self._searchable(index)]
+            return {"count": sum(1 for source in sources if all(_matches(source, clause) for clause in filters))}
+
+    def bulk(self, body: Any, index: str | None = None, refresh: Any = None, **_: Any) -> Dict[str, Any]:
+        with self._timed("bulk"):
+            lines = body.splitlines() if isinstance(body, str) else list(body)
+            entries = [json.loads(line) if isinstance(line, (str, bytes)) else line for line in lines if line]
+            items: List[Dict[str, Any]] = []
+            position = 0
+            while position < len(entries):
+                operation, meta = next(iter(entries[position].items()))
+                target = meta.get("_index", index)
+                doc_id = meta.get("_id")
+                if operation == "delete":
+                    _doc_id, status, _result = self._write(target, doc_id, None)
+                    items.append({"delete": {"_index": target, "_id": doc_id, "status": status}})
+                    position += 1
+                    continue
+                source = entries[position + 1]
+                position += 2
+                if operation == "update":
+                    with self._lock:
+                        existing = dict(self._current(target, doc_id) or {})
+                    source = {**existing, **source.get("doc", {})}
+                doc_id, status, result = self._write(target, doc_id, source, create=operation == "create")
+                item = {"_index": target, "_id": doc_id, "status": status, "result": result}
+                if status == 409:
+                    item["error"] = {"type": "version_conflict_engine_exception"}
+                items.append({operation: item})
+            errors = any(next(iter(item.values()))["status"] >= 300 and "delete" not in item for item in items)
+            if self._refresh_requested(refresh):
+                for target in {next(iter(item.values()))["_index"] for item in items}:
+                    self._refresh(target)
+            return {"took": 0, "errors": errors, "items": items}
+
+    def search(self, index: str, body: Dict[str, Any] | None = None, **_: Any) -> Dict[str, Any]:
+        started = time.perf_counter()
+        with self._timed("search"):
+            body = body or {}
+            size = body.get("size", 10)
+            filters, knn = _split_query(body.get("query", {"match_all": {}}))
+            candidates = [
+                (doc_id, source)
+                for doc_id, source in self._searchable(index)
+                if all(_matches(source, clause) for clause in filters)
+            ]
+            if knn:
+                field, spec = next(iter(knn.items()))
+                scored = sorted(
+                    ((_l2_score(spec["vector"], source.get(field) or []), doc_id, source) for doc_id, source in candidates),
+                    key=lambda hit: hit[0],
+                    reverse=True,
+                )[: min(size, spec.get("k", size))]
+            else:
+                scored = [(1.0, doc_id, source) for doc_id, source in candidates][:size]
+            hits = [{"_index": index, "_id": doc_id, "_score": score, "_source": source} for score, doc_id, source in scored]
+            return {
+                "took": int((time.perf_counter() - started) * 1000),
+                "timed_out": False,
+                "hits": {
+                    "total": {"value": len(candidates), "relation": "eq"},
+                    "max_score": hits[0]["_score"] if hits else None,
+                    "hits": hits,
+                },
+            }
@@ -1,20 +1,94 @@
 from __future__ import annotations
 
+import asyncio
+import logging
+import threading
 import time
-from collections import defaultdict
+from collections import OrderedDict
+from typing import Protocol, Tuple
+
+from shared.config import settings
+from shared.kv_store import SharedStore, get_shared_store
+
+
+logger = logging.getLogger("rate_limit")
+
+
+class RateLimiter(Protocol):
+    def allow(self, key: str) -> bool: ...
+
+    async def allow_async(self, key: str) -> bool: ...
 
 
 class InMemoryRateLimiter:
-    def __init__(self, rps: int) -> None:
+    # GCRA (the token bucket expressed as one timestamp per key): each key stores its
+    # theoretical arrival time (TAT), so a decision is O(1). Keys are kept in last-update
+    # order; once a key's bucket has refilled its TAT is in the past and it behaves as if
+    # it had never been seen, so idle keys are dropped from the front in amortized O(1).
+    def __init__(self, rps: float, burst: int | None = None) -> None:
         self.rps = rps
-        self.calls = defaultdict(list)
+        self.burst = burst or max(1, int(rps))
+        self.interval_s = 1.0 / rps
+        self.capacity_s = self.burst * self.interval_s
+        self._tats: OrderedDict[str, Tuple[float, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _evict_idle(self, now: float) -> None:
+        while self._tats:
+            _, (_, updated_at) = next(iter(self._tats.items()))
+            if updated_at + self.capacity_s > now:
+                return
+            self._tats.popitem(last=False)
 
     def allow(self, key: str) -> bool:
-        now = time.time()
-        window = now - 1
-        calls = [t for t in self.calls[key] if t >= window]
-        self.calls[key] = calls
-        if len(calls) >= self.rps:
-            return False
-        self.calls[key].append(now)
-        return True
+        now = time.monotonic()
+        with self._lock:
+            self._evict_idle(now)
+            entry = self._tats.get(key)
+            tat = max(entry[0], now) if entry is not None else now
+            new_tat = tat + self.interval_s
+            if new_tat - now > self.capacity_s:
+                return False
+            self._tats[key] = (new_tat, now)
+            self._tats.move_to_end(key)
+            return True
+
+    async def allow_async(self, key: str) -> bool:
+        # Pure in-process work; no reason to leave the event loop.
+        return self.allow(key)
+
+    def __len__(self) -> int:
+        return len(self._tats)
+
+
+class SharedRateLimiter:
+    # Same GCRA decision, made atomically in the shared store so the limit holds across
+    # workers and replicas. If the store is unreachable requests are let through: the
+    # limiter protects downstream capacity and should not take the API down with it.
+    def __init__(self, rps: float, store: SharedStore, burst: int | None = None, namespace: str = "rl") -> None:
+        self.rps = rps
+        self.burst = burst or max(1, int(rps))
+        self.interval_s = 1.0 / rps
+        self.capacity_s = self.burst * self.interval_s
+        self.namespace = namespace
+        self._store = store
+        self.errors = 0
+
+    def allow(self, key: str) -> bool:
+        try:
+            return self._store.gcra(f"{self.namespace}:{key}", self.interval_s, self.capacity_s)
+        except Exception:
+            self.errors += 1
+            logger.warning("rate_limit_store_failed", exc_info=True)
+            return True
+
+    async def allow_async(self, key: str) -> bool:
+        # A Redis round trip (up to SHARED_STORE_TIMEOUT_S) must not block the event loop.
+        return await asyncio.to_thread(self.allow, key)
+
+
+def build_rate_limiter() -> RateLimiter:
+    store = get_shared_store()
+    if store is None:
+        return InMemoryRateLimiter(settings.rate_limit_rps, settings.rate_limit_burst)
+    return SharedRateLimiter(settings.rate_limit_rps, store, settings.rate_limit_burst)
@@ -8,8 +8,11 @@ from shared.config import settings
 
 
 class SecureVault:
-    def __init__(self) -> None:
-        self._table = dynamodb_resource().Table(settings.dynamodb_table)
+    @property
+    def _table(self):
+        # Resolved per call: the vault is used from AWS executor threads and DynamoDB
+        # resources are per thread.
+        return dynamodb_resource().Table(settings.dynamodb_table)
 
     def store_pii(self, document_id: str, pii_map: Dict[str, str]) -> Dict[str, str]:
         token_storage = {}
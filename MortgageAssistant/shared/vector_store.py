@@ -1,18 +1,101 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List
-from opensearchpy import OpenSearch
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List
+from opensearchpy import OpenSearch, helpers
 
 from shared.config import settings
 
 
+logger = logging.getLogger("vector_store")
+
+MEMORY_ENDPOINT = "memory://"
+
+_client: OpenSearch | None = None
+_client_lock = threading.Lock()
+_refresh_lock = threading.Lock()
+_refresh_suspensions = 0
+
+
+def _new_opensearch_client() -> OpenSearch:
+    if settings.opensearch_endpoint.startswith(MEMORY_ENDPOINT):
+        from shared.opensearch_memory import InMemoryOpenSearch
+
+        logger.info("opensearch_memory_stand_in", extra={"latency_ms": settings.opensearch_memory_latency_ms})
+        return InMemoryOpenSearch(
+            latency_ms=settings.opensearch_memory_latency_ms,
+            refresh_interval_s=settings.opensearch_memory_refresh_interval_s,
+        )
+    return OpenSearch(
+        hosts=[settings.opensearch_endpoint],
+        pool_maxsize=settings.opensearch_pool_maxsize,
+        timeout=settings.opensearch_timeout_s,
+        max_retries=settings.opensearch_max_retries,
+        retry_on_timeout=True,
+        http_compress=True,
+    )
+
+
 def get_opensearch_client() -> OpenSearch:
-    return OpenSearch(hosts=[settings.opensearch_endpoint])
+    # One client per process: its urllib3 pool keeps connections alive across requests.
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = _new_opensearch_client()
+    return _client
+
+
+def close_opensearch_client() -> None:
+    global _client
+    with _client_lock:
+        client, _client = _client, None
+    if client is not None:
+        client.close()
+
+
+@contextmanager
+def _refresh_suspended(client: OpenSearch) -> Iterator[None]:
+    # Concurrent loads in this process share one suspension; the last one out restores
+    # the index default and refreshes so the new chunks become searchable at once.
+    global _refresh_suspensions
+    with _refresh_lock:
+        _refresh_suspensions += 1
+        if _refresh_suspensions == 1:
+            client.indices.put_settings(index=settings.opensearch_index, body={"index": {"refresh_interval": "-1"}})
+    try:
+        yield
+    finally:
+        with _refresh_lock:
+            _refresh_suspensions -= 1
+            if _refresh_suspensions == 0:
+                client.indices.put_settings(index=settings.opensearch_index, body={"index": {"refresh_interval": None}})
+                client.indices.refresh(index=settings.opensearch_index)
 
 
-def index_embedding(record: Dict[str, Any]) -> None:
+def bulk_index_embeddings(records: List[Dict[str, Any]]) -> int:
+    if not records:
+        return 0
     client = get_opensearch_client()
-    client.index(index=settings.opensearch_index, body=record)
+    # chunk_id as _id makes a retried or repeated load overwrite instead of duplicating chunks.
+    actions = (
+        {"_index": settings.opensearch_index, "_id": record["chunk_id"], "_source": record}
+        for record in records
+    )
+    bulk_kwargs = {"chunk_size": settings.opensearch_bulk_batch_size, "max_retries": 3}
+    # Callers invalidate cached answers once this returns, so the chunks must be searchable by then.
+    if len(records) >= settings.opensearch_bulk_refresh_off_min_chunks:
+        with _refresh_suspended(client):
+            indexed, _ = helpers.bulk(client, actions, **bulk_kwargs)
+            # An overlapping load may keep refresh off after this one exits; wait_for would then
+            # never return, so refresh explicitly.
+            client.indices.refresh(index=settings.opensearch_index)
+    else:
+        indexed, _ = helpers.bulk(client, actions, refresh="wait_for", **bulk_kwargs)
+    logger.info("bulk_indexed", extra={"records": len(records), "indexed": indexed})
+    return indexed
 
 
 def search_embeddings(
@@ -0,0 +1,24 @@
+from __future__ import annotations
+
+# Run from the MortgageAssistant directory: python -m pytest -q tests
+# shared.config reads its settings at import time; these stand-ins satisfy the required ones.
+
+import os
+
+for _name in (
+    "S3_BUCKET",
+    "DYNAMODB_TABLE",
+    "DYNAMODB_METADATA_TABLE",
+    "KMS_KEY_ID",
+    "BEDROCK_EMBED_MODEL",
+    "BEDROCK_CHAT_MODEL",
+    "OPENAI_API_KEY",
+    "OPENAI_CHAT_MODEL",
+    "OPENAI_EMBED_MODEL",
+    "INGESTION_SERVICE_URL",
+    "PII_SERVICE_URL",
+    "RAG_SERVICE_URL",
+    "LLM_ROUTER_URL",
+):
+    os.environ.setdefault(_name, "test")
+os.environ["OPENSEARCH_ENDPOINT"] = "memory://"
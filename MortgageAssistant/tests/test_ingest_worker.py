@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+import asyncio
+import time
+
+import pytest
+
+from services.ingestion.app import worker
+from shared.config import settings
+from shared.job_queue import SqliteJobQueue
+
+
+@pytest.fixture
+def queue(tmp_path, monkeypatch) -> SqliteJobQueue:
+    monkeypatch.setattr(settings, "ingest_visibility_timeout_s", 1)
+    return SqliteJobQueue(str(tmp_path / "queue.db"))
+
+
+def test_extend_is_refused_for_a_stale_delivery(queue: SqliteJobQueue) -> None:
+    queue.enqueue({"document_id": "doc-1"}, "job-1")
+    (job,) = queue.receive(1, visibility_timeout_s=60, wait_s=0)
+
+    assert queue.extend(job, 60)
+    queue.ack(job)
+    assert not queue.extend(job, 60)
+
+
+def test_running_job_is_not_redelivered_past_the_visibility_timeout(queue: SqliteJobQueue, tmp_path) -> None:
+    queue.enqueue({"document_id": "doc-1"}, "job-1")
+    (job,) = queue.receive(1, settings.ingest_visibility_timeout_s, wait_s=0)
+    # A second worker process polling the same queue file.
+    other_worker = SqliteJobQueue(str(tmp_path / "queue.db"))
+    redelivered = []
+
+    async def slow_ingest(body: dict) -> dict:
+        deadline = time.monotonic() + 2.5 * settings.ingest_visibility_timeout_s
+        while time.monotonic() < deadline:
+            redelivered.extend(await asyncio.to_thread(other_worker.receive, 1, 60, 0))
+            await asyncio.sleep(0.1)
+        return {"status": "indexed"}
+
+    asyncio.run(worker.process_job(queue, job, slow_ingest, update=None))
+
+    assert redelivered == []
+    assert queue.stats() == {"visible": 0, "in_flight": 0, "dead": 0}
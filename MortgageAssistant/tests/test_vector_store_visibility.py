@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import pytest
+
+from shared import vector_store
+from shared.config import settings
+from shared.opensearch_memory import InMemoryOpenSearch
+
+
+@pytest.fixture
+def client(monkeypatch) -> InMemoryOpenSearch:
+    # Never refreshes on its own, so only an explicit refresh makes writes searchable.
+    client = InMemoryOpenSearch(refresh_interval_s=3600)
+    monkeypatch.setattr(vector_store, "_client", client)
+    return client
+
+
+def _records(loan_id: str, count: int) -> list[dict]:
+    return [
+        {
+            "document_id": f"{loan_id}-doc",
+            "loan_id": loan_id,
+            "chunk_id": f"{loan_id}-doc-{idx}",
+            "text": f"chunk {idx}",
+            "embedding": [float(idx), 1.0],
+            "metadata": {"loan_id": loan_id, "document_type": "paystub", "chunk_index": idx},
+        }
+        for idx in range(count)
+    ]
+
+
+def _searchable(loan_id: str) -> int:
+    return len(vector_store.search_embeddings([0.0, 1.0], loan_id=loan_id, document_types=None, k=1000))
+
+
+def test_stand_in_delays_visibility_until_refresh(client: InMemoryOpenSearch) -> None:
+    client.index(index=settings.opensearch_index, id="a", body={"metadata": {"loan_id": "L"}, "embedding": [0.0, 1.0]})
+
+    assert client.get(index=settings.opensearch_index, id="a")["found"]
+    assert _searchable("L") == 0
+    client.indices.refresh(index=settings.opensearch_index)
+    assert _searchable("L") == 1
+
+
+@pytest.mark.parametrize("chunks", [3, settings.opensearch_bulk_refresh_off_min_chunks])
+def test_bulk_index_returns_once_chunks_are_searchable(client: InMemoryOpenSearch, chunks: int) -> None:
+    vector_store.bulk_index_embeddings(_records("LN-1", chunks))
+
+    assert _searchable("LN-1") == chunks
+
+
+def test_large_load_is_searchable_while_an_overlapping_load_keeps_refresh_off(client: InMemoryOpenSearch) -> None:
+    # Another large load in this process is still running, so refresh stays suspended after ours.
+    with vector_store._refresh_suspended(client):
+        vector_store.bulk_index_embeddings(_records("LN-2", settings.opensearch_bulk_refresh_off_min_chunks))
+
+        assert _searchable("LN-2") == settings.opensearch_bulk_refresh_off_min_chunks
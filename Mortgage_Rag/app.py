@@ -1,22 +1,30 @@
 from __future__ import annotations
 
-import io
 from pathlib import Path
 from typing import Iterable
 
-from pypdf import PdfReader
 import streamlit as st
 from dotenv import load_dotenv
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_core.documents import Document
 from langchain_community.vectorstores import FAISS
-from langchain_openai import OpenAIEmbeddings
 
 from src.config import load_settings
-from src.pii import redact_pii, detect_pii
+from src.extract import ExtractionCache, PdfTextBackend, extract_pdf_pages, get_pdf_backend
+from src.pii import REDACTION_RULESET_VERSION, redact_pii, detect_pii, restore_provenance
 from src.guardrails import apply_input_guardrails, apply_output_guardrails
+from src.langchain_embeddings import LlmClientEmbeddings
+from src.llm import LlmClient, configure_llm_concurrency
+from src.pipeline import create_llm_client
+from src.index_versions import VersionedIndexReader
+from src.policy_index import PolicyIndex, load_policy_index
 from src.logger import get_logger
-from src.underwriting_agents import run_underwriting_workflow
+from src.underwriting_agents import (
+    UnderwritingAssessment,
+    assess_borrower_documents,
+    document_set_key,
+    run_underwriting_workflow,
+)
 
 # Initialize logger
 logger = get_logger(__name__)
@@ -32,16 +40,40 @@ class UploadedDoc:
         logger.info(f"UploadedDoc initialized: name={name}, pii_count={len(self.pii)}")
 
 
-def extract_text_from_pdf_bytes(data: bytes) -> str:
+@st.cache_resource
+def get_extraction_cache(cache_dir: str | None) -> ExtractionCache:
+    # Survives Streamlit reruns, so each chat turn does not re-parse every upload.
+    return ExtractionCache(Path(cache_dir) if cache_dir else None)
+
+
+@st.cache_resource
+def get_policy_index_reader(index_dir: str | None) -> VersionedIndexReader[PolicyIndex | None] | None:
+    # One reader per process; each rerun asks it for the live version, so a newly
+    # published policy index is picked up without restarting the app.
+    return VersionedIndexReader(Path(index_dir), load=load_policy_index) if index_dir else None
+
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def get_underwriting_assessment(
+    document_key: str,
+    thresholds: dict[str, float],
+    _borrower_documents: list[dict[str, str]],
+) -> UnderwritingAssessment:
+    # Keyed by document content hash + thresholds (Streamlit skips hashing _-prefixed args),
+    # so chat turns on the same uploads only rerun policy retrieval and the recommendation.
+    return assess_borrower_documents(_borrower_documents, thresholds)
+
+
+def extract_text_from_pdf_bytes(
+    data: bytes,
+    backend: PdfTextBackend | None = None,
+    cache: ExtractionCache | None = None,
+) -> str:
     logger.info(f"Extracting text from PDF: data_size={len(data)} bytes")
     try:
-        reader = PdfReader(io.BytesIO(data))
-        pages: list[str] = []
-        for idx, page in enumerate(reader.pages):
-            text = page.extract_text() or ""
-            if text:
-                pages.append(text)
-                logger.debug(f"Extracted page {idx + 1}: {len(text)} characters")
+        pages = [page for page in extract_pdf_pages(data, backend=backend, cache=cache) if page]
+        for idx, text in enumerate(pages):
+            logger.debug(f"Extracted page {idx + 1}: {len(text)} characters")
         result = "\n".join(pages)
         logger.info(f"PDF extraction complete: {len(pages)} pages, {len(result)} total characters")
         return result
@@ -50,8 +82,13 @@ def extract_text_from_pdf_bytes(data: bytes) -> str:
         raise
 
 
-def build_vector_store(docs: Iterable[UploadedDoc], chunk_size: int, chunk_overlap: int, api_key: str, embed_model: str) -> FAISS:
-    logger.info(f"Building vector store: chunk_size={chunk_size}, chunk_overlap={chunk_overlap}, embed_model={embed_model}")
+def build_vector_store(
+    docs: Iterable[UploadedDoc],
+    chunk_size: int,
+    chunk_overlap: int,
+    llm: LlmClient,
+) -> FAISS:
+    logger.info(f"Building vector store: chunk_size={chunk_size}, chunk_overlap={chunk_overlap}, embed_model={llm.embed_model}")
     try:
         splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
         documents: list[Document] = []
@@ -62,12 +99,17 @@ def build_vector_store(docs: Iterable[UploadedDoc], chunk_size: int, chunk_overl
             chunks = splitter.split_text(doc.redacted_text)
             logger.debug(f"Document '{doc.name}' split into {len(chunks)} chunks")
             for idx, chunk in enumerate(chunks):
-                documents.append(Document(page_content=chunk, metadata={"source": doc.name, "chunk": idx}))
+                documents.append(
+                    Document(
+                        page_content=chunk,
+                        metadata={"source": doc.name, "chunk": idx, "redaction_ruleset": REDACTION_RULESET_VERSION},
+                    )
+                )
         
         logger.info(f"Total documents created: {len(documents)}")
-        embeddings = OpenAIEmbeddings(model=embed_model, api_key=api_key)
+        # Through LlmClient, so these calls share the LLM limiter and usage accounting.
         logger.info("Creating FAISS index from documents")
-        vector_store = FAISS.from_documents(documents=documents, embedding=embeddings)
+        vector_store = FAISS.from_documents(documents=documents, embedding=LlmClientEmbeddings(llm))
         logger.info("Vector store created successfully")
         return vector_store
     except Exception as e:
@@ -80,6 +122,7 @@ logger.info("=" * 80)
 logger.info("Application started: SecureMortgageAI")
 load_dotenv()
 settings = load_settings()
+configure_llm_concurrency(settings.openai_max_concurrency)
 logger.info(f"Settings loaded: chunk_size={settings.chunk_size}, chunk_overlap={settings.chunk_overlap}")
 
 st.title("🔒 SecureMortgageAI")
@@ -124,12 +167,17 @@ if not settings.openai_api_key:
     st.error("OPENAI_API_KEY is not set. Add it to your environment to enable embeddings.")
     st.stop()
 
+pdf_backend = get_pdf_backend(settings.pdf_backend)
+extraction_cache = get_extraction_cache(str(settings.extract_cache_dir) if settings.extract_cache_dir else None)
+policy_index_reader = get_policy_index_reader(str(settings.policy_index_dir) if settings.policy_index_dir else None)
+policy_index = policy_index_reader.get() if policy_index_reader else None
+
 uploaded_docs: list[UploadedDoc] = []
 if uploads:
     logger.info(f"Processing {len(uploads)} uploaded files")
     for file in uploads:
         logger.info(f"Processing file: {file.name}")
-        text = extract_text_from_pdf_bytes(file.read())
+        text = extract_text_from_pdf_bytes(file.read(), backend=pdf_backend, cache=extraction_cache)
         uploaded_docs.append(UploadedDoc(file.name, text))
     logger.info(f"Successfully processed {len(uploaded_docs)} documents")
 
@@ -165,8 +213,7 @@ with st.spinner("🔄 Building vector embeddings..."):
         uploaded_docs,
         chunk_size=settings.chunk_size,
         chunk_overlap=settings.chunk_overlap,
-        api_key=settings.openai_api_key,
-        embed_model=settings.openai_embed_model,
+        llm=create_llm_client(settings),
     )
 st.success("✅ Vector embeddings created successfully! Ready to chat.")
 
@@ -247,7 +294,7 @@ if query:
             
             # Apply output guardrails
             logger.info("Applying output guardrails")
-            result_texts = [doc.page_content for doc in docs]
+            result_texts = [restore_provenance(doc.page_content, doc.metadata.get("redaction_ruleset")) for doc in docs]
             sanitized_texts, output_validation = apply_output_guardrails(result_texts)
             
             if not output_validation.passed:
@@ -275,16 +322,22 @@ if query:
                             {"name": document.name, "text": document.text}
                             for document in uploaded_docs
                         ]
+                        thresholds = {
+                            "min_credit_score": settings.min_credit_score,
+                            "max_dti": settings.max_dti,
+                            "max_ltv": settings.max_ltv,
+                            "min_employment_months": settings.min_employment_months,
+                        }
+                        assessment = get_underwriting_assessment(
+                            document_set_key(borrower_payload), thresholds, borrower_payload
+                        )
                         underwriting_result = run_underwriting_workflow(
                             query=query,
                             borrower_documents=borrower_payload,
                             policy_vector_store=vector_store,
-                            thresholds={
-                                "min_credit_score": settings.min_credit_score,
-                                "max_dti": settings.max_dti,
-                                "max_ltv": settings.max_ltv,
-                                "min_employment_months": settings.min_employment_months,
-                            },
+                            thresholds=thresholds,
+                            policy_index=policy_index,
+                            assessment=assessment,
                         )
                         summary = redact_pii(underwriting_result.summary_markdown)
                     
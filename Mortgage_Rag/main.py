@@ -1,5 +1,9 @@
 from __future__ import annotations
 
+import argparse
+import signal
+import threading
+
 from dotenv import load_dotenv
 
 from src.config import load_settings
@@ -7,9 +11,28 @@ from src.pipeline import run_pipeline
 
 
 def main() -> None:
+    parser = argparse.ArgumentParser(description="Process mortgage documents into redacted outputs and a FAISS index")
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Keep running and index new PDFs in the data directory as they arrive",
+    )
+    args = parser.parse_args()
+
     load_dotenv()
     settings = load_settings()
-    run_pipeline(settings)
+    if not args.watch:
+        run_pipeline(settings)
+        return
+
+    from src.watch import run_watch
+
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+    try:
+        run_watch(settings, stop)
+    except KeyboardInterrupt:
+        stop.set()
 
 
 if __name__ == "__main__":
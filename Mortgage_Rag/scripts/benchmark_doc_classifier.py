@@ -0,0 +1,93 @@
+"""Compare the keyword-scored document classifier with the old first-match rules.
+
+Classifies the generated sample documents both with their sample_* file names
+and with neutral names (content only), reporting accuracy and documents/second
+for each classifier.
+
+Usage: python scripts/benchmark_doc_classifier.py [--rounds 2000]
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "scripts"))
+
+import generate_sample_pdfs  # noqa: E402
+from src.doc_classifier import DocumentClassifier  # noqa: E402
+from src.extract import extract_text_from_pdf  # noqa: E402
+
+EXPECTED = {
+    "sample_w2.pdf": (generate_sample_pdfs.build_w2, "tax_return"),
+    "sample_paystub.pdf": (generate_sample_pdfs.build_paystub, "pay_stub"),
+    "sample_bank_statement.pdf": (generate_sample_pdfs.build_bank_statement, "bank_statement"),
+    "sample_employment_letter.pdf": (generate_sample_pdfs.build_employment_letter, "employment_letter"),
+    "sample_id_document.pdf": (generate_sample_pdfs.build_id_document, "id_document"),
+    "sample_loan_application.pdf": (generate_sample_pdfs.build_loan_application, "loan_application"),
+}
+
+
+def legacy_infer_document_type(name: str, text: str) -> str:
+    """The sequential first-match rules previously in underwriting_agents."""
+    content = f"{name} {text[:1000]}".lower()
+    if any(token in content for token in ["paystub", "pay stub", "gross pay", "net pay"]):
+        return "pay_stub"
+    if any(token in content for token in ["bank statement", "statement period", "available balance"]):
+        return "bank_statement"
+    if any(token in content for token in ["w-2", "1099", "1040", "tax return", "wages, tips"]):
+        return "tax_return"
+    if any(token in content for token in ["employment letter", "verification of employment", "employer"]):
+        return "employment_letter"
+    if any(token in content for token in ["driver", "passport", "id", "identification", "kyc"]):
+        return "id_document"
+    return "unknown"
+
+
+def build_samples(out_dir: Path) -> list[tuple[str, str, str]]:
+    samples: list[tuple[str, str, str]] = []
+    for name, (builder, expected) in EXPECTED.items():
+        path = out_dir / name
+        builder(path)
+        samples.append((name, extract_text_from_pdf(path).text, expected))
+    return samples
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        samples = build_samples(Path(tmp))
+    classifier = DocumentClassifier()
+    candidates = {
+        "legacy": legacy_infer_document_type,
+        "scored": lambda name, text: classifier.classify(name, text).document_type,
+    }
+
+    print(f"{'classifier':<10} {'names':<8} {'accuracy':>9} {'docs/s':>10}")
+    for label, classify in candidates.items():
+        for naming in ("sample", "neutral"):
+            inputs = [
+                (name if naming == "sample" else f"document_{idx}.pdf", text, expected)
+                for idx, (name, text, expected) in enumerate(samples)
+            ]
+            correct = sum(classify(name, text) == expected for name, text, expected in inputs)
+            start = time.perf_counter()
+            for _ in range(args.rounds):
+                for name, text, _ in inputs:
+                    classify(name, text)
+            elapsed = time.perf_counter() - start
+            print(
+                f"{label:<10} {naming:<8} {correct / len(inputs):>9.1%} "
+                f"{args.rounds * len(inputs) / elapsed:>10.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""Recall versus size for reduced-dimension and quantized FAISS indexes.
+
+Loads the chunk vectors of a full-width flat index (the pipeline's
+MORTGAGE_RAG_FAISS index by default), holds out some chunks as queries and
+compares each storage option against exact float32 search:
+
+* ``dims<N>``: provider-side reduction. text-embedding-3 vectors requested with
+  ``dimensions=N`` equal the full vector truncated to N and re-normalised, so
+  this is simulated locally instead of re-embedding the corpus.
+* ``pca<N>``: local PCA trained on the corpus.
+* ``fp16`` / ``sq8``: float16 or 8-bit scalar-quantized codes.
+
+Reports recall@k against the exact neighbours, code bytes per vector, memory
+per million chunks and single-query latency. Use ``--synthetic N`` to try the
+options without a built index.
+
+Usage: python scripts/benchmark_index_compression.py [--index vectordb/faiss] [--synthetic 100000] [--k 10]
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import faiss
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from src.config import load_settings  # noqa: E402
+from src.embedding import IndexCompression, new_faiss_index  # noqa: E402
+from src.index_versions import resolve_index_dir  # noqa: E402
+
+
+def load_index_vectors(index_dir: Path) -> np.ndarray:
+    index = faiss.read_index(str(index_dir / "index.faiss"))
+    if not isinstance(index, faiss.IndexFlat):
+        raise SystemExit(f"{index_dir} is not a full-width flat index; rebuild it with MORTGAGE_RAG_INDEX_ENCODING=flat")
+    return index.reconstruct_n(0, index.ntotal)
+
+
+def synthetic_vectors(count: int, dimension: int, seed: int) -> np.ndarray:
+    # Unit vectors with most of their variance in a low-rank subspace, like text embeddings.
+    rng = np.random.default_rng(seed)
+    latent = rng.standard_normal((count, 64)).astype("float32")
+    basis = rng.standard_normal((64, dimension)).astype("float32")
+    vectors = latent @ basis + 0.3 * rng.standard_normal((count, dimension)).astype("float32")
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def truncate(vectors: np.ndarray, dimensions: int) -> np.ndarray:
+    reduced = np.ascontiguousarray(vectors[:, :dimensions])
+    return reduced / np.linalg.norm(reduced, axis=1, keepdims=True)
+
+
+def measure(
+    label: str,
+    database: np.ndarray,
+    queries: np.ndarray,
+    truth: np.ndarray,
+    compression: IndexCompression,
+    k: int,
+) -> dict[str, float | str]:
+    index = new_faiss_index(database, compression)
+    index.add(database)
+    _, found = index.search(queries, k)
+    recall = np.mean([len(set(row) & set(expected)) / k for row, expected in zip(found, truth)])
+    start = time.perf_counter()
+    for row in range(len(queries)):
+        index.search(queries[row : row + 1], k)
+    latency_ms = (time.perf_counter() - start) * 1000 / len(queries)
+    bytes_per_vector = compression.bytes_per_vector(database.shape[1])
+    return {
+        "config": label,
+        "bytes_per_vector": bytes_per_vector,
+        "gb_per_million": bytes_per_vector * 1_000_000 / 1e9,
+        "index_bytes": len(faiss.serialize_index(index)),
+        f"recall@{k}": float(recall),
+        "latency_ms": latency_ms,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--index", type=Path, default=None, help="Index root or directory holding a flat index.faiss")
+    parser.add_argument("--synthetic", type=int, default=0, help="Use N synthetic 1536-d vectors instead")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    if args.synthetic:
+        vectors = synthetic_vectors(args.synthetic, 1536, args.seed)
+        source = f"synthetic ({args.synthetic} x 1536)"
+    else:
+        # The pipeline publishes to <faiss dir>/versions/<version>/; follow the current pointer.
+        index_dir = resolve_index_dir(args.index or load_settings().faiss_dir)
+        vectors = load_index_vectors(index_dir)
+        source = f"{index_dir} ({vectors.shape[0]} x {vectors.shape[1]})"
+
+    rng = np.random.default_rng(args.seed)
+    held_out = rng.choice(len(vectors), size=min(args.queries, len(vectors) // 10 or 1), replace=False)
+    mask = np.ones(len(vectors), dtype=bool)
+    mask[held_out] = False
+    database, queries = vectors[mask], vectors[held_out]
+    k = min(args.k, len(database))
+    exact = faiss.IndexFlatL2(database.shape[1])
+    exact.add(database)
+    _, truth = exact.search(queries, k)
+
+    dimension = database.shape[1]
+    reduced = [d for d in (dimension // 2, dimension // 4) if d >= 64]
+    configs: list[tuple[str, np.ndarray, np.ndarray, IndexCompression]] = [
+        ("flat", database, queries, IndexCompression()),
+        ("fp16", database, queries, IndexCompression("fp16")),
+        ("sq8", database, queries, IndexCompression("sq8")),
+    ]
+    for dims in reduced:
+        configs.append((f"dims{dims}", truncate(database, dims), truncate(queries, dims), IndexCompression()))
+        configs.append((f"dims{dims}+fp16", truncate(database, dims), truncate(queries, dims), IndexCompression("fp16")))
+        configs.append((f"pca{dims}+fp16", database, queries, IndexCompression("fp16", dims)))
+        configs.append((f"pca{dims}+sq8", database, queries, IndexCompression("sq8", dims)))
+
+    print(f"Corpus: {source}, queries={len(queries)}, k={k}")
+    print(f"{'config':<14} {'B/vector':>9} {'GB/1M':>7} {'index bytes':>12} {f'recall@{k}':>10} {'ms/query':>9}")
+    for label, db, qs, compression in configs:
+        row = measure(label, db, qs, truth, compression, k)
+        print(
+            f"{row['config']:<14} {row['bytes_per_vector']:>9.0f} {row['gb_per_million']:>7.2f} "
+            f"{row['index_bytes']:>12} {row[f'recall@{k}']:>10.3f} {row['latency_ms']:>9.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Compare PDF text-extraction backends on the generated sample documents.
+
+Reports pages/second per backend and text fidelity, measured as the share of
+lines drawn by generate_sample_pdfs.py that appear verbatim in the extracted
+text. Also times a warm ExtractionCache pass.
+
+Usage: python scripts/benchmark_pdf_backends.py [--rounds 20]
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from reportlab.pdfgen import canvas
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "scripts"))
+
+import generate_sample_pdfs  # noqa: E402
+from src.extract import ExtractionCache, available_pdf_backends, extract_pdf_pages, get_pdf_backend  # noqa: E402
+
+BUILDERS = [
+    generate_sample_pdfs.build_w2,
+    generate_sample_pdfs.build_paystub,
+    generate_sample_pdfs.build_bank_statement,
+    generate_sample_pdfs.build_employment_letter,
+    generate_sample_pdfs.build_id_document,
+    generate_sample_pdfs.build_loan_application,
+]
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.split())
+
+
+def build_samples(out_dir: Path) -> list[tuple[bytes, list[str]]]:
+    """Render each sample PDF and record the exact lines drawn as ground truth."""
+    samples: list[tuple[bytes, list[str]]] = []
+    original_draw = canvas.Canvas.drawString
+    for builder in BUILDERS:
+        drawn: list[str] = []
+
+        def recording_draw(self, x, y, text, *args, **kwargs):
+            drawn.append(text)
+            return original_draw(self, x, y, text, *args, **kwargs)
+
+        canvas.Canvas.drawString = recording_draw
+        try:
+            path = out_dir / f"{builder.__name__}.pdf"
+            builder(path)
+        finally:
+            canvas.Canvas.drawString = original_draw
+        samples.append((path.read_bytes(), drawn))
+    return samples
+
+
+def fidelity(pages: list[str], expected_lines: list[str]) -> float:
+    text = _normalize("\n".join(pages))
+    found = sum(1 for line in expected_lines if _normalize(line) in text)
+    return found / len(expected_lines) if expected_lines else 1.0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        samples = build_samples(Path(tmp))
+
+    print(f"{'backend':<10} {'pages/s':>10} {'fidelity':>9} {'cached pages/s':>15}")
+    for name in available_pdf_backends():
+        backend = get_pdf_backend(name)
+        pages_done = 0
+        scores: list[float] = []
+        start = time.perf_counter()
+        for _ in range(args.rounds):
+            for data, expected in samples:
+                pages = backend.extract_pages(data)
+                pages_done += len(pages)
+                scores.append(fidelity(pages, expected))
+        elapsed = time.perf_counter() - start
+
+        cache = ExtractionCache()
+        for data, _ in samples:
+            extract_pdf_pages(data, backend=backend, cache=cache)
+        cached_pages = 0
+        start = time.perf_counter()
+        for _ in range(args.rounds):
+            for data, _ in samples:
+                cached_pages += len(extract_pdf_pages(data, backend=backend, cache=cache))
+        cached_elapsed = time.perf_counter() - start
+
+        print(
+            f"{name:<10} {pages_done / elapsed:>10.1f} {sum(scores) / len(scores):>9.1%} "
+            f"{cached_pages / cached_elapsed:>15.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Build the persistent policy index used for underwriting citations.
+
+Reads every PDF/TXT/MD file under MORTGAGE_RAG_POLICY_CORPUS (default ./policies),
+embeds it once and publishes the index plus per-rule citations as a new version
+under MORTGAGE_RAG_POLICY_INDEX (default ./vectordb/policy). Running apps pick
+it up when the ``current`` pointer flips.
+
+Usage: python scripts/build_policy_index.py
+"""
+from __future__ import annotations
+
+import json
+import sys
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.config import load_settings  # noqa: E402
+from src.embedding import IndexCompression  # noqa: E402
+from src.index_versions import publish_index_version  # noqa: E402
+from src.llm import LlmClient  # noqa: E402
+from src.policy_index import build_policy_index, policy_corpus_paths  # noqa: E402
+from src.usage import UsageTracker, track_usage  # noqa: E402
+
+
+def main() -> None:
+    load_dotenv()
+    settings = load_settings()
+    if not settings.openai_api_key:
+        raise SystemExit("OPENAI_API_KEY is required to embed the policy corpus")
+    corpus = policy_corpus_paths(settings.policy_corpus_dir)
+    if not corpus:
+        raise SystemExit(f"No policy documents found in {settings.policy_corpus_dir}")
+
+    llm = LlmClient(
+        api_key=settings.openai_api_key,
+        model=settings.openai_model,
+        embed_model=settings.openai_embed_model,
+        base_url=settings.openai_base_url,
+        max_connections=settings.openai_max_connections,
+        timeout_s=settings.openai_timeout_s,
+        embed_dimensions=settings.embed_dimensions,
+    )
+    usage = UsageTracker(embed_model=settings.openai_embed_model)
+
+    def build(out: Path) -> None:
+        build_policy_index(
+            corpus,
+            out,
+            embed_texts=llm.embed_texts,
+            chunk_size=settings.chunk_size,
+            chunk_overlap=settings.chunk_overlap,
+            compression=IndexCompression(settings.index_encoding, settings.index_pca_dimensions),
+        )
+        # Ships with the version, so the cost of each rebuild stays on record.
+        (out / "usage.json").write_text(json.dumps(usage.report(), indent=2), encoding="utf-8")
+
+    with track_usage(usage):
+        version_dir = publish_index_version(settings.policy_index_dir, build)
+    usage.log_report()
+    totals = usage.report()["totals"]
+    print(f"Policy index published to {version_dir} from {len(corpus)} documents")
+    print(f"Embedding usage: {totals['calls']} calls, {totals['input_tokens']} tokens, est. ${totals['cost_usd']:.4f}")
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
-from .models import AUSInput, AUSResult
+from .schemas import AUSRequest, AUSResponse, AUSSweepRequest, AUSSweepResponse
 from .service import evaluate_aus
+from .sweep import sweep_aus
 
-__all__ = ["AUSInput", "AUSResult", "evaluate_aus"]
+__all__ = ["AUSRequest", "AUSResponse", "AUSSweepRequest", "AUSSweepResponse", "evaluate_aus", "sweep_aus"]
@@ -2,8 +2,9 @@ from __future__ import annotations
 
 from fastapi import FastAPI
 
-from .schemas import AUSRequest, AUSResponse
+from .schemas import AUSRequest, AUSResponse, AUSSweepRequest, AUSSweepResponse
 from .service import evaluate_aus
+from .sweep import sweep_aus
 
 
 app = FastAPI(
@@ -21,3 +22,8 @@ def health() -> dict[str, str]:
 @app.post("/aus/evaluate", response_model=AUSResponse)
 def evaluate(request: AUSRequest) -> AUSResponse:
     return evaluate_aus(request)
+
+
+@app.post("/aus/sweep", response_model=AUSSweepResponse)
+def sweep(request: AUSSweepRequest) -> AUSSweepResponse:
+    return sweep_aus(request)
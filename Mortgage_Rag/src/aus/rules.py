@@ -1,9 +1,21 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Callable
+from typing import TYPE_CHECKING, Any, Callable
 
-from .schemas import AUSRequest, RuleEvaluation
+from .schemas import AUSRequest, LoanType, RuleEvaluation
+
+if TYPE_CHECKING:
+    import numpy as np
+
+
+# Shared by the scalar evaluators, the array form used by the sweep and the service's decision.
+MIN_CONVENTIONAL_CREDIT_SCORE = 620
+MAX_DTI = 43.0
+MAX_STREAMLINED_LTV = 80.0
+STRONG_PROFILE_MIN_CREDIT_SCORE = 740
+STRONG_PROFILE_MAX_DTI = 30.0
+STRONG_PROFILE_MAX_LTV = MAX_STREAMLINED_LTV
 
 
 @dataclass(frozen=True)
@@ -13,28 +25,39 @@ class RuleDefinition:
     evaluator: Callable[[AUSRequest], tuple[bool, str]]
 
 
+def is_strong_profile(credit_score: Any, dti: Any, ltv: Any) -> Any:
+    """Strong-profile test for scalars or numpy arrays alike."""
+    return (
+        (credit_score >= STRONG_PROFILE_MIN_CREDIT_SCORE)
+        & (dti <= STRONG_PROFILE_MAX_DTI)
+        & (ltv <= STRONG_PROFILE_MAX_LTV)
+    )
+
+
 def _evaluate_credit_program_rule(data: AUSRequest) -> tuple[bool, str]:
-    if data.loan_type == "Conventional" and data.credit_score < 620:
-        return False, "Conventional loans require minimum credit score 620"
+    if data.loan_type == "Conventional" and data.credit_score < MIN_CONVENTIONAL_CREDIT_SCORE:
+        return False, f"Conventional loans require minimum credit score {MIN_CONVENTIONAL_CREDIT_SCORE}"
     return True, "Program credit rule satisfied"
 
 
 def _evaluate_max_dti_rule(data: AUSRequest) -> tuple[bool, str]:
-    if data.dti > 43:
-        return False, f"DTI {data.dti:.2f}% exceeds maximum 43.00%"
+    if data.dti > MAX_DTI:
+        return False, f"DTI {data.dti:.2f}% exceeds maximum {MAX_DTI:.2f}%"
     return True, "DTI rule satisfied"
 
 
 def _evaluate_streamlined_ltv_rule(data: AUSRequest) -> tuple[bool, str]:
-    if data.ltv > 80:
-        return False, f"LTV {data.ltv:.2f}% exceeds streamlined threshold 80.00%"
+    if data.ltv > MAX_STREAMLINED_LTV:
+        return False, f"LTV {data.ltv:.2f}% exceeds streamlined threshold {MAX_STREAMLINED_LTV:.2f}%"
     return True, "LTV streamlined rule satisfied"
 
 
 def _evaluate_strong_risk_profile_rule(data: AUSRequest) -> tuple[bool, str]:
-    passed = data.credit_score >= 740 and data.dti <= 30 and data.ltv <= 80
-    if passed:
-        return True, "Strong risk profile met (credit≥740, dti≤30, ltv≤80)"
+    if is_strong_profile(data.credit_score, data.dti, data.ltv):
+        return True, (
+            f"Strong risk profile met (credit≥{STRONG_PROFILE_MIN_CREDIT_SCORE}, "
+            f"dti≤{STRONG_PROFILE_MAX_DTI:g}, ltv≤{STRONG_PROFILE_MAX_LTV:g})"
+        )
     return False, "Strong risk profile not fully met"
 
 
@@ -76,3 +99,23 @@ def evaluate_rules(data: AUSRequest) -> list[RuleEvaluation]:
             )
         )
     return evaluations
+
+
+def evaluate_rule_grid(
+    credit_score: np.ndarray,
+    dti: np.ndarray,
+    ltv: np.ndarray,
+    loan_type: LoanType,
+) -> dict[str, np.ndarray]:
+    """Array form of every rule in ``get_rule_set``: pass/fail masks keyed by rule name.
+
+    Must stay in step with the scalar evaluators above; the sweep tests compare
+    the two on sampled grid points.
+    """
+    conventional = loan_type == LoanType.CONVENTIONAL
+    return {
+        "Program minimum credit (Conventional)": ~(conventional & (credit_score < MIN_CONVENTIONAL_CREDIT_SCORE)),
+        "Maximum DTI": dti <= MAX_DTI,
+        "Maximum LTV for streamlined": ltv <= MAX_STREAMLINED_LTV,
+        "Strong risk profile": is_strong_profile(credit_score, dti, ltv),
+    }
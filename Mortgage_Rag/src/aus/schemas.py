@@ -4,6 +4,9 @@ from enum import Enum
 from pydantic import BaseModel, Field, model_validator
 
 
+MAX_SWEEP_POINTS = 250_000
+
+
 class LoanType(str, Enum):
     CONVENTIONAL = "Conventional"
     FHA = "FHA"
@@ -55,3 +58,74 @@ class AUSResponse(BaseModel):
     reasons: list[str]
     required_documents: list[str]
     rule_evaluations: list[RuleEvaluation]
+
+
+class SweepRange(BaseModel):
+    start: float
+    stop: float
+    step: float = Field(..., gt=0)
+
+    @model_validator(mode="after")
+    def validate_bounds(self) -> "SweepRange":
+        if self.stop < self.start:
+            raise ValueError(f"Sweep stop {self.stop} is below start {self.start}")
+        return self
+
+    @property
+    def points(self) -> int:
+        return int((self.stop - self.start) / self.step + 1e-9) + 1
+
+
+_BOUND_CHECKS = {
+    "ge": lambda value, limit: value < limit,
+    "gt": lambda value, limit: value <= limit,
+    "le": lambda value, limit: value > limit,
+    "lt": lambda value, limit: value >= limit,
+}
+
+
+class AUSSweepRequest(BaseModel):
+    base: AUSRequest
+    credit_score: SweepRange | None = None
+    dti: SweepRange | None = None
+    ltv: SweepRange | None = None
+    include_surface: bool = True
+
+    @model_validator(mode="after")
+    def validate_axes(self) -> "AUSSweepRequest":
+        size = 1
+        for name in ("credit_score", "dti", "ltv"):
+            axis = getattr(self, name)
+            if axis is None:
+                continue
+            # Every swept point must be a value AUSRequest itself would accept.
+            for constraint in AUSRequest.model_fields[name].metadata:
+                for bound, out_of_range in _BOUND_CHECKS.items():
+                    limit = getattr(constraint, bound, None)
+                    if limit is not None and (out_of_range(axis.start, limit) or out_of_range(axis.stop, limit)):
+                        raise ValueError(
+                            f"Sweep range for {name} ({axis.start}..{axis.stop}) violates {bound}={limit}"
+                        )
+            size *= axis.points
+        if size > MAX_SWEEP_POINTS:
+            raise ValueError(f"Sweep grid has {size} points; maximum is {MAX_SWEEP_POINTS}")
+        return self
+
+
+class MinimalChange(BaseModel):
+    finding: AUSFinding
+    changes: dict[str, float]
+    distance: float
+
+
+class AUSSweepResponse(BaseModel):
+    base_finding: AUSFinding
+    grid_size: int
+    axes: dict[str, list[float]]
+    finding_counts: dict[AUSFinding, int]
+    minimal_changes: list[MinimalChange]
+    findings: list[AUSFinding]
+    surface: list[int] | None = Field(
+        default=None,
+        description="Index into `findings` for every grid point, row-major over `axes` in order",
+    )
@@ -1,7 +1,14 @@
 from __future__ import annotations
 
+from typing import TYPE_CHECKING
+
 from .schemas import AUSFinding, AUSRequest, AUSResponse
-from .rules import evaluate_rules
+from .rules import evaluate_rules, get_rule_set, is_strong_profile
+
+if TYPE_CHECKING:
+    import numpy as np
+
+FINDING_ORDER = list(AUSFinding)
 
 
 def _base_required_documents() -> list[str]:
@@ -33,7 +40,7 @@ def evaluate_aus(data: AUSRequest) -> AUSResponse:
     failed_program = [rule for rule in evaluations if not rule.passed and rule.severity == "program"]
     failed_moderate = [rule for rule in evaluations if not rule.passed and rule.severity == "moderate"]
 
-    strong_profile = data.credit_score >= 740 and data.dti <= 30 and data.ltv <= 80
+    strong_profile = is_strong_profile(data.credit_score, data.dti, data.ltv)
 
     reasons: list[str] = []
     if strong_profile and not failed_program and not failed_moderate:
@@ -64,3 +71,24 @@ def evaluate_aus(data: AUSRequest) -> AUSResponse:
         required_documents=required_documents,
         rule_evaluations=evaluations,
     )
+
+
+def finding_grid(rule_passes: dict[str, np.ndarray]) -> np.ndarray:
+    """Vectorised ``evaluate_aus`` decision: an index into ``FINDING_ORDER`` per grid point."""
+    import numpy as np
+
+    severities = {rule.name: rule.severity for rule in get_rule_set()}
+    shape = np.broadcast_shapes(*(mask.shape for mask in rule_passes.values()))
+    failed_program = np.zeros(shape, dtype=bool)
+    failed_moderate = np.zeros(shape, dtype=np.int8)
+    for name, passed in rule_passes.items():
+        if severities[name] == "program":
+            failed_program |= ~passed
+        elif severities[name] == "moderate":
+            failed_moderate += ~passed
+    strong_profile = rule_passes["Strong risk profile"]
+
+    findings = np.full(shape, FINDING_ORDER.index(AUSFinding.REFER_INELIGIBLE), dtype=np.int8)
+    findings[~failed_program & (failed_moderate <= 1)] = FINDING_ORDER.index(AUSFinding.REFER_ELIGIBLE)
+    findings[strong_profile & ~failed_program & (failed_moderate == 0)] = FINDING_ORDER.index(AUSFinding.APPROVE_ELIGIBLE)
+    return findings
@@ -22,6 +22,29 @@ class Settings:
     max_dti: float
     max_ltv: float
     min_employment_months: float
+    openai_base_url: str | None = None
+    openai_max_connections: int = 20
+    openai_timeout_s: float = 60.0
+    openai_max_concurrency: int = 8
+    pdf_backend: str = "pypdf"
+    extract_cache_dir: Path | None = None
+    policy_corpus_dir: Path | None = None
+    policy_index_dir: Path | None = None
+    faiss_layout: str = "single"
+    default_loan_id: str = "default"
+    shard_cache_bytes: int = 512 * 1024 * 1024
+    streaming: bool = False
+    extract_workers: int = 0
+    embed_workers: int = 4
+    stage_queue_size: int = 8
+    embed_dimensions: int | None = None
+    index_encoding: str = "flat"
+    index_pca_dimensions: int | None = None
+    watch_poll_interval_s: float = 1.0
+    watch_batch_size: int = 16
+    watch_batch_wait_s: float = 2.0
+    watch_publish_interval_s: float = 5.0
+    watch_max_attempts: int = 5
 
 
 def load_settings() -> Settings:
@@ -39,6 +62,10 @@ def load_settings() -> Settings:
     else:
         faiss_dir = default_faiss_dir
     
+    extract_cache_dir = os.getenv("MORTGAGE_RAG_EXTRACT_CACHE")
+    embed_dimensions = os.getenv("MORTGAGE_RAG_EMBED_DIMENSIONS")
+    index_pca_dimensions = os.getenv("MORTGAGE_RAG_INDEX_PCA_DIM")
+
     has_api_key = bool(os.getenv("OPENAI_API_KEY"))
     logger.info(f"Configuration loaded: data_dir={data_dir}, openai_key_present={has_api_key}")
 
@@ -55,4 +82,34 @@ def load_settings() -> Settings:
         max_dti=float(os.getenv("MORTGAGE_MAX_DTI", "43")),
         max_ltv=float(os.getenv("MORTGAGE_MAX_LTV", "80")),
         min_employment_months=float(os.getenv("MORTGAGE_MIN_EMPLOYMENT_MONTHS", "24")),
+        openai_base_url=os.getenv("OPENAI_BASE_URL") or None,
+        openai_max_connections=int(os.getenv("MORTGAGE_RAG_OPENAI_MAX_CONNECTIONS", "20")),
+        openai_timeout_s=float(os.getenv("MORTGAGE_RAG_OPENAI_TIMEOUT", "60")),
+        openai_max_concurrency=int(os.getenv("MORTGAGE_RAG_LLM_CONCURRENCY", "8")),
+        pdf_backend=os.getenv("MORTGAGE_RAG_PDF_BACKEND", "pypdf"),
+        # Cached pages hold unredacted text, so on-disk caching is opt-in.
+        extract_cache_dir=Path(extract_cache_dir) if extract_cache_dir else None,
+        policy_corpus_dir=Path(os.getenv("MORTGAGE_RAG_POLICY_CORPUS", base_dir / "policies")),
+        policy_index_dir=Path(os.getenv("MORTGAGE_RAG_POLICY_INDEX", base_dir / "vectordb" / "policy")),
+        faiss_layout=os.getenv("MORTGAGE_RAG_FAISS_LAYOUT", "single"),
+        default_loan_id=os.getenv("MORTGAGE_RAG_LOAN_ID", "default"),
+        # Memory-mapped shards kept open while each loan is underwritten in the sharded layout.
+        shard_cache_bytes=int(float(os.getenv("MORTGAGE_RAG_SHARD_CACHE_MB", "512")) * 1024 * 1024),
+        streaming=os.getenv("MORTGAGE_RAG_STREAMING", "").lower() in {"1", "true", "yes"},
+        # 0 runs extraction and redaction on threads in this process.
+        extract_workers=int(os.getenv("MORTGAGE_RAG_EXTRACT_WORKERS", str(min(4, os.cpu_count() or 1)))),
+        embed_workers=int(os.getenv("MORTGAGE_RAG_EMBED_WORKERS", "4")),
+        stage_queue_size=int(os.getenv("MORTGAGE_RAG_STAGE_QUEUE", "8")),
+        # Reduced-width vectors from the provider, then optional local PCA and float16/8-bit storage.
+        embed_dimensions=int(embed_dimensions) if embed_dimensions else None,
+        index_encoding=os.getenv("MORTGAGE_RAG_INDEX_ENCODING", "flat"),
+        index_pca_dimensions=int(index_pca_dimensions) if index_pca_dimensions else None,
+        # main.py --watch: a micro-batch closes at this many documents or this long after its first arrival.
+        watch_poll_interval_s=float(os.getenv("MORTGAGE_RAG_WATCH_POLL_S", "1")),
+        watch_batch_size=int(os.getenv("MORTGAGE_RAG_WATCH_BATCH_DOCS", "16")),
+        watch_batch_wait_s=float(os.getenv("MORTGAGE_RAG_WATCH_BATCH_WAIT_S", "2")),
+        # Staged batches are published as a new index version at most this often.
+        watch_publish_interval_s=float(os.getenv("MORTGAGE_RAG_WATCH_PUBLISH_S", "5")),
+        # Attempts (the first batch included) before a failing PDF is recorded in output/watch_failed.json.
+        watch_max_attempts=int(os.getenv("MORTGAGE_RAG_WATCH_MAX_ATTEMPTS", "5")),
     )
@@ -0,0 +1,145 @@
+"""Keyword-scored document type classification for borrower documents.
+
+All keywords for all document types are compiled into one word-bounded,
+prefix-factored pattern, so a document prefix is scanned once and every type
+is scored from the same pass. The highest-weighted type wins; confidence is its share of
+the total matched weight, so a paystub that also mentions its "employer" is
+still a confident ``pay_stub``.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable
+import re
+
+from .extract import ExtractionCache, PdfTextBackend, extract_text_from_pdf
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+
+DEFAULT_PREFIX_CHARS = 1000
+UNKNOWN_TYPE = "unknown"
+
+# Weight 3: phrases that name the document; 2: fields specific to it; 1: weak hints.
+DOCUMENT_KEYWORDS: dict[str, dict[str, int]] = {
+    "pay_stub": {
+        "paystub": 3, "pay stub": 3, "earnings statement": 3,
+        "gross pay": 2, "net pay": 2, "pay period": 2, "pay date": 2, "ytd gross": 2,
+        "hourly rate": 1, "deductions": 1,
+    },
+    "bank_statement": {
+        "bank statement": 3,
+        "statement period": 2, "available balance": 2, "beginning balance": 2, "ending balance": 2,
+        "deposits": 1, "withdrawals": 1, "account type": 1,
+    },
+    "tax_return": {
+        "w-2": 3, "w2": 3, "1099": 3, "1040": 3, "tax return": 3, "wage and tax statement": 3,
+        "wages, tips": 2, "federal income tax withheld": 2, "employer ein": 1, "medicare wages": 1,
+    },
+    "employment_letter": {
+        "employment letter": 3, "verification of employment": 3, "employment verification": 3,
+        "employment start date": 2, "employment tenure": 1, "position": 1, "employer": 1,
+    },
+    "id_document": {
+        "driver license": 3, "driver's license": 3, "drivers license": 3, "passport": 3,
+        "identification document": 3, "id document": 3,
+        "identification": 2, "id number": 2, "kyc": 2, "issued country": 2, "id": 1, "dob": 1,
+    },
+    "loan_application": {
+        "loan application": 3, "uniform residential loan application": 3, "1003": 2,
+        "loan amount": 2, "property value": 1, "credit score": 1,
+    },
+}
+
+_NAME_SEPARATORS = re.compile(r"[_.]+")
+
+
+def _trie_alternation(terms: Iterable[str]) -> str:
+    """Prefix-factored regex alternation, e.g. ``pay (?:stub|date)`` rather than ``pay stub|pay date``.
+
+    Python's ``re`` tries alternatives one by one, so factoring shared prefixes
+    makes the pattern behave like a keyword trie: each position in the text is
+    tested against each distinct prefix once, not once per keyword.
+    """
+    trie: dict[str, dict] = {}
+    for term in terms:
+        node = trie
+        for char in term:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def emit(node: dict[str, dict]) -> str:
+        branches = [re.escape(char) + emit(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        group = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if "" not in node:
+            return group
+        return f"{group}?" if len(branches) > 1 else f"(?:{group})?"
+
+    return emit(trie)
+
+
+@dataclass(frozen=True)
+class DocumentClassification:
+    document_type: str
+    confidence: float
+    scores: dict[str, int] = field(default_factory=dict)
+
+
+class DocumentClassifier:
+    """Scores every document type in one regex pass over the name plus a text prefix."""
+
+    def __init__(
+        self,
+        keywords: dict[str, dict[str, int]] | None = None,
+        prefix_chars: int = DEFAULT_PREFIX_CHARS,
+    ) -> None:
+        self.keywords = keywords or DOCUMENT_KEYWORDS
+        self.prefix_chars = prefix_chars
+        self._lookup: dict[str, tuple[str, int]] = {}
+        for doc_type, terms in self.keywords.items():
+            for term, weight in terms.items():
+                current = self._lookup.get(term.lower())
+                if current is None or weight > current[1]:
+                    self._lookup[term.lower()] = (doc_type, weight)
+        # Optional suffix groups are greedy, so "employer ein" is preferred over "employer".
+        self._pattern = re.compile(rf"(?<![a-z0-9])(?:{_trie_alternation(self._lookup)})(?![a-z0-9])")
+
+    def classify(self, name: str, text: str) -> DocumentClassification:
+        content = f"{_NAME_SEPARATORS.sub(' ', name)} {text[: self.prefix_chars]}".lower()
+        scores: dict[str, int] = {}
+        for match in self._pattern.finditer(content):
+            doc_type, weight = self._lookup[match.group(0)]
+            scores[doc_type] = scores.get(doc_type, 0) + weight
+        if not scores:
+            return DocumentClassification(UNKNOWN_TYPE, 0.0, {})
+        # Ties resolve in keyword-table order, which is deterministic.
+        best = max(self.keywords, key=lambda doc_type: scores.get(doc_type, 0))
+        return DocumentClassification(best, round(scores[best] / sum(scores.values()), 3), scores)
+
+    def classify_many(self, documents: Iterable[tuple[str, str]]) -> list[DocumentClassification]:
+        return [self.classify(name, text) for name, text in documents]
+
+    def classify_directory(
+        self,
+        directory: Path,
+        pattern: str = "*.pdf",
+        backend: PdfTextBackend | None = None,
+        cache: ExtractionCache | None = None,
+    ) -> dict[str, DocumentClassification]:
+        results: dict[str, DocumentClassification] = {}
+        for path in sorted(directory.glob(pattern)):
+            text = extract_text_from_pdf(path, backend=backend, cache=cache).text
+            results[path.name] = self.classify(path.name, text)
+        logger.info(f"Classified {len(results)} documents in {directory}")
+        return results
+
+
+_default_classifier = DocumentClassifier()
+
+
+def classify_document(name: str, text: str) -> DocumentClassification:
+    return _default_classifier.classify(name, text)
@@ -2,10 +2,19 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Iterable
+from typing import Any, Iterable
 import json
 import numpy as np
-import faiss
+
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+
+# faiss index_factory codes for the stored vector encoding.
+INDEX_ENCODINGS = {"flat": "Flat", "fp16": "SQfp16", "sq8": "SQ8"}
+BYTES_PER_COMPONENT = {"flat": 4.0, "fp16": 2.0, "sq8": 1.0}
+ADD_BATCH_ROWS = 65536
 
 
 @dataclass(frozen=True)
@@ -14,6 +23,7 @@ class EmbeddingItem:
     chunk_id: int
     text: str
     vector: np.ndarray
+    shard_key: str = "default"
 
 
 def chunk_text(text: str, chunk_size: int, chunk_overlap: int) -> list[str]:
@@ -28,13 +38,72 @@ def chunk_text(text: str, chunk_size: int, chunk_overlap: int) -> list[str]:
     return chunks
 
 
-def build_faiss_index(embeddings: Iterable[EmbeddingItem], output_dir: Path) -> Path:
-    vectors = [item.vector for item in embeddings]
-    if not vectors:
+@dataclass(frozen=True)
+class IndexCompression:
+    """How vectors are stored: optional PCA to ``pca_dimensions``, then float32/float16/8-bit codes.
+
+    Queries stay full width; a PCA index projects them itself, so callers never
+    need to know how an index on disk was encoded.
+    """
+
+    encoding: str = "flat"
+    pca_dimensions: int | None = None
+
+    def __post_init__(self) -> None:
+        if self.encoding not in INDEX_ENCODINGS:
+            raise ValueError(f"Unknown index encoding '{self.encoding}'. Available: {', '.join(INDEX_ENCODINGS)}")
+
+    @property
+    def is_flat(self) -> bool:
+        return self.encoding == "flat" and not self.pca_dimensions
+
+    def stored_dimensions(self, dimension: int) -> int:
+        if self.pca_dimensions and self.pca_dimensions < dimension:
+            return self.pca_dimensions
+        return dimension
+
+    def bytes_per_vector(self, dimension: int) -> float:
+        return self.stored_dimensions(dimension) * BYTES_PER_COMPONENT[self.encoding]
+
+    def factory_string(self, dimension: int, training_rows: int) -> str:
+        codes = INDEX_ENCODINGS[self.encoding]
+        pca = self.stored_dimensions(dimension)
+        if pca == dimension:
+            return codes
+        if training_rows < pca:
+            # faiss cannot fit more principal components than it has training vectors.
+            logger.warning(f"PCA to {pca} dimensions needs at least {pca} vectors, got {training_rows}; storing full width")
+            return codes
+        return f"PCA{pca},{codes}"
+
+
+def new_faiss_index(matrix: np.ndarray, compression: IndexCompression | None = None) -> Any:
+    """Empty-or-trained L2 index for ``matrix``'s width; ``matrix`` is only used for training."""
+    import faiss
+
+    dimension = int(matrix.shape[1])
+    if compression is None or compression.is_flat:
+        return faiss.IndexFlatL2(dimension)
+    index = faiss.index_factory(dimension, compression.factory_string(dimension, len(matrix)), faiss.METRIC_L2)
+    if not index.is_trained:
+        index.train(np.ascontiguousarray(matrix, dtype="float32"))
+    return index
+
+
+def build_faiss_index(
+    embeddings: Iterable[EmbeddingItem],
+    output_dir: Path,
+    compression: IndexCompression | None = None,
+) -> Path:
+    import faiss
+
+    embeddings = list(embeddings)
+    if not embeddings:
         raise ValueError("No embeddings provided")
-    matrix = np.vstack(vectors).astype("float32")
-    index = faiss.IndexFlatL2(matrix.shape[1])
-    index.add(matrix)
+    matrix = np.vstack([item.vector for item in embeddings]).astype("float32", copy=False)
+    index = new_faiss_index(matrix, compression)
+    for start in range(0, len(matrix), ADD_BATCH_ROWS):
+        index.add(matrix[start : start + ADD_BATCH_ROWS])
 
     output_dir.mkdir(parents=True, exist_ok=True)
     index_path = output_dir / "index.faiss"
@@ -47,3 +116,101 @@ def build_faiss_index(embeddings: Iterable[EmbeddingItem], output_dir: Path) ->
     ]
     meta_path.write_text(json.dumps(metadata, indent=2), encoding="utf-8")
     return index_path
+
+
+class WritableFaissIndex:
+    """An index and its chunk metadata held in memory across appends and written out on demand.
+
+    An append costs the size of the batch (plus a pass over the positions when a
+    re-sent document's chunks are dropped); only ``write`` touches the whole
+    index. An opened index keeps its own encoding; ``compression`` only applies
+    when the first batch creates one.
+    """
+
+    def __init__(self, compression: IndexCompression | None = None) -> None:
+        self.compression = compression
+        self.index: Any = None
+        self.metadata: list[dict[str, Any]] = []
+
+    @classmethod
+    def open(cls, index_dir: Path, compression: IndexCompression | None = None) -> "WritableFaissIndex":
+        """Load the index in ``index_dir`` for appending; an empty one if there is none yet."""
+        import faiss
+
+        writable = cls(compression)
+        if (index_dir / "index.faiss").exists():
+            writable.index = faiss.read_index(str(index_dir / "index.faiss"))
+            writable.metadata = json.loads((index_dir / "metadata.json").read_text(encoding="utf-8"))
+        return writable
+
+    @property
+    def ntotal(self) -> int:
+        return int(self.index.ntotal) if self.index is not None else 0
+
+    def add(self, embeddings: Iterable[EmbeddingItem]) -> None:
+        """Append ``embeddings``, first dropping chunks already indexed for the same documents."""
+        embeddings = list(embeddings)
+        if not embeddings:
+            raise ValueError("No embeddings provided")
+        replaced = {item.doc_id for item in embeddings}
+        stale = [position for position, record in enumerate(self.metadata) if record["doc_id"] in replaced]
+        if stale:
+            # remove_ids compacts in place and keeps the survivors in order, so positions still line up with metadata.
+            self.index.remove_ids(np.asarray(stale, dtype="int64"))
+            self.metadata = [record for record in self.metadata if record["doc_id"] not in replaced]
+            logger.info(f"Replacing {len(stale)} chunks of {len(replaced)} re-sent documents")
+        matrix = np.vstack([item.vector for item in embeddings]).astype("float32", copy=False)
+        if self.index is None:
+            self.index = new_faiss_index(matrix, self.compression)
+        for start in range(0, len(matrix), ADD_BATCH_ROWS):
+            self.index.add(matrix[start : start + ADD_BATCH_ROWS])
+        self.metadata.extend({"doc_id": item.doc_id, "chunk_id": item.chunk_id, "text": item.text} for item in embeddings)
+
+    def write(self, output_dir: Path) -> Path:
+        import faiss
+
+        if self.index is None:
+            raise ValueError("No embeddings added")
+        output_dir.mkdir(parents=True, exist_ok=True)
+        index_path = output_dir / "index.faiss"
+        faiss.write_index(self.index, str(index_path))
+        (output_dir / "metadata.json").write_text(json.dumps(self.metadata, indent=2), encoding="utf-8")
+        return index_path
+
+
+def append_faiss_index(
+    base_dir: Path,
+    embeddings: Iterable[EmbeddingItem],
+    output_dir: Path,
+    compression: IndexCompression | None = None,
+) -> Path:
+    """Write the index in ``base_dir`` plus ``embeddings`` to ``output_dir``.
+
+    Chunks already indexed for a document in ``embeddings`` are dropped first, so
+    a re-sent document replaces its old chunks. Loads and rewrites the whole
+    index; use ``WritableFaissIndex`` directly to append repeatedly.
+    """
+    writable = WritableFaissIndex.open(base_dir, compression)
+    writable.add(embeddings)
+    return writable.write(output_dir)
+
+
+@dataclass(frozen=True)
+class LoadedIndex:
+    index_dir: Path
+    index: Any
+    metadata: list[dict[str, Any]]
+
+    def search(self, query_vector: Any, k: int = 5) -> list[tuple[dict[str, Any], float]]:
+        query = np.asarray(query_vector, dtype="float32").reshape(1, -1)
+        distances, positions = self.index.search(query, min(k, self.index.ntotal))
+        return [(self.metadata[pos], float(score)) for score, pos in zip(distances[0], positions[0]) if pos >= 0]
+
+
+def load_faiss_index(index_dir: Path) -> LoadedIndex:
+    """Memory-map an index written by ``build_faiss_index`` (use with ``VersionedIndexReader``)."""
+    import faiss
+
+    index = faiss.read_index(str(index_dir / "index.faiss"), faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+    metadata = json.loads((index_dir / "metadata.json").read_text(encoding="utf-8"))
+    return LoadedIndex(index_dir=index_dir, index=index, metadata=metadata)
@@ -1,9 +1,18 @@
 from __future__ import annotations
 
+from collections import OrderedDict
 from dataclasses import dataclass
 from pathlib import Path
+from typing import Callable, Protocol
+import hashlib
+import io
+import json
+import os
 import re
-from pypdf import PdfReader
+import threading
+from .logger import get_logger
+
+logger = get_logger(__name__)
 
 
 @dataclass(frozen=True)
@@ -28,14 +37,187 @@ FIELD_PATTERNS: dict[str, re.Pattern] = {
 }
 
 
-def extract_text_from_pdf(path: Path) -> DocumentText:
-    reader = PdfReader(str(path))
-    pages_text: list[str] = []
-    for page in reader.pages:
-        text = page.extract_text() or ""
-        if text:
-            pages_text.append(text)
-    return DocumentText(path=path, text="\n".join(pages_text))
+class PdfTextBackend(Protocol):
+    name: str
+
+    def extract_pages(self, data: bytes) -> list[str]:
+        ...
+
+
+class PypdfBackend:
+    name = "pypdf"
+
+    def extract_pages(self, data: bytes) -> list[str]:
+        from pypdf import PdfReader
+
+        reader = PdfReader(io.BytesIO(data))
+        return [page.extract_text() or "" for page in reader.pages]
+
+
+class PdfiumBackend:
+    """PDFium via pypdfium2; typically several times faster than pypdf."""
+
+    name = "pdfium"
+
+    def __init__(self) -> None:
+        import pypdfium2
+
+        self._pdfium = pypdfium2
+
+    def extract_pages(self, data: bytes) -> list[str]:
+        pdf = self._pdfium.PdfDocument(data)
+        try:
+            pages: list[str] = []
+            for page in pdf:
+                textpage = page.get_textpage()
+                pages.append(textpage.get_text_range().replace("\r\n", "\n"))
+                textpage.close()
+                page.close()
+            return pages
+        finally:
+            pdf.close()
+
+
+class PdfminerBackend:
+    """pdfminer.six in layout mode; slower, but keeps reading order on multi-column forms."""
+
+    name = "pdfminer"
+
+    def __init__(self) -> None:
+        from pdfminer.high_level import extract_pages
+        from pdfminer.layout import LAParams, LTTextContainer
+
+        self._extract_pages = extract_pages
+        self._laparams = LAParams
+        self._text_container = LTTextContainer
+
+    def extract_pages(self, data: bytes) -> list[str]:
+        pages: list[str] = []
+        for layout in self._extract_pages(io.BytesIO(data), laparams=self._laparams()):
+            parts = [element.get_text() for element in layout if isinstance(element, self._text_container)]
+            pages.append("".join(parts).strip())
+        return pages
+
+
+PDF_BACKENDS: dict[str, Callable[[], PdfTextBackend]] = {
+    PypdfBackend.name: PypdfBackend,
+    PdfiumBackend.name: PdfiumBackend,
+    PdfminerBackend.name: PdfminerBackend,
+}
+
+
+def get_pdf_backend(name: str = "pypdf") -> PdfTextBackend:
+    factory = PDF_BACKENDS.get(name)
+    if factory is None:
+        raise ValueError(f"Unknown PDF backend '{name}'; expected one of {sorted(PDF_BACKENDS)}")
+    try:
+        return factory()
+    except ImportError as exc:
+        raise ImportError(f"PDF backend '{name}' is not installed: {exc}") from exc
+
+
+def available_pdf_backends() -> list[str]:
+    available: list[str] = []
+    for name in PDF_BACKENDS:
+        try:
+            get_pdf_backend(name)
+        except ImportError:
+            continue
+        available.append(name)
+    return available
+
+
+class ExtractionCache:
+    """Content-addressed per-page text cache keyed by the SHA-256 of the PDF bytes and the backend.
+
+    Entries live in a bounded in-memory LRU. When ``root`` is set they are also
+    persisted as <root>/<backend>/<digest>.json; that text is unredacted, so only
+    point ``root`` at storage with the same protection as the source PDFs.
+    """
+
+    def __init__(self, root: Path | None = None, max_entries: int = 256) -> None:
+        self.root = root
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._memory: OrderedDict[tuple[str, str], list[str]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _path(self, digest: str, backend: str) -> Path:
+        return self.root / backend / f"{digest}.json"
+
+    def _remember(self, key: tuple[str, str], pages: list[str]) -> None:
+        with self._lock:
+            self._memory[key] = pages
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def get(self, digest: str, backend: str) -> list[str] | None:
+        key = (digest, backend)
+        with self._lock:
+            pages = self._memory.get(key)
+            if pages is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return pages
+        if self.root is not None:
+            try:
+                pages = json.loads(self._path(digest, backend).read_text(encoding="utf-8"))
+            except (FileNotFoundError, ValueError):
+                pages = None
+            if pages is not None:
+                self._remember(key, pages)
+                self.hits += 1
+                return pages
+        self.misses += 1
+        return None
+
+    def put(self, digest: str, backend: str, pages: list[str]) -> None:
+        self._remember((digest, backend), pages)
+        if self.root is None:
+            return
+        path = self._path(digest, backend)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp_path.write_text(json.dumps(pages), encoding="utf-8")
+        os.replace(tmp_path, path)
+
+
+def extract_pdf_pages(
+    data: bytes,
+    backend: PdfTextBackend | None = None,
+    cache: ExtractionCache | None = None,
+) -> list[str]:
+    backend = backend or PypdfBackend()
+    digest = hashlib.sha256(data).hexdigest()
+    if cache is not None:
+        cached = cache.get(digest, backend.name)
+        if cached is not None:
+            logger.debug(f"Extraction cache hit: {digest[:12]} ({backend.name})")
+            return cached
+    pages = backend.extract_pages(data)
+    if cache is not None:
+        cache.put(digest, backend.name, pages)
+    return pages
+
+
+def extract_text_from_pdf_bytes(
+    data: bytes,
+    backend: PdfTextBackend | None = None,
+    cache: ExtractionCache | None = None,
+) -> str:
+    pages = extract_pdf_pages(data, backend=backend, cache=cache)
+    return "\n".join(page for page in pages if page)
+
+
+def extract_text_from_pdf(
+    path: Path,
+    backend: PdfTextBackend | None = None,
+    cache: ExtractionCache | None = None,
+) -> DocumentText:
+    text = extract_text_from_pdf_bytes(path.read_bytes(), backend=backend, cache=cache)
+    return DocumentText(path=path, text=text)
 
 
 def extract_fields(text: str) -> dict[str, str]:
@@ -123,11 +123,11 @@ class OutputGuardrails:
     @staticmethod
     def validate_search_results(results: list[str]) -> GuardrailResult:
         """Validate search results don't contain unreacted PII"""
-        from src.pii import contains_pii
+        from src.pii import contains_pii, is_verified_redacted
         
         logger.info(f"Validating {len(results)} search results")
         for idx, result in enumerate(results):
-            if contains_pii(result):
+            if not is_verified_redacted(result) and contains_pii(result):
                 logger.warning(f"PII detected in search result {idx + 1}")
                 return GuardrailResult(
                     passed=False,
@@ -143,14 +143,16 @@ class OutputGuardrails:
         """Apply additional sanitization to results"""
         from src.pii import redact_pii
         
-        # Double-check PII redaction
-        sanitized = redact_pii(text)
+        # Remove any potential code injection first, so stripping cannot splice PII back together
+        stripped = text.replace("<script>", "").replace("</script>", "")
+        stripped = stripped.replace("javascript:", "")
+        if stripped == text:
+            # str.replace always returns a plain str; keep the original object so a
+            # RedactedText stays verified and redact_pii below skips the re-scan.
+            stripped = text
         
-        # Remove any potential code injection
-        sanitized = sanitized.replace("<script>", "").replace("</script>", "")
-        sanitized = sanitized.replace("javascript:", "")
-        
-        return sanitized
+        # Double-check PII redaction (a no-op for already verified RedactedText)
+        return redact_pii(stripped)
 
 
 def apply_input_guardrails(query: str) -> GuardrailResult:
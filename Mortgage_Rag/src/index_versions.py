@@ -0,0 +1,252 @@
+"""Versioned index directories with an atomically flipped ``current`` pointer.
+
+Layout::
+
+    <root>/versions/<version>/...       one complete build per directory
+    <root>/versions/<version>/version.json
+    <root>/current                      name of the live version
+    <root>/readers/<reader id>.json     which version each reader is using
+
+``publish_index_version`` builds into a hidden staging directory, renames it
+into ``versions/`` and only then replaces ``current`` with ``os.replace``, so a
+reader sees either the old build or the new one, never a partial write.
+``VersionedIndexReader`` polls the pointer and swaps to a new build without
+blocking queries already running against the old one. A version is garbage
+collected once no reader lease references it. A root with no ``current`` file
+is treated as a legacy unversioned index.
+"""
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any, Callable, Generic, TypeVar
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+CURRENT_FILE = "current"
+VERSIONS_DIR = "versions"
+READERS_DIR = "readers"
+VERSION_MANIFEST_FILE = "version.json"
+DEFAULT_KEEP_PREVIOUS = 1
+DEFAULT_LEASE_TTL_S = 600.0
+DEFAULT_POLL_INTERVAL_S = 2.0
+
+
+def _new_version_id() -> str:
+    # Sorts in build order; the suffix keeps concurrent builds apart.
+    now = time.time()
+    return f"{time.strftime('%Y%m%dT%H%M%S', time.gmtime(now))}.{int(now % 1 * 1e6):06d}-{uuid.uuid4().hex[:8]}"
+
+
+def _write_atomic(path: Path, text: str) -> None:
+    tmp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+    with tmp_path.open("w", encoding="utf-8") as handle:
+        handle.write(text)
+        handle.flush()
+        os.fsync(handle.fileno())
+    os.replace(tmp_path, path)
+
+
+def _fsync_tree(directory: Path) -> None:
+    for path in directory.rglob("*"):
+        if path.is_file():
+            with path.open("rb") as handle:
+                os.fsync(handle.fileno())
+
+
+def current_version(root: Path) -> str | None:
+    try:
+        return (root / CURRENT_FILE).read_text(encoding="utf-8").strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def resolve_index_dir(root: Path) -> Path:
+    """Directory of the live build: the current version, or ``root`` itself for a legacy layout."""
+    version = current_version(root)
+    return root / VERSIONS_DIR / version if version else root
+
+
+def publish_index_version(
+    root: Path,
+    build: Callable[[Path], Any],
+    keep_previous: int = DEFAULT_KEEP_PREVIOUS,
+) -> Path:
+    """Run ``build(staging_dir)``, publish the result as a new version and make it current."""
+    versions_dir = root / VERSIONS_DIR
+    versions_dir.mkdir(parents=True, exist_ok=True)
+    version = _new_version_id()
+    staging_dir = versions_dir / f".staging-{version}"
+    staging_dir.mkdir()
+    try:
+        build(staging_dir)
+        files = {
+            str(path.relative_to(staging_dir)): path.stat().st_size
+            for path in sorted(staging_dir.rglob("*"))
+            if path.is_file()
+        }
+        manifest = {"version": version, "created_at": time.time(), "previous": current_version(root), "files": files}
+        (staging_dir / VERSION_MANIFEST_FILE).write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+        _fsync_tree(staging_dir)
+        version_dir = versions_dir / version
+        os.replace(staging_dir, version_dir)
+    except BaseException:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        raise
+    _write_atomic(root / CURRENT_FILE, version)
+    logger.info(f"Published index version {version} under {root} ({len(files)} files)")
+    collect_garbage(root, keep_previous=keep_previous)
+    return version_dir
+
+
+def _live_leases(root: Path, lease_ttl_s: float) -> set[str]:
+    readers_dir = root / READERS_DIR
+    if not readers_dir.exists():
+        return set()
+    now = time.time()
+    leased: set[str] = set()
+    for lease_path in readers_dir.glob("*.json"):
+        try:
+            lease = json.loads(lease_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            continue
+        if now - float(lease.get("heartbeat", 0)) > lease_ttl_s:
+            # A reader that stopped heartbeating (crashed or killed) no longer pins its version.
+            lease_path.unlink(missing_ok=True)
+            continue
+        leased.update(str(version) for version in lease.get("versions", []))
+    return leased
+
+
+def collect_garbage(
+    root: Path,
+    keep_previous: int = DEFAULT_KEEP_PREVIOUS,
+    lease_ttl_s: float = DEFAULT_LEASE_TTL_S,
+) -> list[str]:
+    """Delete versions that are not current, not among the newest ``keep_previous`` and not leased."""
+    versions_dir = root / VERSIONS_DIR
+    if not versions_dir.exists():
+        return []
+    live = current_version(root)
+    # Hidden ``.staging-*`` directories belong to builds still in progress.
+    published = sorted(
+        (
+            path.name
+            for path in versions_dir.iterdir()
+            if not path.name.startswith(".") and (path / VERSION_MANIFEST_FILE).exists()
+        ),
+        reverse=True,
+    )
+    # Versions newer than ``live`` are renamed into place but not yet pointed at.
+    older = [name for name in published if live is None or name < live]
+    retained = {name for name in published if name not in older} | set(older[:keep_previous])
+    retained |= _live_leases(root, lease_ttl_s)
+    removed = [name for name in published if name not in retained]
+    for name in removed:
+        shutil.rmtree(versions_dir / name, ignore_errors=True)
+    if removed:
+        logger.info(f"Garbage-collected {len(removed)} index versions under {root}: {', '.join(removed)}")
+    return removed
+
+
+class VersionedIndexReader(Generic[T]):
+    """Serves ``load(version_dir)`` for the current version and follows the pointer as it moves.
+
+    ``get`` checks the pointer at most every ``poll_interval_s``. One caller
+    loads a new version while the rest keep getting the previous object, and
+    callers holding the old object finish on it undisturbed.
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        load: Callable[[Path], T],
+        poll_interval_s: float = DEFAULT_POLL_INTERVAL_S,
+        lease_ttl_s: float = DEFAULT_LEASE_TTL_S,
+    ) -> None:
+        self.root = root
+        self.poll_interval_s = poll_interval_s
+        self.lease_ttl_s = lease_ttl_s
+        self.reader_id = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.swaps = 0
+        self._load = load
+        self._loaded: tuple[str | None, T] | None = None
+        self._next_poll = 0.0
+        self._last_heartbeat = 0.0
+        self._refresh_lock = threading.Lock()
+
+    @property
+    def version(self) -> str | None:
+        loaded = self._loaded
+        return loaded[0] if loaded else None
+
+    def get(self) -> T | None:
+        if time.monotonic() >= self._next_poll:
+            if self._loaded is None:
+                # Nothing to serve yet, so callers wait for the initial load.
+                with self._refresh_lock:
+                    if self._loaded is None:
+                        self._refresh()
+            elif self._refresh_lock.acquire(blocking=False):
+                try:
+                    self._refresh()
+                finally:
+                    self._refresh_lock.release()
+        loaded = self._loaded
+        return loaded[1] if loaded else None
+
+    def _refresh(self) -> None:
+        self._next_poll = time.monotonic() + self.poll_interval_s
+        version = current_version(self.root)
+        loaded = self._loaded
+        if loaded is not None and loaded[0] == version:
+            self._heartbeat(version)
+            return
+        index_dir = self.root / VERSIONS_DIR / version if version else self.root
+        if version is None and not any(index_dir.iterdir() if index_dir.exists() else ()):
+            return
+        previous = loaded[0] if loaded else None
+        # Pin the new version before opening it so a concurrent publish cannot collect it mid-load.
+        self._heartbeat(previous, version, force=True)
+        if version is not None and not index_dir.exists():
+            # Collected between reading the pointer and pinning it; a newer version is live by now.
+            self._next_poll = 0.0
+            return
+        try:
+            value = self._load(index_dir)
+        except Exception as exc:
+            logger.warning(f"Could not load index version {version} from {index_dir}: {exc}")
+            self._heartbeat(previous, force=True)
+            return
+        self._loaded = (version, value)
+        self._heartbeat(version, force=True)
+        if loaded is not None:
+            self.swaps += 1
+            logger.info(f"Swapped index under {self.root} from version {loaded[0]} to {version}")
+            collect_garbage(self.root, lease_ttl_s=self.lease_ttl_s)
+
+    def _heartbeat(self, *versions: str | None, force: bool = False) -> None:
+        pinned = [version for version in versions if version is not None]
+        if not pinned:
+            return
+        now = time.time()
+        if not force and now - self._last_heartbeat < self.lease_ttl_s / 4:
+            return
+        readers_dir = self.root / READERS_DIR
+        readers_dir.mkdir(parents=True, exist_ok=True)
+        lease = {"versions": pinned, "pid": os.getpid(), "heartbeat": now}
+        _write_atomic(readers_dir / f"{self.reader_id}.json", json.dumps(lease))
+        self._last_heartbeat = now
+
+    def close(self) -> None:
+        (self.root / READERS_DIR / f"{self.reader_id}.json").unlink(missing_ok=True)
+        self._loaded = None
@@ -0,0 +1,29 @@
+"""LangChain ``Embeddings`` backed by ``LlmClient``.
+
+LangChain vector stores (``FAISS.from_documents`` and their query-time
+searches) embed through this adapter instead of ``OpenAIEmbeddings``, so those
+calls share the pooled client, the process-wide LLM limiter, PII input checks
+and ``UsageTracker`` accounting with every other embedding call. Kept out of
+``llm`` so importing that module does not pull in LangChain.
+"""
+from __future__ import annotations
+
+from langchain_core.embeddings import Embeddings
+
+from .llm import LlmClient
+from .policy_index import EMBED_BATCH_SIZE
+
+
+class LlmClientEmbeddings(Embeddings):
+    def __init__(self, llm: LlmClient, batch_size: int = EMBED_BATCH_SIZE) -> None:
+        self.llm = llm
+        self.batch_size = batch_size
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        vectors: list[list[float]] = []
+        for start in range(0, len(texts), self.batch_size):
+            vectors.extend(self.llm.embed_texts(texts[start : start + self.batch_size]))
+        return vectors
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.llm.embed_texts([text])[0]
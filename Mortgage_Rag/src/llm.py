@@ -1,54 +1,322 @@
 from __future__ import annotations
 
+import asyncio
+import threading
+import weakref
 from dataclasses import dataclass
-from typing import Iterable
-from openai import OpenAI
-from .pii import redact_pii, contains_pii
+from typing import TYPE_CHECKING, Any, Iterable
+from .pii import ensure_redacted
 from .logger import get_logger
+from .usage import current_usage
+
+if TYPE_CHECKING:
+    import httpx
+    from openai import AsyncOpenAI, OpenAI
 
 logger = get_logger(__name__)
 
 
+DEFAULT_MAX_CONNECTIONS = 20
+DEFAULT_TIMEOUT_S = 60.0
+DEFAULT_MAX_CONCURRENCY = 8
+KEEPALIVE_EXPIRY_S = 30.0
+
+
+class LlmConcurrencyLimiter:
+    """Process-wide cap on in-flight LLM/embedding calls, usable from threads and coroutines."""
+
+    def __init__(self, limit: int) -> None:
+        if limit <= 0:
+            raise ValueError("LLM concurrency limit must be positive")
+        self.limit = limit
+        self._semaphore = threading.BoundedSemaphore(limit)
+
+    def __enter__(self) -> "LlmConcurrencyLimiter":
+        self._semaphore.acquire()
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self._semaphore.release()
+
+    async def __aenter__(self) -> "LlmConcurrencyLimiter":
+        # Sync and async callers share one budget; only park a worker thread when the fast path fails.
+        if self._semaphore.acquire(blocking=False):
+            return self
+        pending = _PendingAcquire(self._semaphore)
+        try:
+            await asyncio.shield(asyncio.get_running_loop().run_in_executor(None, pending.acquire))
+        except asyncio.CancelledError:
+            pending.abandon()
+            raise
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        self._semaphore.release()
+
+
+class _PendingAcquire:
+    """A semaphore acquire running on a worker thread that the awaiting coroutine may abandon.
+
+    A cancelled coroutine cannot stop the thread, so whichever side finishes second
+    gives the slot back instead of leaking it.
+    """
+
+    def __init__(self, semaphore: threading.BoundedSemaphore) -> None:
+        self._semaphore = semaphore
+        self._lock = threading.Lock()
+        self._acquired = False
+        self._abandoned = False
+
+    def acquire(self) -> None:
+        self._semaphore.acquire()
+        with self._lock:
+            if self._abandoned:
+                self._semaphore.release()
+            else:
+                self._acquired = True
+
+    def abandon(self) -> None:
+        with self._lock:
+            if self._acquired:
+                self._semaphore.release()
+            else:
+                self._abandoned = True
+
+
+_pool_lock = threading.Lock()
+_sync_clients: dict[tuple, OpenAI] = {}
+# httpx.AsyncClient connections are bound to the loop that opened them, so async clients are kept per loop.
+_async_clients: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict[tuple, AsyncOpenAI]] = (
+    weakref.WeakKeyDictionary()
+)
+_http_clients: dict[tuple, httpx.Client] = {}
+_limiter = LlmConcurrencyLimiter(DEFAULT_MAX_CONCURRENCY)
+
+
+def _limits(max_connections: int) -> httpx.Limits:
+    import httpx
+
+    return httpx.Limits(
+        max_connections=max_connections,
+        max_keepalive_connections=max_connections,
+        keepalive_expiry=KEEPALIVE_EXPIRY_S,
+    )
+
+
+def _timeout(timeout_s: float) -> httpx.Timeout:
+    import httpx
+
+    return httpx.Timeout(timeout_s, connect=min(timeout_s, 10.0))
+
+
+def get_http_client(
+    max_connections: int = DEFAULT_MAX_CONNECTIONS,
+    timeout_s: float = DEFAULT_TIMEOUT_S,
+) -> httpx.Client:
+    """Shared keep-alive HTTP pool behind the pooled OpenAI clients."""
+    key = (max_connections, timeout_s)
+    with _pool_lock:
+        client = _http_clients.get(key)
+        if client is None or client.is_closed:
+            import httpx
+
+            logger.info(f"Creating pooled HTTP client: max_connections={max_connections}, timeout_s={timeout_s}")
+            client = httpx.Client(limits=_limits(max_connections), timeout=_timeout(timeout_s))
+            _http_clients[key] = client
+        return client
+
+
+def get_openai_client(
+    api_key: str,
+    base_url: str | None = None,
+    max_connections: int = DEFAULT_MAX_CONNECTIONS,
+    timeout_s: float = DEFAULT_TIMEOUT_S,
+) -> OpenAI:
+    key = (api_key, base_url, max_connections, timeout_s)
+    with _pool_lock:
+        client = _sync_clients.get(key)
+        if client is not None:
+            return client
+    http_client = get_http_client(max_connections=max_connections, timeout_s=timeout_s)
+    with _pool_lock:
+        client = _sync_clients.get(key)
+        if client is None:
+            from openai import OpenAI
+
+            client = OpenAI(api_key=api_key, base_url=base_url, timeout=_timeout(timeout_s), http_client=http_client)
+            _sync_clients[key] = client
+        return client
+
+
+def get_async_openai_client(
+    api_key: str,
+    base_url: str | None = None,
+    max_connections: int = DEFAULT_MAX_CONNECTIONS,
+    timeout_s: float = DEFAULT_TIMEOUT_S,
+) -> AsyncOpenAI:
+    """Pooled async client for the running event loop; must be called from a coroutine."""
+    loop = asyncio.get_running_loop()
+    key = (api_key, base_url, max_connections, timeout_s)
+    with _pool_lock:
+        clients = _async_clients.setdefault(loop, {})
+        client = clients.get(key)
+        if client is None or client.is_closed():
+            import httpx
+            from openai import AsyncOpenAI
+
+            http_client = httpx.AsyncClient(limits=_limits(max_connections), timeout=_timeout(timeout_s))
+            client = AsyncOpenAI(api_key=api_key, base_url=base_url, timeout=_timeout(timeout_s), http_client=http_client)
+            clients[key] = client
+        return client
+
+
+def get_llm_limiter() -> LlmConcurrencyLimiter:
+    return _limiter
+
+
+def configure_llm_concurrency(limit: int) -> LlmConcurrencyLimiter:
+    global _limiter
+    if limit != _limiter.limit:
+        logger.info(f"Configuring LLM concurrency limit: {limit}")
+        _limiter = LlmConcurrencyLimiter(limit)
+    return _limiter
+
+
+async def _close_async_clients(clients: Iterable[AsyncOpenAI]) -> None:
+    await asyncio.gather(*(client.close() for client in clients), return_exceptions=True)
+
+
+async def aclose_llm_clients() -> None:
+    """Close the running loop's pooled async clients; call before the loop shuts down."""
+    with _pool_lock:
+        clients = _async_clients.pop(asyncio.get_running_loop(), {})
+    await _close_async_clients(clients.values())
+
+
+def close_llm_clients() -> None:
+    """Close every pooled client.
+
+    Async clients are closed on their own loop: run to completion if the loop is idle,
+    scheduled if it is running. Clients of a closed loop lost their connections with it.
+    """
+    with _pool_lock:
+        for client in _http_clients.values():
+            client.close()
+        _http_clients.clear()
+        _sync_clients.clear()
+        async_clients = list(_async_clients.items())
+        _async_clients.clear()
+    for loop, clients in async_clients:
+        if loop.is_closed() or not clients:
+            continue
+        if loop.is_running():
+            asyncio.run_coroutine_threadsafe(_close_async_clients(list(clients.values())), loop)
+        else:
+            loop.run_until_complete(_close_async_clients(list(clients.values())))
+
+
+def _sanitize_embedding_input(texts_list: list[str]) -> list[str]:
+    # Already-verified RedactedText passes straight through; anything else is redacted and checked.
+    return [ensure_redacted(text) for text in texts_list]
+
+
+def _sanitize_chat_input(system_prompt: str, user_prompt: str) -> tuple[str, str]:
+    return ensure_redacted(system_prompt), ensure_redacted(user_prompt)
+
+
+def _record_usage(kind: str, model: str, texts: list[str], response: Any, output_text: str = "") -> None:
+    tracker = current_usage()
+    if tracker is None:
+        return
+    usage = getattr(response, "usage", None)
+    tracker.record_call(
+        kind,
+        model,
+        texts,
+        output_text=output_text,
+        reported_input_tokens=getattr(usage, "prompt_tokens", None),
+        reported_output_tokens=getattr(usage, "completion_tokens", None) if kind == "chat" else None,
+    )
+
+
 @dataclass(frozen=True)
 class LlmClient:
     api_key: str
     model: str
     embed_model: str
+    base_url: str | None = None
+    max_connections: int = DEFAULT_MAX_CONNECTIONS
+    timeout_s: float = DEFAULT_TIMEOUT_S
+    # Provider-side truncation (text-embedding-3 models); None keeps the model's full width.
+    embed_dimensions: int | None = None
 
     def _client(self) -> OpenAI:
-        return OpenAI(api_key=self.api_key)
+        return get_openai_client(self.api_key, self.base_url, self.max_connections, self.timeout_s)
+
+    def _async_client(self) -> AsyncOpenAI:
+        return get_async_openai_client(self.api_key, self.base_url, self.max_connections, self.timeout_s)
+
+    def _chat_messages(self, system_prompt: str, user_prompt: str) -> list[dict[str, str]]:
+        sanitized_system, sanitized_user = _sanitize_chat_input(system_prompt, user_prompt)
+        return [
+            {"role": "system", "content": sanitized_system},
+            {"role": "user", "content": sanitized_user},
+        ]
+
+    def _embedding_options(self) -> dict[str, Any]:
+        options: dict[str, Any] = {"model": self.embed_model}
+        if self.embed_dimensions:
+            options["dimensions"] = self.embed_dimensions
+        return options
 
     def embed_texts(self, texts: Iterable[str]) -> list[list[float]]:
-        logger.info(f"Embedding texts: {len(list(texts))} texts")
         texts_list = list(texts)
-        sanitized = [redact_pii(text) for text in texts_list]
-        if any(contains_pii(text) for text in sanitized):
-            logger.error("PII detected after redaction in embed_texts")
-            raise ValueError("PII detected after redaction")
+        logger.info(f"Embedding texts: {len(texts_list)} texts")
+        sanitized = _sanitize_embedding_input(texts_list)
         logger.info(f"Calling OpenAI embeddings API with model={self.embed_model}")
-        client = self._client()
-        response = client.embeddings.create(model=self.embed_model, input=sanitized)
+        with get_llm_limiter():
+            response = self._client().embeddings.create(input=sanitized, **self._embedding_options())
+        _record_usage("embedding", self.embed_model, sanitized, response)
+        embeddings = [item.embedding for item in response.data]
+        logger.info(f"Successfully generated {len(embeddings)} embeddings")
+        return embeddings
+
+    async def aembed_texts(self, texts: Iterable[str]) -> list[list[float]]:
+        texts_list = list(texts)
+        logger.info(f"Embedding texts (async): {len(texts_list)} texts")
+        sanitized = _sanitize_embedding_input(texts_list)
+        async with get_llm_limiter():
+            response = await self._async_client().embeddings.create(input=sanitized, **self._embedding_options())
+        _record_usage("embedding", self.embed_model, sanitized, response)
         embeddings = [item.embedding for item in response.data]
         logger.info(f"Successfully generated {len(embeddings)} embeddings")
         return embeddings
 
     def safe_chat(self, system_prompt: str, user_prompt: str) -> str:
         logger.info(f"Safe chat: system_prompt_length={len(system_prompt)}, user_prompt_length={len(user_prompt)}")
-        sanitized_system = redact_pii(system_prompt)
-        sanitized_user = redact_pii(user_prompt)
-        if contains_pii(sanitized_system) or contains_pii(sanitized_user):
-            logger.error("PII detected after redaction in safe_chat")
-            raise ValueError("PII detected after redaction")
+        messages = self._chat_messages(system_prompt, user_prompt)
         logger.info(f"Calling OpenAI chat API with model={self.model}")
-        client = self._client()
-        response = client.chat.completions.create(
-            model=self.model,
-            messages=[
-                {"role": "system", "content": sanitized_system},
-                {"role": "user", "content": sanitized_user},
-            ],
-            temperature=0.0,
-        )
+        with get_llm_limiter():
+            response = self._client().chat.completions.create(
+                model=self.model,
+                messages=messages,
+                temperature=0.0,
+            )
+        result = response.choices[0].message.content or ""
+        _record_usage("chat", self.model, [message["content"] for message in messages], response, output_text=result)
+        logger.info(f"Chat response received: {len(result)} characters")
+        return result
+
+    async def asafe_chat(self, system_prompt: str, user_prompt: str) -> str:
+        logger.info(f"Safe chat (async): system_prompt_length={len(system_prompt)}, user_prompt_length={len(user_prompt)}")
+        messages = self._chat_messages(system_prompt, user_prompt)
+        async with get_llm_limiter():
+            response = await self._async_client().chat.completions.create(
+                model=self.model,
+                messages=messages,
+                temperature=0.0,
+            )
         result = response.choices[0].message.content or ""
+        _record_usage("chat", self.model, [message["content"] for message in messages], response, output_text=result)
         logger.info(f"Chat response received: {len(result)} characters")
         return result
@@ -8,6 +8,21 @@ from datetime import datetime
 from typing import Optional
 
 
+class _LazyFileHandler(logging.FileHandler):
+    """FileHandler that creates its directory and opens the file on the first record, not at import."""
+
+    def __init__(self, filename: Path) -> None:
+        super().__init__(filename, encoding='utf-8', delay=True)
+
+    def _open(self):
+        Path(self.baseFilename).parent.mkdir(parents=True, exist_ok=True)
+        return super()._open()
+
+
+# One handler (and at most one open descriptor) per log file, shared by every module logger.
+_file_handlers: dict[Path, logging.Handler] = {}
+
+
 def setup_logger(
     name: str,
     level: int = logging.INFO,
@@ -49,19 +64,20 @@ def setup_logger(
     
     # File handler (if specified)
     if log_file:
-        log_file.parent.mkdir(parents=True, exist_ok=True)
-        file_handler = logging.FileHandler(log_file, encoding='utf-8')
-        file_handler.setLevel(level)
-        file_handler.setFormatter(formatter)
+        file_handler = _file_handlers.get(log_file)
+        if file_handler is None:
+            file_handler = _LazyFileHandler(log_file)
+            file_handler.setLevel(level)
+            file_handler.setFormatter(formatter)
+            _file_handlers[log_file] = file_handler
         logger.addHandler(file_handler)
     
     return logger
 
 
 def get_default_log_file() -> Path:
-    """Get default log file path"""
+    """Get default log file path (the directory is created on first write)"""
     logs_dir = Path.cwd() / "logs"
-    logs_dir.mkdir(exist_ok=True)
     timestamp = datetime.now().strftime("%Y%m%d")
     return logs_dir / f"mortgage_rag_{timestamp}.log"
 
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import hashlib
 import re
 from dataclasses import dataclass
 from typing import Iterable
@@ -8,28 +9,107 @@ from .logger import get_logger
 logger = get_logger(__name__)
 
 
+class RedactionError(ValueError):
+    """Redaction did not converge: PII is still detected after the last pass."""
+
+
 @dataclass(frozen=True)
 class PiiMatch:
     label: str
     value: str
 
 
+# Every pattern must match in linear time on any input, including OCR garbage and
+# adversarial uploads. Each one does a bounded amount of work per start position:
+# repetitions are length-capped, and runs that are followed by a character outside
+# their class are possessive (``++``/``{m,n}+``, Python 3.11+) so they are never
+# re-split by backtracking. unit-testing/test_pii_worst_case.py enforces a
+# per-megabyte time budget.
+_STREET_SUFFIXES = "Street|St|Avenue|Ave|Road|Rd|Boulevard|Blvd|Lane|Ln|Drive|Dr|Court|Ct|Way|Wy"
+
 _PII_PATTERNS: list[tuple[str, re.Pattern]] = [
     # SSN - Catches SSN patterns with separators OR with "SSN" label, including test SSNs like 999-99-9999
     # Matches: SSN: 999-99-9999, 123-45-6789, 123 45 6789, SSN 123456789, SSN: 123456789
     # For security, we redact even "invalid" SSNs since they might be test data or placeholders
     # Note: Plain 9-digit numbers without "SSN" label are caught by ROUTING pattern instead
-    ("SSN", re.compile(r"(?:\bSSN[-:\s]+\d{9}\b|\b\d{3}[-\s]\d{2}[-\s]\d{4}\b)", re.IGNORECASE)),
+    ("SSN", re.compile(r"(?:\bSSN[-:\s]++\d{9}\b|\b\d{3}[-\s]\d{2}[-\s]\d{4}\b)", re.IGNORECASE)),
     ("DOB", re.compile(r"\b(0[1-9]|1[0-2])[\/\-](0[1-9]|[12]\d|3[01])[\/\-](19\d{2}|20\d{2})\b")),
     ("PHONE", re.compile(r"\b(?:\+1[-.\s]?)?\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}\b")),
-    ("EMAIL", re.compile(r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}\b")),
+    # Local part and domain labels are capped at their RFC 5321 lengths (64 / 63).
+    ("EMAIL", re.compile(r"\b[A-Za-z0-9._%+-]{1,64}+@(?:[A-Za-z0-9-]{1,63}+\.){1,8}[A-Za-z]{2,63}\b")),
     ("EIN", re.compile(r"\b\d{2}-\d{7}\b")),
     ("ROUTING", re.compile(r"\b\d{9}\b")),
     ("ACCOUNT", re.compile(r"\b\d{10,17}\b")),
-    ("ADDRESS", re.compile(r"\b\d{1,6}\s+[A-Za-z0-9.\s]{2,}\s+(Street|St|Avenue|Ave|Road|Rd|Boulevard|Blvd|Lane|Ln|Drive|Dr|Court|Ct|Way|Wy)\b", re.IGNORECASE)),
+    # House number, then up to twelve whole street-name words (each taken atomically, separated by
+    # any amount of whitespace, as layout-preserving extraction produces), then a suffix. The word
+    # count is greedy so multi-suffix names ("... Road Extension North Lane") are taken whole. The
+    # lookahead (first word has a letter, e.g. "Oak", "5th") skips runs of bare numbers cheaply.
+    (
+        "ADDRESS",
+        re.compile(
+            rf"\b\d{{1,6}}(?=\s++[0-9.]*+[A-Za-z])(?:\s++[A-Za-z0-9.]{{1,40}}+){{1,12}}\s++(?:{_STREET_SUFFIXES})\b",
+            re.IGNORECASE,
+        ),
+    ),
 ]
 
 
+# Changes whenever a pattern changes, so text verified under an older ruleset is re-scanned.
+REDACTION_RULESET_VERSION = hashlib.sha256(
+    "\n".join(f"{label}:{pattern.pattern}:{pattern.flags}" for label, pattern in _PII_PATTERNS).encode("utf-8")
+).hexdigest()[:12]
+
+_MAX_REDACTION_PASSES = 3
+
+
+class RedactedText(str):
+    """Text that passed redaction and verification under ``ruleset_version``.
+
+    Any ``str`` operation returns a plain ``str`` again, so edited text loses its
+    provenance. Use ``derive`` only for substrings or whitespace normalisation of
+    the verified text (chunks, snippets), which cannot introduce new characters.
+    """
+
+    ruleset_version: str
+
+    def __new__(cls, value: str, ruleset_version: str = REDACTION_RULESET_VERSION) -> "RedactedText":
+        obj = super().__new__(cls, value)
+        obj.ruleset_version = ruleset_version
+        return obj
+
+    def derive(self, value: str) -> str:
+        """Re-tag a slice of this text, re-scanning it when the slice could expose new matches.
+
+        Cutting through an alphanumeric run creates word boundaries the patterns
+        anchor on: "1234-56-78901" is clean, its slice "234-56-7890" is an SSN.
+        Edited slices (e.g. whitespace-normalised snippets) are re-scanned too.
+        """
+        start = self.find(value)
+        if value and (start < 0 or _cuts_alnum_run(self, start, start + len(value))):
+            return redact_pii(value)
+        return RedactedText(value, self.ruleset_version)
+
+    def __reduce__(self):
+        return (RedactedText, (str(self), self.ruleset_version))
+
+
+def _cuts_alnum_run(text: str, start: int, end: int) -> bool:
+    return (start > 0 and text[start - 1].isalnum() and text[start].isalnum()) or (
+        end < len(text) and text[end - 1].isalnum() and text[end].isalnum()
+    )
+
+
+def is_verified_redacted(text: str) -> bool:
+    return isinstance(text, RedactedText) and text.ruleset_version == REDACTION_RULESET_VERSION
+
+
+def restore_provenance(text: str, ruleset_version: str | None) -> str:
+    """Re-tag text read back from a store that recorded the ruleset used when it was written."""
+    if ruleset_version == REDACTION_RULESET_VERSION:
+        return RedactedText(text, ruleset_version)
+    return text
+
+
 def detect_pii(text: str) -> list[PiiMatch]:
     logger.debug(f"Detecting PII in text (length={len(text)})")
     matches: list[PiiMatch] = []
@@ -48,16 +128,33 @@ def contains_pii(text: str) -> bool:
 
 
 def redact_pii(text: str) -> str:
+    """Redact PII; returns a ``RedactedText`` once the result verifies clean, else a plain ``str``."""
+    if is_verified_redacted(text):
+        return text
     logger.debug(f"Redacting PII from text (length={len(text)})")
-    redacted = text
+    redacted = str(text)
     redaction_count = 0
-    for label, pattern in _PII_PATTERNS:
-        matches_before = len(pattern.findall(redacted))
-        redacted = pattern.sub(f"[{label}_REDACTED]", redacted)
-        if matches_before > 0:
-            redaction_count += matches_before
-            logger.debug(f"Redacted {matches_before} {label} instances")
-    logger.info(f"PII redaction complete: {redaction_count} total redactions")
+    for _ in range(_MAX_REDACTION_PASSES):
+        for label, pattern in _PII_PATTERNS:
+            redacted, replaced = pattern.subn(f"[{label}_REDACTED]", redacted)
+            if replaced > 0:
+                redaction_count += replaced
+                logger.debug(f"Redacted {replaced} {label} instances")
+        if not contains_pii(redacted):
+            logger.info(f"PII redaction complete: {redaction_count} total redactions")
+            return RedactedText(redacted)
+    logger.warning("PII redaction did not converge; result left unverified")
+    return redacted
+
+
+def ensure_redacted(text: str) -> RedactedText:
+    """Pass verified text through untouched; redact anything else and hard-fail if PII survives."""
+    if is_verified_redacted(text):
+        return text
+    redacted = redact_pii(text)
+    if not is_verified_redacted(redacted):
+        logger.error("PII detected after redaction")
+        raise RedactionError("PII detected after redaction")
     return redacted
 
 
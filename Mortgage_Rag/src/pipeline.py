@@ -1,20 +1,31 @@
 from __future__ import annotations
 
+from contextlib import ExitStack
 from dataclasses import dataclass
+from functools import lru_cache, partial
 from pathlib import Path
-from typing import Any
+from typing import TYPE_CHECKING, Any
 import json
-from langchain_core.documents import Document
-from langchain_community.vectorstores import FAISS
-from langchain_openai import OpenAIEmbeddings
+import tempfile
+
+import numpy as np
 
 from .config import Settings
-from .extract import extract_text_from_pdf, extract_fields
-from .pii import redact_pii, detect_pii
-from .embedding import chunk_text, EmbeddingItem, build_faiss_index
-from .llm import LlmClient
+from .extract import ExtractionCache, PdfTextBackend, extract_text_from_pdf, extract_fields, get_pdf_backend
+from .pii import REDACTION_RULESET_VERSION, RedactedText, RedactionError, redact_pii, detect_pii, ensure_redacted
+from .embedding import chunk_text, EmbeddingItem, IndexCompression, build_faiss_index
+from .index_versions import publish_index_version
+from .llm import LlmClient, configure_llm_concurrency
 from .logger import get_logger
+from .policy_index import load_policy_index
+from .shards import ShardManager, ShardVectorStore, build_sharded_faiss_index, shard_dirname
+from .stages import Stage, StagedPipeline
+from .streaming import IncrementalIndexWriter, SpooledDocuments
 from .underwriting_agents import run_underwriting_workflow
+from .usage import UsageTracker, attribute_to_document, current_usage, track_usage
+
+if TYPE_CHECKING:
+    from langchain_core.documents import Document
 
 logger = get_logger(__name__)
 
@@ -23,7 +34,7 @@ logger = get_logger(__name__)
 class ProcessedDocument:
     doc_id: str
     text: str
-    redacted_text: str
+    redacted_text: RedactedText
     fields: dict[str, str]
     pii_found: list[dict[str, str]]
 
@@ -38,133 +49,359 @@ def _redact_structure(value: Any) -> Any:
     return value
 
 
-def process_document(path: Path) -> ProcessedDocument:
-    logger.info(f"Processing document: {path.name}")
-    doc_text = extract_text_from_pdf(path)
-    fields = extract_fields(doc_text.text)
-    pii_matches = detect_pii(doc_text.text)
-    redacted_text = redact_pii(doc_text.text)
+def _process_text(path: Path, text: str) -> ProcessedDocument:
+    fields = extract_fields(text)
+    pii_matches = detect_pii(text)
+    redacted_text = ensure_redacted(text)
     redacted_fields = {key: redact_pii(value) for key, value in fields.items()}
     logger.info(f"Document processed: {path.stem}, fields={len(fields)}, pii_matches={len(pii_matches)}")
     return ProcessedDocument(
         doc_id=path.stem,
-        text=doc_text.text,
+        text=text,
         redacted_text=redacted_text,
         fields=redacted_fields,
         pii_found=[{"label": m.label, "value": redact_pii(m.value)} for m in pii_matches],
     )
 
 
+def process_document(
+    path: Path,
+    backend: PdfTextBackend | None = None,
+    cache: ExtractionCache | None = None,
+) -> ProcessedDocument:
+    logger.info(f"Processing document: {path.name}")
+    doc_text = extract_text_from_pdf(path, backend=backend, cache=cache)
+    return _process_text(path, doc_text.text)
+
+
+# Stage functions below run in worker processes, so they are module-level and
+# take only picklable arguments.
+@lru_cache(maxsize=None)
+def _stage_extractor(backend_name: str, cache_dir: Path | None) -> tuple[PdfTextBackend, ExtractionCache]:
+    return get_pdf_backend(backend_name), ExtractionCache(cache_dir)
+
+
+def _extract_stage(path: Path, backend_name: str, cache_dir: Path | None) -> tuple[Path, str]:
+    backend, cache = _stage_extractor(backend_name, cache_dir)
+    logger.info(f"Extracting document: {path.name}")
+    return path, extract_text_from_pdf(path, backend=backend, cache=cache).text
+
+
+def _redact_stage(item: tuple[Path, str]) -> tuple[Path, ProcessedDocument | None]:
+    path, text = item
+    try:
+        return path, _process_text(path, text)
+    except RedactionError as exc:
+        # One document that cannot be made safe must not cost the rest of the batch; it is
+        # passed on as None so later stages skip it and nothing of it is written or indexed.
+        logger.error(f"Skipping {path.name}: {exc}")
+        return path, None
+
+
+def loan_id_for(path: Path, settings: Settings) -> str:
+    # Sharded layout: data/<loan_id>/*.pdf; top-level PDFs belong to the default loan.
+    if path.parent != settings.data_dir:
+        return path.parent.name
+    return settings.default_loan_id
+
+
+def processed_output_path(path: Path, settings: Settings) -> Path:
+    if path.parent != settings.data_dir:
+        return settings.output_dir / path.parent.name / f"{path.stem}.json"
+    return settings.output_dir / f"{path.stem}.json"
+
+
+def _chunk_stage(
+    item: tuple[Path, ProcessedDocument | None], chunk_size: int, chunk_overlap: int
+) -> tuple[Path, ProcessedDocument | None, list[RedactedText]]:
+    path, processed = item
+    if processed is None:
+        return path, None, []
+    chunks = [
+        processed.redacted_text.derive(chunk)
+        for chunk in chunk_text(processed.redacted_text, chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    ]
+    logger.info(f"Generated {len(chunks)} chunks for {path.name}")
+    return path, processed, chunks
+
+
+def _embed_stage(item: tuple[Path, ProcessedDocument, list[RedactedText]], llm: LlmClient | None) -> tuple[Any, ...]:
+    path, processed, chunks = item
+    vectors = None
+    if llm and processed is not None:
+        logger.info(f"Generating embeddings for {len(chunks)} chunks")
+        # One float32 matrix per document instead of a Python list of floats per chunk.
+        with attribute_to_document(processed.doc_id):
+            vectors = np.asarray(llm.embed_texts(chunks), dtype="float32")
+    return path, processed, chunks, vectors
+
+
+def write_processed(path: Path, processed: ProcessedDocument, settings: Settings) -> Path:
+    output_path = processed_output_path(path, settings)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    output_path.write_text(
+        json.dumps(
+            {
+                "doc_id": processed.doc_id,
+                "fields": processed.fields,
+                "pii_found": processed.pii_found,
+                "redacted_text": processed.redacted_text,
+            },
+            indent=2,
+        ),
+        encoding="utf-8",
+    )
+    logger.info(f"Saved processed document to {output_path}")
+    return output_path
+
+
+def embedding_items(
+    processed: ProcessedDocument, chunks: list[RedactedText], vectors: np.ndarray, shard_key: str
+) -> list[EmbeddingItem]:
+    return [
+        EmbeddingItem(doc_id=processed.doc_id, chunk_id=chunk_idx, text=chunk, vector=vector, shard_key=shard_key)
+        for chunk_idx, (chunk, vector) in enumerate(zip(chunks, vectors))
+    ]
+
+
+def document_stages(settings: Settings, llm: LlmClient | None, cpu_kind: str | None = None) -> list[Stage]:
+    """Extract, redact, chunk and embed stages; the last yields ``(path, processed, chunks, vectors)``.
+
+    ``processed`` is None for a document whose redaction did not converge; consumers skip it.
+    """""
+    # extract/redact are CPU-bound and run in worker processes; embed waits on the
+    # network and runs on threads.
+    if cpu_kind is None:
+        cpu_kind = "process" if settings.extract_workers > 0 else "thread"
+    cpu_workers = max(1, settings.extract_workers)
+    return [
+        Stage(
+            "extract",
+            partial(_extract_stage, backend_name=settings.pdf_backend, cache_dir=settings.extract_cache_dir),
+            workers=cpu_workers,
+            kind=cpu_kind,
+        ),
+        Stage("redact", _redact_stage, workers=cpu_workers, kind=cpu_kind),
+        Stage("chunk", partial(_chunk_stage, chunk_size=settings.chunk_size, chunk_overlap=settings.chunk_overlap)),
+        Stage("embed", partial(_embed_stage, llm=llm), workers=settings.embed_workers),
+    ]
+
+
+def create_llm_client(settings: Settings) -> LlmClient | None:
+    if not settings.openai_api_key:
+        logger.warning("No OpenAI API key found, skipping embeddings")
+        return None
+    logger.info("Initializing LLM client")
+    return LlmClient(
+        api_key=settings.openai_api_key,
+        model=settings.openai_model,
+        embed_model=settings.openai_embed_model,
+        base_url=settings.openai_base_url,
+        max_connections=settings.openai_max_connections,
+        timeout_s=settings.openai_timeout_s,
+        embed_dimensions=settings.embed_dimensions,
+    )
+
+
 def run_pipeline(settings: Settings) -> None:
     logger.info("Starting document processing pipeline")
     logger.info(f"Pipeline config: data_dir={settings.data_dir}, output_dir={settings.output_dir}")
     settings.output_dir.mkdir(parents=True, exist_ok=True)
     settings.faiss_dir.mkdir(parents=True, exist_ok=True)
 
+    sharded = settings.faiss_layout == "sharded"
     pdf_paths = list(settings.data_dir.glob("*.pdf"))
+    if sharded:
+        pdf_paths.extend(settings.data_dir.glob("*/*.pdf"))
+    # A fixed input order keeps chunk positions and the underwriting input stable between runs.
+    pdf_paths.sort()
     if not pdf_paths:
         logger.error(f"No PDF files found in {settings.data_dir}")
         raise FileNotFoundError(f"No PDF files found in {settings.data_dir}")
     
     logger.info(f"Found {len(pdf_paths)} PDF files to process")
+    configure_llm_concurrency(settings.openai_max_concurrency)
+    pdf_backend, _ = _stage_extractor(settings.pdf_backend, settings.extract_cache_dir)
+    logger.info(f"PDF backend: {pdf_backend.name}, extraction cache: {settings.extract_cache_dir or 'memory'}")
 
-    llm = None
-    if settings.openai_api_key:
-        logger.info("Initializing LLM client")
-        llm = LlmClient(
-            api_key=settings.openai_api_key,
-            model=settings.openai_model,
-            embed_model=settings.openai_embed_model,
-        )
-    else:
-        logger.warning("No OpenAI API key found, skipping embeddings")
+    llm = create_llm_client(settings)
+
+    usage = UsageTracker(embed_model=settings.openai_embed_model, chat_model=settings.openai_model)
+    with ExitStack() as stack:
+        stack.enter_context(track_usage(usage))
+        spool_root = None
+        if settings.streaming:
+            spool_root = Path(stack.enter_context(tempfile.TemporaryDirectory(prefix="mortgage_rag_spool_")))
+            logger.info(f"Streaming mode: spilling texts and vectors to {spool_root}")
+        _run_documents(settings, pdf_paths, llm, sharded, spool_root)
+
+    usage.log_report()
+    usage_path = settings.output_dir / "usage.json"
+    usage_path.write_text(json.dumps({**usage.report(), "metrics": usage.metrics()}, indent=2), encoding="utf-8")
+    logger.info(f"LLM usage report saved to {usage_path}")
+    logger.info("Pipeline completed successfully")
 
+
+def _run_documents(
+    settings: Settings,
+    pdf_paths: list[Path],
+    llm: LlmClient | None,
+    sharded: bool,
+    spool_root: Path | None,
+) -> None:
+    streaming = spool_root is not None
+    compression = IndexCompression(settings.index_encoding, settings.index_pca_dimensions)
     embeddings: list[EmbeddingItem] = []
-    processed_documents: list[ProcessedDocument] = []
+    index_writers: dict[str, IncrementalIndexWriter] = {}
+    # Keyed by loan in the sharded layout, so each loan is underwritten on its own documents.
+    borrower_documents: dict[str, list[dict[str, str]] | SpooledDocuments] = {}
     policy_documents: list[Document] = []
+    skipped: list[str] = []
 
-    for idx, path in enumerate(pdf_paths, start=1):
-        logger.info(f"Processing document {idx}/{len(pdf_paths)}: {path.name}")
-        processed = process_document(path)
-        processed_documents.append(processed)
-        output_path = settings.output_dir / f"{processed.doc_id}.json"
-        output_path.write_text(
-            json.dumps(
-                {
-                    "doc_id": processed.doc_id,
-                    "fields": processed.fields,
-                    "pii_found": processed.pii_found,
-                    "redacted_text": processed.redacted_text,
-                },
-                indent=2,
-            ),
-            encoding="utf-8",
-        )
-        logger.info(f"Saved processed document to {output_path}")
+    def index_stage(item: tuple[Any, ...]) -> None:
+        path, processed, chunks, vectors = item
+        if processed is None:
+            skipped.append(path.name)
+            return
+        shard_key = loan_id_for(path, settings) if sharded else ""
+        documents = borrower_documents.get(shard_key)
+        if documents is None:
+            documents = SpooledDocuments(spool_root / "documents" / shard_dirname(shard_key)) if streaming else []
+            borrower_documents[shard_key] = documents
+        documents.append({"name": f"{processed.doc_id}.pdf", "text": processed.text})
+        write_processed(path, processed, settings)
 
-        chunks = chunk_text(
-            processed.redacted_text,
-            chunk_size=settings.chunk_size,
-            chunk_overlap=settings.chunk_overlap,
-        )
-        logger.info(f"Generated {len(chunks)} chunks for {path.name}")
-
-        if llm:
-            logger.info(f"Generating embeddings for {len(chunks)} chunks")
-            vectors = llm.embed_texts(chunks)
-            for idx, (chunk, vector) in enumerate(zip(chunks, vectors)):
-                embeddings.append(
-                    EmbeddingItem(
-                        doc_id=processed.doc_id,
-                        chunk_id=idx,
-                        text=chunk,
-                        vector=vector,
+        if vectors is not None:
+            items = embedding_items(processed, chunks, vectors, shard_key or settings.default_loan_id)
+            if streaming:
+                writer = index_writers.get(shard_key)
+                if writer is None:
+                    writer = IncrementalIndexWriter(spool_root / "index" / (shard_dirname(shard_key) if sharded else "single"))
+                    index_writers[shard_key] = writer
+                writer.add(items)
+            else:
+                embeddings.extend(items)
+
+        if not streaming and not sharded:
+            from langchain_core.documents import Document
+
+            for chunk_idx, chunk in enumerate(chunks):
+                policy_documents.append(
+                    Document(
+                        page_content=chunk,
+                        metadata={"source": path.name, "chunk": chunk_idx, "redaction_ruleset": REDACTION_RULESET_VERSION},
                     )
                 )
 
-        for chunk_idx, chunk in enumerate(chunks):
-            policy_documents.append(
-                Document(page_content=chunk, metadata={"source": path.name, "chunk": chunk_idx})
-            )
+    # index mutates local state so it has one worker, and takes documents in input order
+    # so borrower_documents and the index chunks come out the same on every run.
+    staged = StagedPipeline(
+        [*document_stages(settings, llm), Stage("index", index_stage, ordered=True)],
+        queue_size=settings.stage_queue_size,
+    )
+    for _ in staged.run(pdf_paths):
+        pass
+    staged.log_report()
+    if skipped:
+        logger.warning(f"Skipped {len(skipped)} documents whose redaction did not converge: {', '.join(skipped)}")
 
-    if embeddings:
-        logger.info(f"Building FAISS index with {len(embeddings)} embeddings")
-        build_faiss_index(embeddings, settings.faiss_dir)
+    # Every build is published as a new version and made live by flipping the
+    # ``current`` pointer, so running readers never see a half-written index.
+    index_path: Path | None = None
+    if index_writers and sharded:
+        logger.info(f"Streaming {len(index_writers)} per-loan FAISS shards")
+        publish_index_version(
+            settings.faiss_dir / "shards",
+            lambda out: [
+                writer.finalize(out / shard_dirname(shard_key), compression)
+                for shard_key, writer in index_writers.items()
+            ],
+        )
+    elif index_writers:
+        version_dir = publish_index_version(settings.faiss_dir, lambda out: index_writers[""].finalize(out, compression))
+        index_path = version_dir / "index.faiss"
+    elif embeddings and sharded:
+        logger.info(f"Building per-loan FAISS shards with {len(embeddings)} embeddings")
+        publish_index_version(
+            settings.faiss_dir / "shards",
+            lambda out: build_sharded_faiss_index(embeddings, out, compression),
+        )
+    elif embeddings:
+        logger.info(f"Building FAISS index with {len(embeddings)} embeddings, encoding={compression.encoding}")
+        publish_index_version(settings.faiss_dir, lambda out: build_faiss_index(embeddings, out, compression))
         logger.info("FAISS index created successfully")
     else:
         logger.warning("No embeddings generated, skipping FAISS index creation")
 
+    policy_index = load_policy_index(settings.policy_index_dir) if settings.policy_index_dir else None
     policy_vector_store = None
-    if settings.openai_api_key and policy_documents:
-        logger.info("Building policy vector store for underwriting citations")
-        policy_embeddings = OpenAIEmbeddings(model=settings.openai_embed_model, api_key=settings.openai_api_key)
-        policy_vector_store = FAISS.from_documents(documents=policy_documents, embedding=policy_embeddings)
-
-    if processed_documents:
-        logger.info("Generating compliance-first underwriting recommendation")
-        underwriting_result = run_underwriting_workflow(
-            query="Batch underwriting assessment",
-            borrower_documents=[
-                {"name": f"{item.doc_id}.pdf", "text": item.text}
-                for item in processed_documents
-            ],
-            policy_vector_store=policy_vector_store,
-            thresholds={
-                "min_credit_score": settings.min_credit_score,
-                "max_dti": settings.max_dti,
-                "max_ltv": settings.max_ltv,
-                "min_employment_months": settings.min_employment_months,
-            },
+    if policy_index is not None:
+        logger.info("Using prebuilt policy index for underwriting citations")
+    elif streaming and llm and index_path is not None:
+        logger.info("Using streamed FAISS index for underwriting citations")
+        policy_vector_store = index_writers[""].as_vector_store(
+            index_path,
+            embed_query=lambda query: llm.embed_texts([query])[0],
+            embed_queries=llm.embed_texts,
         )
+    elif llm and policy_documents:
+        from langchain_community.vectorstores import FAISS
 
-        summary_path = settings.output_dir / "summary.txt"
-        summary_path.write_text(redact_pii(underwriting_result.summary_markdown), encoding="utf-8")
-        logger.info(f"Summary saved to {summary_path}")
+        from .langchain_embeddings import LlmClientEmbeddings
 
-        recommendation_path = settings.output_dir / "underwriting_recommendation.json"
-        recommendation_path.write_text(
-            json.dumps(_redact_structure(underwriting_result.output), indent=2), encoding="utf-8"
-        )
-        logger.info(f"Underwriting recommendation saved to {recommendation_path}")
-    
-    logger.info("Pipeline completed successfully")
+        logger.info("Building policy vector store for underwriting citations")
+        policy_vector_store = FAISS.from_documents(documents=policy_documents, embedding=LlmClientEmbeddings(llm))
+
+    thresholds = {
+        "min_credit_score": settings.min_credit_score,
+        "max_dti": settings.max_dti,
+        "max_ltv": settings.max_ltv,
+        "min_employment_months": settings.min_employment_months,
+    }
+    shard_manager = None
+    if sharded and policy_index is None and llm and (index_writers or embeddings):
+        shard_manager = ShardManager(settings.faiss_dir / "shards", max_bytes=settings.shard_cache_bytes)
+    for shard_key in sorted(borrower_documents):
+        vector_store = policy_vector_store
+        if shard_manager is not None and shard_manager.has_shard(shard_key):
+            logger.info(f"Using loan {shard_key}'s FAISS shard for underwriting citations")
+            # The shards were just built from this run's redacted chunks.
+            vector_store = ShardVectorStore(shard_manager, shard_key, llm.embed_texts, REDACTION_RULESET_VERSION)
+        output_dir = settings.output_dir / shard_key if sharded else settings.output_dir
+        _underwrite(settings, borrower_documents[shard_key], vector_store, policy_index, thresholds, output_dir)
+    if shard_manager is not None:
+        logger.info(f"Shard cache: {shard_manager.stats()}")
+        shard_manager.close()
+
+
+def _underwrite(
+    settings: Settings,
+    borrower_documents: list[dict[str, str]] | SpooledDocuments,
+    policy_vector_store: Any,
+    policy_index: Any,
+    thresholds: dict[str, float],
+    output_dir: Path,
+) -> None:
+    logger.info(f"Generating compliance-first underwriting recommendation for {len(borrower_documents)} documents")
+    underwriting_result = run_underwriting_workflow(
+        query="Batch underwriting assessment",
+        borrower_documents=borrower_documents,
+        policy_vector_store=policy_vector_store,
+        thresholds=thresholds,
+        policy_index=policy_index,
+    )
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    summary = underwriting_result.summary_markdown
+    usage = current_usage()
+    if usage is not None:
+        summary = f"{summary}\n\n{usage.summary_markdown()}"
+    summary_path = output_dir / "summary.txt"
+    summary_path.write_text(redact_pii(summary), encoding="utf-8")
+    logger.info(f"Summary saved to {summary_path}")
+
+    recommendation_path = output_dir / "underwriting_recommendation.json"
+    recommendation_path.write_text(
+        json.dumps(_redact_structure(underwriting_result.output), indent=2), encoding="utf-8"
+    )
+    logger.info(f"Underwriting recommendation saved to {recommendation_path}")
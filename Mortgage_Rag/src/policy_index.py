@@ -0,0 +1,223 @@
+"""Offline-built, memory-mapped policy index with precomputed per-rule citations.
+
+Policy guidance is static, so ``build_policy_index`` embeds the corpus once and
+writes ``index.faiss`` + ``chunks.json`` + ``citations.json`` + ``manifest.json``.
+At runtime ``PolicyIndex.load`` maps the index read-only and the underwriting
+workflow resolves citations for each rule with a dictionary lookup; only
+free-form questions fall through to a live vector search.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Iterable
+import json
+import time
+
+import numpy as np
+
+from .embedding import IndexCompression, chunk_text, new_faiss_index
+from .index_versions import resolve_index_dir
+from .logger import get_logger
+from .pii import REDACTION_RULESET_VERSION, ensure_redacted, redact_pii, restore_provenance
+
+logger = get_logger(__name__)
+
+
+INDEX_FILE = "index.faiss"
+CHUNKS_FILE = "chunks.json"
+CITATIONS_FILE = "citations.json"
+MANIFEST_FILE = "manifest.json"
+RULE_CITATION_K = 3
+EMBED_BATCH_SIZE = 256
+SNIPPET_CHARS = 280
+
+# Keyed by the rule names emitted by underwriting_agents._rules_engine_agent.
+RULE_QUERIES: dict[str, str] = {
+    "Minimum credit score": "minimum credit score requirement for mortgage eligibility",
+    "Maximum DTI": "maximum debt-to-income ratio DTI limit",
+    "Maximum LTV": "maximum loan-to-value ratio LTV limit",
+    "Employment stability": "employment history tenure stability requirement",
+    "Documentation completeness": "required documentation pay stubs bank statements tax returns ID",
+}
+
+POLICY_SUFFIXES = {".pdf", ".txt", ".md"}
+
+
+@dataclass(frozen=True)
+class PolicyChunk:
+    page_content: str
+    metadata: dict[str, Any] = field(default_factory=dict)
+
+
+def _read_policy_file(path: Path) -> str:
+    if path.suffix.lower() == ".pdf":
+        from .extract import extract_text_from_pdf
+
+        return extract_text_from_pdf(path).text
+    return path.read_text(encoding="utf-8")
+
+
+def _citation(chunk: dict[str, Any], score: float, rule: str | None = None) -> dict[str, str]:
+    snippet = chunk["text"][:SNIPPET_CHARS].replace("\n", " ").strip()
+    citation = {
+        "source": str(chunk["source"]),
+        "section": str(chunk.get("section", chunk["chunk"])),
+        "score": f"{score:.4f}",
+        "snippet": snippet,
+    }
+    if rule is not None:
+        citation["rule"] = rule
+    return citation
+
+
+def build_policy_index(
+    corpus_paths: Iterable[Path],
+    output_dir: Path,
+    embed_texts: Callable[[list[str]], list[list[float]]],
+    chunk_size: int = 800,
+    chunk_overlap: int = 120,
+    rule_queries: dict[str, str] | None = None,
+    k: int = RULE_CITATION_K,
+    compression: IndexCompression | None = None,
+) -> Path:
+    """Embed a policy corpus and write a persistent index plus per-rule citations."""
+    import faiss
+
+    rule_queries = rule_queries or RULE_QUERIES
+    chunks: list[dict[str, Any]] = []
+    for path in sorted(corpus_paths):
+        text = ensure_redacted(_read_policy_file(path))
+        for idx, chunk in enumerate(chunk_text(text, chunk_size=chunk_size, chunk_overlap=chunk_overlap)):
+            if chunk.strip():
+                chunks.append({"source": path.name, "chunk": idx, "text": chunk})
+    if not chunks:
+        raise ValueError("Policy corpus is empty")
+    logger.info(f"Embedding {len(chunks)} policy chunks")
+
+    vectors: list[list[float]] = []
+    for start in range(0, len(chunks), EMBED_BATCH_SIZE):
+        vectors.extend(embed_texts([item["text"] for item in chunks[start : start + EMBED_BATCH_SIZE]]))
+    matrix = np.asarray(vectors, dtype="float32")
+    compression = compression or IndexCompression()
+    index = new_faiss_index(matrix, compression)
+    index.add(matrix)
+
+    rule_names = list(rule_queries)
+    query_matrix = np.asarray(embed_texts([rule_queries[name] for name in rule_names]), dtype="float32")
+    distances, positions = index.search(query_matrix, min(k, len(chunks)))
+    citations = {
+        name: [
+            _citation(chunks[pos], float(score), rule=name)
+            for score, pos in zip(distances[row], positions[row])
+            if pos >= 0
+        ]
+        for row, name in enumerate(rule_names)
+    }
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    faiss.write_index(index, str(output_dir / INDEX_FILE))
+    (output_dir / CHUNKS_FILE).write_text(json.dumps(chunks), encoding="utf-8")
+    (output_dir / CITATIONS_FILE).write_text(json.dumps(citations, indent=2), encoding="utf-8")
+    manifest = {
+        "built_at": time.time(),
+        "chunks": len(chunks),
+        "dimension": int(matrix.shape[1]),
+        "encoding": compression.encoding,
+        "pca_dimensions": compression.pca_dimensions,
+        "rules": rule_names,
+        "redaction_ruleset": REDACTION_RULESET_VERSION,
+    }
+    (output_dir / MANIFEST_FILE).write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    logger.info(f"Policy index written to {output_dir}: chunks={len(chunks)}, rules={len(rule_names)}")
+    return output_dir / INDEX_FILE
+
+
+class PolicyIndex:
+    """Read-only policy index: O(1) rule citations plus live search for free-form queries."""
+
+    def __init__(
+        self,
+        index: Any,
+        chunks: list[dict[str, Any]],
+        rule_citations: dict[str, list[dict[str, str]]],
+        ruleset_version: str | None,
+        embed_query: Callable[[str], list[float]] | None = None,
+        embed_queries: Callable[[list[str]], list[list[float]]] | None = None,
+    ) -> None:
+        self._index = index
+        self._chunks = chunks
+        self._rule_citations = rule_citations
+        self._ruleset_version = ruleset_version
+        self.embed_query = embed_query
+        self.embed_queries = embed_queries
+
+    @classmethod
+    def load(
+        cls,
+        index_dir: Path,
+        embed_query: Callable[[str], list[float]] | None = None,
+        embed_queries: Callable[[list[str]], list[list[float]]] | None = None,
+    ) -> "PolicyIndex":
+        import faiss
+
+        manifest = json.loads((index_dir / MANIFEST_FILE).read_text(encoding="utf-8"))
+        index = faiss.read_index(str(index_dir / INDEX_FILE), faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+        chunks = json.loads((index_dir / CHUNKS_FILE).read_text(encoding="utf-8"))
+        rule_citations = json.loads((index_dir / CITATIONS_FILE).read_text(encoding="utf-8"))
+        ruleset_version = manifest.get("redaction_ruleset")
+        if ruleset_version != REDACTION_RULESET_VERSION:
+            # Built under an older ruleset: re-check the stored snippets once, here, not per run.
+            for citations in rule_citations.values():
+                for citation in citations:
+                    citation["snippet"] = str(redact_pii(citation["snippet"]))
+        logger.info(f"Loaded policy index from {index_dir}: chunks={len(chunks)}, rules={len(rule_citations)}")
+        return cls(index, chunks, rule_citations, ruleset_version, embed_query=embed_query, embed_queries=embed_queries)
+
+    @property
+    def rules(self) -> list[str]:
+        return list(self._rule_citations)
+
+    def citations_for(self, rule: str) -> list[dict[str, str]]:
+        return [dict(citation) for citation in self._rule_citations.get(rule, [])]
+
+    def similarity_search_with_score(self, query: str, k: int = 5) -> list[tuple[PolicyChunk, float]]:
+        return self.batch_similarity_search_with_score([query], k=k)[0]
+
+    def batch_similarity_search_with_score(self, queries: list[str], k: int = 5) -> list[list[tuple[PolicyChunk, float]]]:
+        if self.embed_queries is not None:
+            vectors = self.embed_queries(queries)
+        elif self.embed_query is not None:
+            vectors = [self.embed_query(query) for query in queries]
+        else:
+            raise RuntimeError("PolicyIndex was loaded without an embed_query function")
+        distances, positions = self._index.search(np.asarray(vectors, dtype="float32"), min(k, len(self._chunks)))
+        results: list[list[tuple[PolicyChunk, float]]] = []
+        for row in range(len(queries)):
+            hits: list[tuple[PolicyChunk, float]] = []
+            for score, pos in zip(distances[row], positions[row]):
+                if pos < 0:
+                    continue
+                chunk = self._chunks[pos]
+                metadata = {"source": chunk["source"], "chunk": chunk["chunk"], "redaction_ruleset": self._ruleset_version}
+                text = restore_provenance(chunk["text"], self._ruleset_version)
+                hits.append((PolicyChunk(page_content=text, metadata=metadata), float(score)))
+            results.append(hits)
+        return results
+
+
+def policy_corpus_paths(corpus_dir: Path) -> list[Path]:
+    return sorted(path for path in corpus_dir.rglob("*") if path.suffix.lower() in POLICY_SUFFIXES)
+
+
+def load_policy_index(
+    index_dir: Path,
+    embed_query: Callable[[str], list[float]] | None = None,
+    embed_queries: Callable[[list[str]], list[list[float]]] | None = None,
+) -> PolicyIndex | None:
+    # Accepts the root of a versioned layout (scripts/build_policy_index.py) or a plain index directory.
+    index_dir = resolve_index_dir(index_dir)
+    if not (index_dir / MANIFEST_FILE).exists():
+        logger.info(f"No prebuilt policy index at {index_dir}")
+        return None
+    return PolicyIndex.load(index_dir, embed_query=embed_query, embed_queries=embed_queries)
@@ -0,0 +1,75 @@
+"""Multi-query similarity search: one embedding call and one FAISS search for N queries.
+
+Works with the stores the underwriting workflow receives: ``PolicyIndex``,
+``SpilledVectorStore`` and ``ShardVectorStore`` (native
+``batch_similarity_search_with_score``), LangChain vector stores with an
+``Embeddings`` object (all queries embedded with one ``embed_documents`` call
+under the LLM limiter; LangChain's FAISS store is then searched once over the
+query matrix, other stores vector by vector with
+``similarity_search_with_score_by_vector``), and anything else exposing
+``similarity_search_with_score`` (searched query by query).
+"""
+from __future__ import annotations
+
+from typing import Any, Sequence
+
+from .llm import get_llm_limiter
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def _is_langchain_store(store: Any) -> bool:
+    return hasattr(store, "similarity_search_with_score_by_vector") and getattr(store, "embeddings", None) is not None
+
+
+def _is_langchain_faiss(store: Any) -> bool:
+    return all(hasattr(store, name) for name in ("index", "docstore", "index_to_docstore_id"))
+
+
+def _faiss_matrix_search(store: Any, vectors: list[list[float]], k: int) -> list[list[tuple[Any, float]]]:
+    import numpy as np
+
+    matrix = np.asarray(vectors, dtype="float32")
+    # Same preparation as FAISS.similarity_search_with_score_by_vector: the store normalises queries
+    # only when it was built with normalize_L2, and returns the index's raw scores for every
+    # distance strategy (the index itself is L2 or inner product accordingly).
+    if getattr(store, "_normalize_L2", False):
+        import faiss
+
+        faiss.normalize_L2(matrix)
+    scores, positions = store.index.search(matrix, k)
+    results: list[list[tuple[Any, float]]] = []
+    for row_scores, row_positions in zip(scores, positions):
+        hits: list[tuple[Any, float]] = []
+        for score, position in zip(row_scores, row_positions):
+            if position < 0:
+                continue
+            doc_id = store.index_to_docstore_id[int(position)]
+            doc = store.docstore.search(doc_id)
+            if isinstance(doc, str):
+                raise ValueError(f"Could not find document for id {doc_id}, got {doc}")
+            hits.append((doc, float(score)))
+        results.append(hits)
+    return results
+
+
+def _langchain_batch(store: Any, queries: Sequence[str], k: int) -> list[list[tuple[Any, float]]]:
+    # LangChain's embedder calls the provider directly, so it is held to the shared LLM budget here.
+    with get_llm_limiter():
+        vectors = store.embeddings.embed_documents(list(queries))
+    if _is_langchain_faiss(store):
+        return _faiss_matrix_search(store, vectors, k)
+    return [store.similarity_search_with_score_by_vector(vector, k=k) for vector in vectors]
+
+
+def batch_similarity_search_with_score(store: Any, queries: Sequence[str], k: int = 5) -> list[list[tuple[Any, float]]]:
+    """``similarity_search_with_score`` for every query, batched where the store allows it."""
+    if not queries:
+        return []
+    if hasattr(store, "batch_similarity_search_with_score"):
+        return store.batch_similarity_search_with_score(list(queries), k=k)
+    if _is_langchain_store(store):
+        return _langchain_batch(store, queries, k)
+    logger.debug(f"{type(store).__name__} has no batch search; running {len(queries)} searches")
+    return [store.similarity_search_with_score(query, k=k) for query in queries]
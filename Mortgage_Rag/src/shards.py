@@ -0,0 +1,221 @@
+"""Per-loan FAISS shards with a byte-budgeted LRU of memory-mapped indexes.
+
+Layout: ``<root>/<shard dir>/index.faiss`` + ``metadata.json``, one shard per
+loan, or the same under ``<root>/versions/<version>/`` when published with
+``index_versions.publish_index_version``; the manager then follows
+``current``. A search scoped to a loan opens only that loan's shard, so it
+never scans (or can leak) another borrower's chunks. ``ShardVectorStore``
+exposes one loan's shard to the underwriting workflow.
+"""
+from __future__ import annotations
+
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Iterable
+import hashlib
+import json
+import re
+import threading
+
+import numpy as np
+
+from .embedding import EmbeddingItem, IndexCompression, build_faiss_index
+from .index_versions import DEFAULT_POLL_INTERVAL_S, VersionedIndexReader
+from .logger import get_logger
+from .pii import restore_provenance
+from .policy_index import PolicyChunk
+
+logger = get_logger(__name__)
+
+
+DEFAULT_SHARD_CACHE_BYTES = 512 * 1024 * 1024
+
+
+def shard_dirname(shard_key: str) -> str:
+    """Filesystem-safe, collision-free directory name for a loan/borrower key."""
+    slug = re.sub(r"[^A-Za-z0-9_-]+", "-", shard_key).strip("-")[:48] or "shard"
+    digest = hashlib.sha256(shard_key.encode("utf-8")).hexdigest()[:10]
+    return f"{slug}-{digest}"
+
+
+def build_sharded_faiss_index(
+    embeddings: Iterable[EmbeddingItem],
+    shards_root: Path,
+    compression: IndexCompression | None = None,
+) -> dict[str, Path]:
+    groups: dict[str, list[EmbeddingItem]] = defaultdict(list)
+    for item in embeddings:
+        groups[item.shard_key].append(item)
+    if not groups:
+        raise ValueError("No embeddings provided")
+    paths: dict[str, Path] = {}
+    for shard_key, items in groups.items():
+        paths[shard_key] = build_faiss_index(items, shards_root / shard_dirname(shard_key), compression)
+    logger.info(f"Built {len(paths)} FAISS shards under {shards_root}")
+    return paths
+
+
+@dataclass(frozen=True)
+class LoadedShard:
+    shard_key: str
+    index: Any
+    metadata: list[dict[str, Any]]
+    nbytes: int
+
+
+class ShardManager:
+    """Opens shards on demand (``IO_FLAG_MMAP``) and keeps recently used ones within ``max_bytes``."""
+
+    def __init__(
+        self,
+        shards_root: Path,
+        max_bytes: int = DEFAULT_SHARD_CACHE_BYTES,
+        poll_interval_s: float = DEFAULT_POLL_INTERVAL_S,
+    ) -> None:
+        self.shards_root = shards_root
+        self.max_bytes = max_bytes
+        self.loaded_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._shards: OrderedDict[str, LoadedShard] = OrderedDict()
+        self._lock = threading.Lock()
+        self._versions = VersionedIndexReader(shards_root, load=lambda version_dir: version_dir, poll_interval_s=poll_interval_s)
+        self._version_dir = shards_root
+
+    def _current_dir(self) -> Path:
+        version_dir = self._versions.get() or self.shards_root
+        if version_dir != self._version_dir:
+            with self._lock:
+                if version_dir != self._version_dir:
+                    # Callers already holding a LoadedShard keep searching it; new lookups open the new build.
+                    self._shards.clear()
+                    self.loaded_bytes = 0
+                    self._version_dir = version_dir
+        return version_dir
+
+    def has_shard(self, shard_key: str) -> bool:
+        return (self._current_dir() / shard_dirname(shard_key) / "index.faiss").exists()
+
+    def _load(self, shard_key: str, root: Path) -> LoadedShard:
+        shard_dir = root / shard_dirname(shard_key)
+        index_path = shard_dir / "index.faiss"
+        meta_path = shard_dir / "metadata.json"
+        if not index_path.exists():
+            raise KeyError(f"No shard for '{shard_key}'")
+        import faiss
+
+        index = faiss.read_index(str(index_path), faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+        metadata = json.loads(meta_path.read_text(encoding="utf-8"))
+        nbytes = index_path.stat().st_size + meta_path.stat().st_size
+        return LoadedShard(shard_key=shard_key, index=index, metadata=metadata, nbytes=nbytes)
+
+    def get(self, shard_key: str) -> LoadedShard:
+        root = self._current_dir()
+        with self._lock:
+            shard = self._shards.get(shard_key)
+            if shard is not None:
+                self._shards.move_to_end(shard_key)
+                self.hits += 1
+                return shard
+        loaded = self._load(shard_key, root)
+        with self._lock:
+            shard = self._shards.get(shard_key)
+            if shard is not None:
+                self.hits += 1
+                return shard
+            if root != self._version_dir:
+                # A newer version was published while this shard was loading; serve it uncached.
+                return loaded
+            self.misses += 1
+            self._shards[shard_key] = loaded
+            self.loaded_bytes += loaded.nbytes
+            # Never evict the shard being returned, even if it alone exceeds the budget.
+            while self.loaded_bytes > self.max_bytes and len(self._shards) > 1:
+                _, evicted = self._shards.popitem(last=False)
+                self.loaded_bytes -= evicted.nbytes
+                self.evictions += 1
+                logger.debug(f"Evicted shard {evicted.shard_key} ({evicted.nbytes} bytes)")
+            return loaded
+
+    def invalidate(self, shard_key: str) -> None:
+        with self._lock:
+            shard = self._shards.pop(shard_key, None)
+            if shard is not None:
+                self.loaded_bytes -= shard.nbytes
+
+    def search(self, shard_key: str, query_vector: Any, k: int = 5) -> list[tuple[dict[str, Any], float]]:
+        return self.batch_search(shard_key, [query_vector], k=k)[0]
+
+    def batch_search(self, shard_key: str, query_vectors: Any, k: int = 5) -> list[list[tuple[dict[str, Any], float]]]:
+        shard = self.get(shard_key)
+        queries = np.asarray(query_vectors, dtype="float32").reshape(len(query_vectors), -1)
+        distances, positions = shard.index.search(queries, min(k, shard.index.ntotal))
+        return [
+            [(shard.metadata[pos], float(score)) for score, pos in zip(distances[row], positions[row]) if pos >= 0]
+            for row in range(len(queries))
+        ]
+
+    def close(self) -> None:
+        """Release this manager's reader lease on the current version."""
+        self._versions.close()
+        with self._lock:
+            self._shards.clear()
+            self.loaded_bytes = 0
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "loaded_shards": len(self._shards),
+                "loaded_bytes": self.loaded_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+class ShardVectorStore:
+    """``similarity_search_with_score`` over one loan's shard, for that loan's underwriting run.
+
+    ``ruleset_version`` is the redaction ruleset the shard's chunks were written
+    under, when the caller knows it (e.g. it built them); ``None`` leaves them
+    to be re-checked downstream.
+    """
+
+    def __init__(
+        self,
+        manager: ShardManager,
+        shard_key: str,
+        embed_queries: Callable[[list[str]], list[list[float]]],
+        ruleset_version: str | None = None,
+    ) -> None:
+        self.manager = manager
+        self.shard_key = shard_key
+        self._embed_queries = embed_queries
+        self._ruleset_version = ruleset_version
+
+    def similarity_search_with_score(self, query: str, k: int = 5) -> list[tuple[PolicyChunk, float]]:
+        return self.batch_similarity_search_with_score([query], k=k)[0]
+
+    def batch_similarity_search_with_score(
+        self, queries: list[str], k: int = 5
+    ) -> list[list[tuple[PolicyChunk, float]]]:
+        results = self.manager.batch_search(self.shard_key, self._embed_queries(list(queries)), k=k)
+        return [
+            [
+                (
+                    PolicyChunk(
+                        page_content=restore_provenance(record["text"], self._ruleset_version),
+                        metadata={
+                            "source": f"{record['doc_id']}.pdf",
+                            "chunk": record["chunk_id"],
+                            "redaction_ruleset": self._ruleset_version,
+                        },
+                    ),
+                    score,
+                )
+                for record, score in hits
+            ]
+            for hits in results
+        ]
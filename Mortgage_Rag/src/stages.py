@@ -0,0 +1,254 @@
+"""Bounded-queue stage runner used to overlap CPU and network work in the pipeline.
+
+Each ``Stage`` reads from a bounded input queue and writes to the next stage's
+queue, so a slow stage applies backpressure upstream instead of letting work
+pile up in memory. ``kind="process"`` stages run ``fn`` in a process pool (for
+CPU-bound parsing and regex work); ``kind="thread"`` stages run it on threads
+(for network calls that release the GIL). End-to-end time then tracks the
+slowest stage rather than the sum of all stages.
+
+Every item carries its input sequence number through the stages, so an
+``ordered`` stage (or ``run(..., ordered=True)``) can restore source order
+after parallel workers have finished items out of order.
+"""
+from __future__ import annotations
+
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterable, Iterator, Sequence
+import multiprocessing
+import queue
+import threading
+import time
+
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+
+DEFAULT_QUEUE_SIZE = 8
+_POLL_S = 0.1
+_DONE = object()
+
+
+@dataclass(frozen=True)
+class Stage:
+    name: str
+    fn: Callable[[Any], Any]
+    workers: int = 1
+    kind: str = "thread"
+    initializer: Callable[..., None] | None = None
+    initargs: tuple[Any, ...] = ()
+    # Receive items in source order; needs a single worker.
+    ordered: bool = False
+
+
+@dataclass
+class StageMetrics:
+    name: str
+    kind: str
+    workers: int
+    items: int = 0
+    busy_s: float = 0.0
+    max_queue_depth: int = 0
+    _depth_total: int = field(default=0, repr=False)
+    _depth_samples: int = field(default=0, repr=False)
+
+    def sample_depth(self, depth: int) -> None:
+        self.max_queue_depth = max(self.max_queue_depth, depth)
+        self._depth_total += depth
+        self._depth_samples += 1
+
+    @property
+    def mean_queue_depth(self) -> float:
+        return self._depth_total / self._depth_samples if self._depth_samples else 0.0
+
+    def utilisation(self, wall_s: float) -> float:
+        capacity = wall_s * self.workers
+        return min(self.busy_s / capacity, 1.0) if capacity > 0 else 0.0
+
+
+class _Failure:
+    def __init__(self, stage: str, error: BaseException) -> None:
+        self.stage = stage
+        self.error = error
+
+
+class _Reorder:
+    """Buffers ``(seq, item)`` pairs and releases them in sequence order."""
+
+    def __init__(self) -> None:
+        self._pending: dict[int, Any] = {}
+        self._next = 0
+
+    def push(self, seq: int, item: Any) -> list[tuple[int, Any]]:
+        self._pending[seq] = item
+        ready = []
+        while self._next in self._pending:
+            ready.append((self._next, self._pending.pop(self._next)))
+            self._next += 1
+        return ready
+
+
+class StagedPipeline:
+    """Runs ``items`` through ``stages`` and yields the last stage's outputs.
+
+    Output order follows completion order unless ``run`` is called with
+    ``ordered=True`` or the last stage is ordered. An exception in any stage is
+    re-raised from the iterator; closing the iterator early stops all workers.
+    """
+
+    def __init__(self, stages: Sequence[Stage], queue_size: int = DEFAULT_QUEUE_SIZE) -> None:
+        if not stages:
+            raise ValueError("At least one stage is required")
+        for stage in stages:
+            if stage.ordered and stage.workers > 1:
+                raise ValueError(f"Ordered stage '{stage.name}' must have a single worker")
+        self.stages = list(stages)
+        self.queue_size = max(1, queue_size)
+        self.metrics = [StageMetrics(stage.name, stage.kind, max(1, stage.workers)) for stage in self.stages]
+        self.wall_s = 0.0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def _put(self, target: queue.Queue, item: Any) -> bool:
+        while not self._stop.is_set():
+            try:
+                target.put(item, timeout=_POLL_S)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, source: queue.Queue) -> Any:
+        while not self._stop.is_set():
+            try:
+                return source.get(timeout=_POLL_S)
+            except queue.Empty:
+                continue
+        return _DONE
+
+    def _feed(self, items: Iterable[Any], target: queue.Queue) -> None:
+        seq = 0
+        try:
+            for item in items:
+                if not self._put(target, (seq, item)):
+                    return
+                seq += 1
+        except BaseException as exc:  # surface errors from a lazy source iterable
+            self._put(target, (seq, _Failure("source", exc)))
+        self._put(target, _DONE)
+
+    def _work(
+        self,
+        index: int,
+        executor: Executor | None,
+        source: queue.Queue,
+        target: queue.Queue,
+        remaining: list[int],
+    ) -> None:
+        stage = self.stages[index]
+        metrics = self.metrics[index]
+        reorder = _Reorder() if stage.ordered else None
+        while True:
+            depth = source.qsize()
+            entry = self._get(source)
+            if entry is _DONE:
+                # Let sibling workers see the sentinel; the last one out forwards it.
+                self._put(source, _DONE)
+                with self._lock:
+                    remaining[index] -= 1
+                    last = remaining[index] == 0
+                if last:
+                    self._put(target, _DONE)
+                return
+            for seq, item in reorder.push(*entry) if reorder else [entry]:
+                if isinstance(item, _Failure):
+                    result = item
+                else:
+                    started = time.perf_counter()
+                    try:
+                        result = executor.submit(stage.fn, item).result() if executor else stage.fn(item)
+                    except BaseException as exc:
+                        result = _Failure(stage.name, exc)
+                    elapsed = time.perf_counter() - started
+                    with self._lock:
+                        metrics.items += 1
+                        metrics.busy_s += elapsed
+                        metrics.sample_depth(depth)
+                if not self._put(target, (seq, result)):
+                    return
+
+    def run(self, items: Iterable[Any], ordered: bool = False) -> Iterator[Any]:
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in range(len(self.stages) + 1)]
+        remaining = [max(1, stage.workers) for stage in self.stages]
+        executors: list[Executor] = []
+        threads = [threading.Thread(target=self._feed, args=(items, queues[0]), name="stage-source", daemon=True)]
+        for index, stage in enumerate(self.stages):
+            executor = None
+            if stage.kind == "process":
+                # Workers start lazily while stage threads are already running, and forking a
+                # threaded process can hand the child a held lock; spawn avoids that.
+                executor = ProcessPoolExecutor(
+                    max_workers=remaining[index],
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=stage.initializer,
+                    initargs=stage.initargs,
+                )
+                executors.append(executor)
+            elif stage.kind != "thread":
+                raise ValueError(f"Unknown stage kind '{stage.kind}'")
+            for worker in range(remaining[index]):
+                threads.append(
+                    threading.Thread(
+                        target=self._work,
+                        args=(index, executor, queues[index], queues[index + 1], remaining),
+                        name=f"stage-{stage.name}-{worker}",
+                        daemon=True,
+                    )
+                )
+
+        reorder = _Reorder() if ordered else None
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        try:
+            while True:
+                entry = self._get(queues[-1])
+                if entry is _DONE:
+                    break
+                for _, item in reorder.push(*entry) if reorder else [entry]:
+                    if isinstance(item, _Failure):
+                        raise RuntimeError(f"Pipeline stage '{item.stage}' failed: {item.error}") from item.error
+                    yield item
+        finally:
+            self._stop.set()
+            for thread in threads:
+                thread.join()
+            for executor in executors:
+                executor.shutdown(wait=True, cancel_futures=True)
+            self.wall_s = time.perf_counter() - started
+
+    def report(self) -> list[dict[str, Any]]:
+        return [
+            {
+                "stage": metrics.name,
+                "kind": metrics.kind,
+                "workers": metrics.workers,
+                "items": metrics.items,
+                "busy_s": round(metrics.busy_s, 3),
+                "utilisation": round(metrics.utilisation(self.wall_s), 3),
+                "mean_queue_depth": round(metrics.mean_queue_depth, 2),
+                "max_queue_depth": metrics.max_queue_depth,
+            }
+            for metrics in self.metrics
+        ]
+
+    def log_report(self) -> None:
+        logger.info(f"Staged pipeline finished in {self.wall_s:.2f}s")
+        for row in self.report():
+            logger.info(
+                f"Stage {row['stage']} ({row['kind']} x{row['workers']}): items={row['items']}, "
+                f"busy={row['busy_s']}s, utilisation={row['utilisation']:.0%}, "
+                f"queue depth mean={row['mean_queue_depth']} max={row['max_queue_depth']}"
+            )
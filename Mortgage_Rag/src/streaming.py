@@ -0,0 +1,214 @@
+"""Disk-spilling building blocks for the bounded-memory pipeline mode.
+
+``IncrementalIndexWriter`` appends float32 vectors and chunk metadata to spool
+files as documents are embedded, then streams them into ``index.faiss`` and
+``metadata.json`` without materialising the corpus in memory.
+``SpooledDocuments`` keeps raw document text on disk until the underwriting
+workflow iterates it. ``SpilledVectorStore`` searches the finished index
+memory-mapped and reads chunk text back by file offset.
+"""
+from __future__ import annotations
+
+from array import array
+from pathlib import Path
+from typing import Any, Callable, Iterator, Sequence
+import json
+import shutil
+import struct
+
+import numpy as np
+
+from .embedding import ADD_BATCH_ROWS, EmbeddingItem, IndexCompression, new_faiss_index
+from .logger import get_logger
+from .pii import REDACTION_RULESET_VERSION, is_verified_redacted, restore_provenance
+from .policy_index import PolicyChunk
+
+logger = get_logger(__name__)
+
+
+_FLAT_HEADER_BYTES = 37
+_COPY_BUFFER_BYTES = 8 * 1024 * 1024
+_TRAIN_SAMPLE_ROWS = 65536
+
+
+def _flat_l2_header(dimension: int, ntotal: int) -> bytes | None:
+    """IndexFlatL2 file header for ``ntotal`` vectors, taken from a one-vector template.
+
+    Returns None if this faiss build serialises flat indexes differently, in which
+    case the caller falls back to an in-memory ``faiss.write_index``.
+    """
+    import faiss
+
+    template_index = faiss.IndexFlatL2(dimension)
+    template_index.add(np.zeros((1, dimension), dtype="float32"))
+    template = faiss.serialize_index(template_index).tobytes()
+    expected_length = _FLAT_HEADER_BYTES + 8 + 4 * dimension
+    if (
+        len(template) != expected_length
+        or struct.unpack_from("<q", template, 8)[0] != 1
+        or struct.unpack_from("<Q", template, _FLAT_HEADER_BYTES)[0] != dimension
+    ):
+        return None
+    header = bytearray(template[:_FLAT_HEADER_BYTES])
+    struct.pack_into("<q", header, 8, ntotal)
+    return bytes(header) + struct.pack("<Q", ntotal * dimension)
+
+
+class IncrementalIndexWriter:
+    """Append-only FAISS index builder whose memory use does not grow with the corpus."""
+
+    def __init__(self, spool_dir: Path) -> None:
+        spool_dir.mkdir(parents=True, exist_ok=True)
+        self.spool_dir = spool_dir
+        self.dimension: int | None = None
+        self.ntotal = 0
+        self._vectors_path = spool_dir / "vectors.f32"
+        self._metadata_path = spool_dir / "metadata.jsonl"
+        self._vectors = self._vectors_path.open("wb")
+        self._metadata = self._metadata_path.open("wb")
+        self._offsets = array("q")
+        self.all_verified = True
+
+    def add(self, items: Sequence[EmbeddingItem]) -> None:
+        if not items:
+            return
+        matrix = np.asarray([item.vector for item in items], dtype="float32")
+        if self.dimension is None:
+            self.dimension = int(matrix.shape[1])
+        elif matrix.shape[1] != self.dimension:
+            raise ValueError(f"Embedding dimension {matrix.shape[1]} does not match index dimension {self.dimension}")
+        self._vectors.write(matrix.tobytes())
+        for item in items:
+            self.all_verified = self.all_verified and is_verified_redacted(item.text)
+            self._offsets.append(self._metadata.tell())
+            record = {"doc_id": item.doc_id, "chunk_id": item.chunk_id, "text": item.text}
+            self._metadata.write(json.dumps(record).encode("utf-8") + b"\n")
+        self.ntotal += len(items)
+
+    def read_metadata(self, position: int) -> dict[str, Any]:
+        with self._metadata_path.open("rb") as handle:
+            handle.seek(self._offsets[position])
+            return json.loads(handle.readline())
+
+    def _write_compressed_index(self, index_path: Path, compression: IndexCompression) -> None:
+        import faiss
+
+        vectors = np.memmap(self._vectors_path, dtype="float32", mode="r", shape=(self.ntotal, self.dimension))
+        # Train PCA/quantizer ranges on rows spread across the whole spool, not just the first documents.
+        sample = np.unique(np.linspace(0, self.ntotal - 1, min(self.ntotal, _TRAIN_SAMPLE_ROWS)).astype("int64"))
+        index = new_faiss_index(np.asarray(vectors[sample]), compression)
+        for start in range(0, self.ntotal, ADD_BATCH_ROWS):
+            index.add(np.asarray(vectors[start : start + ADD_BATCH_ROWS]))
+        faiss.write_index(index, str(index_path))
+
+    def _write_index(self, index_path: Path, compression: IndexCompression | None = None) -> None:
+        if compression is not None and not compression.is_flat:
+            self._write_compressed_index(index_path, compression)
+            return
+        header = _flat_l2_header(self.dimension, self.ntotal)
+        if header is None:
+            import faiss
+
+            logger.warning("Unrecognised faiss flat-index layout; building index in memory")
+            matrix = np.fromfile(self._vectors_path, dtype="float32").reshape(self.ntotal, self.dimension)
+            index = faiss.IndexFlatL2(self.dimension)
+            index.add(matrix)
+            faiss.write_index(index, str(index_path))
+            return
+        with index_path.open("wb") as out, self._vectors_path.open("rb") as vectors:
+            out.write(header)
+            shutil.copyfileobj(vectors, out, _COPY_BUFFER_BYTES)
+
+    def _write_metadata(self, meta_path: Path) -> None:
+        # Same JSON array build_faiss_index writes, emitted one record at a time.
+        with meta_path.open("w", encoding="utf-8") as out, self._metadata_path.open("r", encoding="utf-8") as lines:
+            out.write("[")
+            for idx, line in enumerate(lines):
+                out.write(",\n  " if idx else "\n  ")
+                out.write(json.dumps(json.loads(line)))
+            out.write("\n]" if self.ntotal else "]")
+
+    def finalize(self, output_dir: Path, compression: IndexCompression | None = None) -> Path:
+        if not self.ntotal:
+            raise ValueError("No embeddings provided")
+        self._vectors.close()
+        self._metadata.close()
+        output_dir.mkdir(parents=True, exist_ok=True)
+        index_path = output_dir / "index.faiss"
+        self._write_index(index_path, compression)
+        self._write_metadata(output_dir / "metadata.json")
+        logger.info(f"Streamed FAISS index to {index_path}: vectors={self.ntotal}, dimension={self.dimension}")
+        return index_path
+
+    def as_vector_store(
+        self,
+        index_path: Path,
+        embed_query: Callable[[str], list[float]],
+        embed_queries: Callable[[list[str]], list[list[float]]] | None = None,
+    ) -> "SpilledVectorStore":
+        return SpilledVectorStore(index_path, self, embed_query, embed_queries)
+
+
+class SpilledVectorStore:
+    """``similarity_search_with_score`` over a memory-mapped index with chunk text read on demand."""
+
+    def __init__(
+        self,
+        index_path: Path,
+        writer: IncrementalIndexWriter,
+        embed_query: Callable[[str], list[float]],
+        embed_queries: Callable[[list[str]], list[list[float]]] | None = None,
+    ) -> None:
+        import faiss
+
+        self._index = faiss.read_index(str(index_path), faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+        self._writer = writer
+        self._embed_query = embed_query
+        self._embed_queries = embed_queries
+        self._ruleset_version = REDACTION_RULESET_VERSION if writer.all_verified else None
+
+    def similarity_search_with_score(self, query: str, k: int = 5) -> list[tuple[PolicyChunk, float]]:
+        return self.batch_similarity_search_with_score([query], k=k)[0]
+
+    def batch_similarity_search_with_score(self, queries: list[str], k: int = 5) -> list[list[tuple[PolicyChunk, float]]]:
+        if self._embed_queries is not None:
+            vectors = self._embed_queries(queries)
+        else:
+            vectors = [self._embed_query(query) for query in queries]
+        distances, positions = self._index.search(np.asarray(vectors, dtype="float32"), min(k, self._index.ntotal))
+        results: list[list[tuple[PolicyChunk, float]]] = []
+        for row in range(len(queries)):
+            hits: list[tuple[PolicyChunk, float]] = []
+            for score, pos in zip(distances[row], positions[row]):
+                if pos < 0:
+                    continue
+                record = self._writer.read_metadata(int(pos))
+                metadata = {
+                    "source": f"{record['doc_id']}.pdf",
+                    "chunk": record["chunk_id"],
+                    "redaction_ruleset": self._ruleset_version,
+                }
+                text = restore_provenance(record["text"], self._ruleset_version)
+                hits.append((PolicyChunk(page_content=text, metadata=metadata), float(score)))
+            results.append(hits)
+        return results
+
+
+class SpooledDocuments:
+    """Borrower documents kept on disk and re-read lazily each time they are iterated."""
+
+    def __init__(self, spool_dir: Path) -> None:
+        spool_dir.mkdir(parents=True, exist_ok=True)
+        self.spool_dir = spool_dir
+        self._names: list[str] = []
+
+    def append(self, document: dict[str, str]) -> None:
+        (self.spool_dir / f"{len(self._names)}.txt").write_text(document["text"], encoding="utf-8")
+        self._names.append(document["name"])
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def __iter__(self) -> Iterator[dict[str, str]]:
+        for idx, name in enumerate(self._names):
+            yield {"name": name, "text": (self.spool_dir / f"{idx}.txt").read_text(encoding="utf-8")}
@@ -2,13 +2,18 @@ from __future__ import annotations
 
 from collections import Counter
 from dataclasses import dataclass
-from typing import Any, TypedDict
+from functools import lru_cache
+from typing import Any, Iterable, TypedDict
+import hashlib
 import re
 
-from langgraph.graph import END, StateGraph
-
+from .doc_classifier import classify_document
 from .extract import extract_fields
 from .guardrails import apply_output_guardrails
+from .pii import RedactedText, restore_provenance
+from .policy_index import RULE_CITATION_K, RULE_QUERIES
+from .retrieval import batch_similarity_search_with_score
+from .usage import current_usage
 from .logger import get_logger
 
 logger = get_logger(__name__)
@@ -23,6 +28,9 @@ REQUIRED_DOCUMENT_TYPES = {
 }
 
 
+QUERY_CITATION_K = 5
+
+
 DEFAULT_THRESHOLDS = {
     "min_credit_score": 620.0,
     "max_dti": 43.0,
@@ -33,8 +41,9 @@ DEFAULT_THRESHOLDS = {
 
 class UnderwritingState(TypedDict, total=False):
     query: str
-    borrower_documents: list[dict[str, Any]]
+    borrower_documents: Iterable[dict[str, Any]]
     policy_vector_store: Any
+    policy_index: Any
     thresholds: dict[str, float]
     extracted_documents: list[dict[str, Any]]
     missing_items: list[str]
@@ -50,6 +59,19 @@ class UnderwritingState(TypedDict, total=False):
     output: dict[str, Any]
 
 
+# Produced by the document analysis, income/risk and rules engine agents. None of
+# them read the query or policy state, so they can be computed once per document set.
+ASSESSMENT_STATE_KEYS = (
+    "extracted_documents",
+    "missing_items",
+    "document_quality_flags",
+    "profile",
+    "inconsistencies",
+    "hard_rule_results",
+    "soft_rule_results",
+)
+
+
 @dataclass(frozen=True)
 class UnderwritingResult:
     recommendation: str
@@ -57,6 +79,13 @@ class UnderwritingResult:
     output: dict[str, Any]
 
 
+@dataclass(frozen=True)
+class UnderwritingAssessment:
+    """Query-independent part of the workflow state for one document set and threshold set."""
+
+    state: dict[str, Any]
+
+
 def _parse_money(value: Any) -> float | None:
     if value is None:
         return None
@@ -76,21 +105,6 @@ def _parse_number(value: Any) -> float | None:
     return _parse_money(value)
 
 
-def _infer_document_type(name: str, text: str) -> str:
-    content = f"{name} {text[:1000]}".lower()
-    if any(token in content for token in ["paystub", "pay stub", "gross pay", "net pay"]):
-        return "pay_stub"
-    if any(token in content for token in ["bank statement", "statement period", "available balance"]):
-        return "bank_statement"
-    if any(token in content for token in ["w-2", "1099", "1040", "tax return", "wages, tips"]):
-        return "tax_return"
-    if any(token in content for token in ["employment letter", "verification of employment", "employer"]):
-        return "employment_letter"
-    if any(token in content for token in ["driver", "passport", "id", "identification", "kyc"]):
-        return "id_document"
-    return "unknown"
-
-
 def _augment_fields(text: str, fields: dict[str, str]) -> dict[str, str]:
     augmented = dict(fields)
     patterns: dict[str, re.Pattern[str]] = {
@@ -122,7 +136,8 @@ def _document_analysis_agent(state: UnderwritingState) -> dict[str, Any]:
     for item in borrower_documents:
         name = str(item.get("name", "unknown.pdf"))
         text = str(item.get("text", ""))
-        doc_type = _infer_document_type(name, text)
+        classification = classify_document(name, text)
+        doc_type = classification.document_type
         seen_types[doc_type] += 1
 
         if len(text.strip()) < 150:
@@ -135,6 +150,7 @@ def _document_analysis_agent(state: UnderwritingState) -> dict[str, Any]:
             {
                 "name": name,
                 "document_type": doc_type,
+                "document_type_confidence": classification.confidence,
                 "fields": extracted,
             }
         )
@@ -257,46 +273,101 @@ def _income_risk_analysis_agent(state: UnderwritingState) -> dict[str, Any]:
     }
 
 
-def _policy_retrieval_agent(state: UnderwritingState) -> dict[str, Any]:
-    logger.info("Policy Retrieval Agent started")
-    query = state.get("query", "")
-    vector_store = state.get("policy_vector_store")
+def _policy_subqueries(state: UnderwritingState, covered_rules: set[str]) -> list[tuple[str | None, str]]:
+    """The user's query plus one focused query per evaluated rule not already cited by the policy index."""
+    queries: list[tuple[str | None, str]] = [(None, state.get("query") or "mortgage underwriting policy")]
+    for rule, rule_query in RULE_QUERIES.items():
+        if rule in covered_rules:
+            continue
+        if rule == "Documentation completeness":
+            missing_items = state.get("missing_items", [])
+            if not missing_items:
+                continue
+            rule_query = f"{rule_query}: {', '.join(missing_items)}"
+        queries.append((rule, rule_query))
+    return queries
+
+
+def _live_policy_citations(
+    vector_store: Any,
+    queries: list[tuple[str | None, str]],
+) -> tuple[list[dict[str, str]], str | None]:
     citations: list[dict[str, str]] = []
     uncertainty: str | None = None
-
-    if vector_store is None:
-        uncertainty = "Policy retrieval unavailable; refer for manual policy verification"
-        logger.warning("No policy vector store provided")
-        return {"policy_citations": citations, "policy_uncertainty": uncertainty}
-
     try:
-        retrieved = vector_store.similarity_search_with_score(query or "mortgage underwriting policy", k=5)
-        docs = [doc for doc, _ in retrieved]
-        texts = [doc.page_content for doc in docs]
+        batches = batch_similarity_search_with_score(vector_store, [text for _, text in queries], k=QUERY_CITATION_K)
+
+        # A chunk is cited at most once per rule (and once for the user's query), so every
+        # rule keeps its own supporting passages even when they overlap with another rule's.
+        best: dict[tuple[str, str, str | None], tuple[float, int, str | None, Any]] = {}
+        for order, ((rule, _), retrieved) in enumerate(zip(queries, batches)):
+            for doc, score in retrieved[: QUERY_CITATION_K if rule is None else RULE_CITATION_K]:
+                key = (
+                    str(doc.metadata.get("source", "Unknown policy source")),
+                    str(doc.metadata.get("section", doc.metadata.get("chunk", "N/A"))),
+                    rule,
+                )
+                if key not in best or float(score) < best[key][0]:
+                    best[key] = (float(score), order, rule, doc)
+        ranked = sorted(best.items(), key=lambda item: (item[1][1], item[1][0]))
+
+        texts = [
+            restore_provenance(doc.page_content, doc.metadata.get("redaction_ruleset"))
+            for _, (_, _, _, doc) in ranked
+        ]
         sanitized_texts, validation = apply_output_guardrails(texts)
 
         if not validation.passed:
             uncertainty = "Policy retrieval validation failed; manual review required"
             logger.warning("Policy retrieval output guardrail failed: %s", validation.reason)
 
-        for (doc, score), sanitized_text in zip(retrieved, sanitized_texts):
-            source = str(doc.metadata.get("source", "Unknown policy source"))
-            section = str(doc.metadata.get("section", doc.metadata.get("chunk", "N/A")))
+        for ((source, section, _), (score, _, rule, _)), sanitized_text in zip(ranked, sanitized_texts):
             snippet = sanitized_text[:280].replace("\n", " ").strip()
-            citations.append(
-                {
-                    "source": source,
-                    "section": section,
-                    "score": f"{score:.4f}",
-                    "snippet": snippet,
-                }
-            )
-
-        if not citations:
-            uncertainty = "No policy citations retrieved; refer for human underwriter review"
+            if isinstance(sanitized_text, RedactedText):
+                snippet = sanitized_text.derive(snippet)
+            citation = {
+                "source": source,
+                "section": section,
+                "score": f"{score:.4f}",
+                "snippet": snippet,
+            }
+            if rule is not None:
+                citation["rule"] = rule
+            citations.append(citation)
     except Exception as exc:
         logger.error("Policy retrieval failed: %s", exc, exc_info=True)
         uncertainty = "Policy retrieval error; refer for manual policy verification"
+    return citations, uncertainty
+
+
+def _policy_retrieval_agent(state: UnderwritingState) -> dict[str, Any]:
+    logger.info("Policy Retrieval Agent started")
+    vector_store = state.get("policy_vector_store")
+    policy_index = state.get("policy_index")
+    citations: list[dict[str, str]] = []
+    uncertainty: str | None = None
+
+    if vector_store is None and policy_index is None:
+        uncertainty = "Policy retrieval unavailable; refer for manual policy verification"
+        logger.warning("No policy vector store provided")
+        return {"policy_citations": citations, "policy_uncertainty": uncertainty}
+
+    covered_rules: set[str] = set()
+    if policy_index is not None:
+        # Rule citations are precomputed offline; no embedding or search needed here.
+        for rule in policy_index.rules:
+            citations.extend(policy_index.citations_for(rule))
+        covered_rules = set(policy_index.rules)
+        usage = current_usage()
+        if usage is not None:
+            usage.record_avoided("embedding", [RULE_QUERIES[rule] for rule in policy_index.rules if rule in RULE_QUERIES])
+
+    if vector_store is not None:
+        live_citations, uncertainty = _live_policy_citations(vector_store, _policy_subqueries(state, covered_rules))
+        citations.extend(live_citations)
+
+    if not citations and uncertainty is None:
+        uncertainty = "No policy citations retrieved; refer for human underwriter review"
 
     logger.info("Policy Retrieval Agent completed: citations=%s", len(citations))
     return {
@@ -442,8 +513,20 @@ def _recommendation_agent(state: UnderwritingState) -> dict[str, Any]:
     }
 
 
-def _build_graph():
+@lru_cache(maxsize=2)
+def _build_graph(assessed: bool = False):
+    """Full five-agent graph, or only policy retrieval -> recommendation when ``assessed``."""
+    from langgraph.graph import END, StateGraph
+
     workflow = StateGraph(UnderwritingState)
+    if assessed:
+        workflow.add_node("policy_retrieval", _policy_retrieval_agent)
+        workflow.add_node("recommendation", _recommendation_agent)
+        workflow.set_entry_point("policy_retrieval")
+        workflow.add_edge("policy_retrieval", "recommendation")
+        workflow.add_edge("recommendation", END)
+        return workflow.compile()
+
     workflow.add_node("document_analysis", _document_analysis_agent)
     workflow.add_node("income_risk_analysis", _income_risk_analysis_agent)
     workflow.add_node("policy_retrieval", _policy_retrieval_agent)
@@ -459,20 +542,53 @@ def _build_graph():
     return workflow.compile()
 
 
+def document_set_key(borrower_documents: Iterable[dict[str, Any]]) -> str:
+    """Content hash of an ordered document set (order matters: later documents override profile fields)."""
+    digest = hashlib.sha256()
+    for item in borrower_documents:
+        digest.update(str(item.get("name", "")).encode("utf-8") + b"\0")
+        digest.update(hashlib.sha256(str(item.get("text", "")).encode("utf-8")).digest())
+    return digest.hexdigest()
+
+
+def assess_borrower_documents(
+    borrower_documents: Iterable[dict[str, Any]],
+    thresholds: dict[str, float] | None = None,
+) -> UnderwritingAssessment:
+    logger.info("Assessing borrower documents")
+    state: UnderwritingState = {
+        "borrower_documents": borrower_documents,
+        "thresholds": thresholds or DEFAULT_THRESHOLDS,
+    }
+    for agent in (_document_analysis_agent, _income_risk_analysis_agent, _rules_engine_agent):
+        state.update(agent(state))
+    return UnderwritingAssessment(state={key: state[key] for key in ASSESSMENT_STATE_KEYS})
+
+
 def run_underwriting_workflow(
     query: str,
-    borrower_documents: list[dict[str, Any]],
+    borrower_documents: Iterable[dict[str, Any]],
     policy_vector_store: Any,
     thresholds: dict[str, float] | None = None,
+    policy_index: Any = None,
+    assessment: UnderwritingAssessment | None = None,
 ) -> UnderwritingResult:
-    logger.info("Running underwriting workflow")
-    graph = _build_graph()
+    """Run the underwriting agents; with ``assessment`` only policy retrieval and recommendation run.
+
+    The assessment must come from ``assess_borrower_documents`` for the same
+    documents and thresholds; callers key their cache on both.
+    """
+    logger.info("Running underwriting workflow (precomputed assessment: %s)", assessment is not None)
+    graph = _build_graph(assessed=assessment is not None)
     state: UnderwritingState = {
         "query": query,
         "borrower_documents": borrower_documents,
         "policy_vector_store": policy_vector_store,
+        "policy_index": policy_index,
         "thresholds": thresholds or DEFAULT_THRESHOLDS,
     }
+    if assessment is not None:
+        state.update(assessment.state)
     result_state = graph.invoke(state)
     output = result_state["output"]
 
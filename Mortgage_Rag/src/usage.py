@@ -0,0 +1,291 @@
+"""Token, call and estimated spend accounting for embedding and chat calls.
+
+``LlmClient`` records every call into the active ``UsageTracker`` (see
+``track_usage``): texts per call, tokens counted locally before sending, the
+tokens the API reports back, and estimated cost per model. Callers that skip
+a call (a cache hit, a precomputed citation) record what they avoided, so the
+report shows savings as well as spend. ``with tracker.document(doc_id):``
+attributes calls made on the current thread to one document.
+"""
+from __future__ import annotations
+
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Iterator, Sequence
+import math
+import threading
+
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+
+# USD per 1M tokens as (input, output); update alongside the provider's price list.
+MODEL_PRICES_USD_PER_1M: dict[str, tuple[float, float]] = {
+    "text-embedding-3-small": (0.02, 0.0),
+    "text-embedding-3-large": (0.13, 0.0),
+    "text-embedding-ada-002": (0.10, 0.0),
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+}
+# Used when tiktoken or its encoding files are unavailable (e.g. offline hosts).
+CHARS_PER_TOKEN_ESTIMATE = 4.0
+
+
+@lru_cache(maxsize=None)
+def _encoding(model: str) -> Any:
+    try:
+        import tiktoken
+    except ImportError:
+        logger.warning("tiktoken is not installed; estimating token counts from text length")
+        return None
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("cl100k_base")
+    except Exception as exc:
+        logger.warning(f"Could not load tiktoken encoding for {model} ({exc}); estimating token counts")
+        return None
+
+
+def token_counter_name(model: str) -> str:
+    encoding = _encoding(model)
+    return f"tiktoken:{encoding.name}" if encoding is not None else "estimate"
+
+
+def count_tokens(text: str, model: str) -> int:
+    encoding = _encoding(model)
+    if encoding is None:
+        return math.ceil(len(text) / CHARS_PER_TOKEN_ESTIMATE)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def estimate_cost_usd(model: str, input_tokens: int, output_tokens: int = 0) -> float:
+    input_price, output_price = MODEL_PRICES_USD_PER_1M.get(model, (0.0, 0.0))
+    return (input_tokens * input_price + output_tokens * output_price) / 1_000_000
+
+
+@dataclass
+class ModelUsage:
+    kind: str
+    model: str
+    calls: int = 0
+    items: int = 0
+    max_batch: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    # API-reported usage where the response carried it, otherwise the local count.
+    billed_input_tokens: int = 0
+    billed_output_tokens: int = 0
+    cache_hits: int = 0
+    avoided_calls: int = 0
+    avoided_tokens: int = 0
+
+    @property
+    def cost_usd(self) -> float:
+        return estimate_cost_usd(self.model, self.billed_input_tokens, self.billed_output_tokens)
+
+    @property
+    def saved_usd(self) -> float:
+        return estimate_cost_usd(self.model, self.avoided_tokens)
+
+    def report(self) -> dict[str, Any]:
+        return {
+            "kind": self.kind,
+            "model": self.model,
+            "calls": self.calls,
+            "items": self.items,
+            "mean_batch": round(self.items / self.calls, 2) if self.calls else 0.0,
+            "max_batch": self.max_batch,
+            # One request per text would have cost this many extra round trips.
+            "calls_saved_by_batching": self.items - self.calls if self.kind == "embedding" else 0,
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "billed_input_tokens": self.billed_input_tokens,
+            "billed_output_tokens": self.billed_output_tokens,
+            "cache_hits": self.cache_hits,
+            "avoided_calls": self.avoided_calls,
+            "avoided_tokens": self.avoided_tokens,
+            "cost_usd": round(self.cost_usd, 8),
+            "saved_usd": round(self.saved_usd, 8),
+        }
+
+
+@dataclass
+class DocumentUsage:
+    calls: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cost_usd: float = 0.0
+
+    def report(self) -> dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "cost_usd": round(self.cost_usd, 8),
+        }
+
+
+@dataclass
+class UsageTracker:
+    """Thread-safe per-run totals, broken down by (kind, model) and by document."""
+
+    # Models that avoided calls are attributed to when the caller does not know which model it skipped.
+    embed_model: str | None = None
+    chat_model: str | None = None
+    models: dict[tuple[str, str], ModelUsage] = field(default_factory=dict)
+    documents: dict[str, DocumentUsage] = field(default_factory=dict)
+
+    def __post_init__(self) -> None:
+        self._lock = threading.Lock()
+        self._scope = threading.local()
+
+    @contextmanager
+    def document(self, doc_id: str) -> Iterator[None]:
+        previous = getattr(self._scope, "doc_id", None)
+        self._scope.doc_id = doc_id
+        try:
+            yield
+        finally:
+            self._scope.doc_id = previous
+
+    def _model(self, kind: str, model: str) -> ModelUsage:
+        usage = self.models.get((kind, model))
+        if usage is None:
+            usage = self.models[(kind, model)] = ModelUsage(kind, model)
+        return usage
+
+    def record_call(
+        self,
+        kind: str,
+        model: str,
+        texts: Sequence[str],
+        output_text: str = "",
+        reported_input_tokens: int | None = None,
+        reported_output_tokens: int | None = None,
+    ) -> None:
+        input_tokens = sum(count_tokens(text, model) for text in texts)
+        output_tokens = count_tokens(output_text, model) if output_text else 0
+        billed_input = input_tokens if reported_input_tokens is None else reported_input_tokens
+        billed_output = output_tokens if reported_output_tokens is None else reported_output_tokens
+        doc_id = getattr(self._scope, "doc_id", None)
+        with self._lock:
+            usage = self._model(kind, model)
+            usage.calls += 1
+            usage.items += len(texts)
+            usage.max_batch = max(usage.max_batch, len(texts))
+            usage.input_tokens += input_tokens
+            usage.output_tokens += output_tokens
+            usage.billed_input_tokens += billed_input
+            usage.billed_output_tokens += billed_output
+            if doc_id is not None:
+                document = self.documents.setdefault(doc_id, DocumentUsage())
+                document.calls += 1
+                document.input_tokens += billed_input
+                document.output_tokens += billed_output
+                document.cost_usd += estimate_cost_usd(model, billed_input, billed_output)
+
+    def record_avoided(self, kind: str, texts: Sequence[str], model: str | None = None, cache_hit: bool = True) -> None:
+        """Texts that did not need a call: served from a cache or precomputed."""
+        if not texts:
+            return
+        model = model or (self.embed_model if kind == "embedding" else self.chat_model) or "unknown"
+        avoided_tokens = sum(count_tokens(text, model) for text in texts)
+        with self._lock:
+            usage = self._model(kind, model)
+            usage.cache_hits += len(texts) if cache_hit else 0
+            usage.avoided_calls += 1
+            usage.avoided_tokens += avoided_tokens
+
+    def report(self) -> dict[str, Any]:
+        with self._lock:
+            models = [usage.report() for usage in self.models.values()]
+            documents = {doc_id: usage.report() for doc_id, usage in sorted(self.documents.items())}
+        totals = {
+            key: sum(model[key] for model in models)
+            for key in ("calls", "items", "input_tokens", "output_tokens", "cache_hits", "avoided_calls", "avoided_tokens")
+        }
+        totals["cost_usd"] = round(sum(model["cost_usd"] for model in models), 8)
+        totals["saved_usd"] = round(sum(model["saved_usd"] for model in models), 8)
+        return {
+            "totals": totals,
+            "models": models,
+            "documents": documents,
+            "token_counters": {model["model"]: token_counter_name(model["model"]) for model in models},
+        }
+
+    def metrics(self) -> dict[str, float]:
+        """Flat ``llm_<kind>_<field>{model="..."}`` gauges for scraping or log shipping."""
+        metrics: dict[str, float] = {}
+        for model in self.report()["models"]:
+            labels = f'{{model="{model["model"]}"}}'
+            for key in ("calls", "items", "input_tokens", "output_tokens", "cache_hits", "avoided_calls", "cost_usd", "saved_usd"):
+                metrics[f"llm_{model['kind']}_{key}{labels}"] = model[key]
+        return metrics
+
+    def log_report(self) -> None:
+        report = self.report()
+        for model in report["models"]:
+            logger.info(
+                f"LLM usage {model['kind']}/{model['model']}: calls={model['calls']}, items={model['items']}, "
+                f"mean_batch={model['mean_batch']}, input_tokens={model['input_tokens']}, "
+                f"output_tokens={model['output_tokens']}, cache_hits={model['cache_hits']}, "
+                f"avoided_calls={model['avoided_calls']}, cost_usd={model['cost_usd']:.6f}, "
+                f"saved_usd={model['saved_usd']:.6f}"
+            )
+
+    def summary_markdown(self) -> str:
+        report = self.report()
+        totals = report["totals"]
+        lines = [
+            "## API Usage",
+            f"- Calls: {totals['calls']} ({totals['items']} texts), avoided: {totals['avoided_calls']} "
+            f"({totals['cache_hits']} cache hits, {totals['avoided_tokens']} tokens)",
+            f"- Tokens: {totals['input_tokens']} input, {totals['output_tokens']} output",
+            f"- Estimated cost: ${totals['cost_usd']:.4f} (saved ${totals['saved_usd']:.4f})",
+        ]
+        for model in report["models"]:
+            lines.append(
+                f"- {model['kind']} `{model['model']}`: {model['calls']} calls, mean batch {model['mean_batch']}, "
+                f"{model['input_tokens']} tokens, ${model['cost_usd']:.4f}"
+            )
+        return "\n".join(lines)
+
+
+_active_lock = threading.Lock()
+_active: UsageTracker | None = None
+
+
+def current_usage() -> UsageTracker | None:
+    return _active
+
+
+@contextmanager
+def track_usage(tracker: UsageTracker | None = None) -> Iterator[UsageTracker]:
+    """Make ``tracker`` the process-wide recorder for LLM calls until the block exits.
+
+    Process-wide rather than a context variable so pipeline stage threads record into it too.
+    """
+    global _active
+    tracker = tracker or UsageTracker()
+    with _active_lock:
+        previous, _active = _active, tracker
+    try:
+        yield tracker
+    finally:
+        with _active_lock:
+            _active = previous
+
+
+@contextmanager
+def attribute_to_document(doc_id: str) -> Iterator[None]:
+    """Attribute calls on this thread to ``doc_id`` in the active tracker, if any."""
+    tracker = current_usage()
+    if tracker is None:
+        yield
+        return
+    with tracker.document(doc_id):
+        yield
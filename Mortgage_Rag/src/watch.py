@@ -0,0 +1,534 @@
+"""Watch mode: make PDFs searchable seconds after they land in ``data_dir``.
+
+``PdfWatcher`` polls ``data_dir`` and reports a PDF once its size and mtime
+have held still for one poll (so half-copied uploads are not read) and no
+output newer than the PDF exists for it. ``MicroBatcher`` groups arrivals into
+batches that close at ``watch_batch_size`` documents or ``watch_batch_wait_s``
+after the oldest arrival. Each batch runs through the pipeline's
+extract/redact/chunk/embed stages and is appended to an in-memory
+``StagingIndex``, which is published as a new index version at most every
+``watch_publish_interval_s``; running readers hot-swap to it. A re-uploaded
+document replaces its previous chunks. Documents of a failed batch go to a
+``RetryQueue`` and are retried one at a time with exponential backoff; after
+``watch_max_attempts`` they are parked in ``FailedDocuments`` until the file
+changes. The batch underwriting assessment is not rerun per batch; ``main.py`` without
+``--watch`` still produces it.
+"""
+from __future__ import annotations
+
+from collections import defaultdict, deque
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Iterable
+import json
+import os
+import shutil
+import threading
+import time
+
+from .config import Settings
+from .embedding import EmbeddingItem, IndexCompression, WritableFaissIndex
+from .index_versions import publish_index_version, resolve_index_dir
+from .llm import LlmClient, configure_llm_concurrency
+from .logger import get_logger
+from .pipeline import (
+    ProcessedDocument,
+    create_llm_client,
+    document_stages,
+    embedding_items,
+    loan_id_for,
+    processed_output_path,
+    write_processed,
+)
+from .shards import shard_dirname
+from .stages import StagedPipeline
+from .usage import UsageTracker, track_usage
+
+logger = get_logger(__name__)
+
+
+# A batch member: the PDF and the monotonic time it was first seen.
+Arrival = tuple[Path, float]
+
+RETRY_BASE_DELAY_S = 2.0
+RETRY_MAX_DELAY_S = 300.0
+RETRY_MAX_ATTEMPTS = 5
+FAILED_DOCUMENTS_FILE = "watch_failed.json"
+
+
+def _signature(path: Path) -> tuple[int, int] | None:
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class PdfWatcher:
+    """Polls ``data_dir`` for new or changed PDFs and reports each once it has stopped changing."""
+
+    def __init__(
+        self, settings: Settings, include_subdirs: bool = False, failed: "FailedDocuments | None" = None
+    ) -> None:
+        self.settings = settings
+        self.include_subdirs = include_subdirs
+        self.failed = failed
+        self._candidates: dict[Path, tuple[tuple[int, int], float]] = {}
+        self._handled: dict[Path, tuple[int, int]] = {}
+
+    def _paths(self) -> list[Path]:
+        paths = list(self.settings.data_dir.glob("*.pdf"))
+        if self.include_subdirs:
+            paths.extend(self.settings.data_dir.glob("*/*.pdf"))
+        return paths
+
+    def _is_processed(self, path: Path, signature: tuple[int, int]) -> bool:
+        # Outputs are written only after a document's chunks are published, so they mark it done across restarts.
+        try:
+            return processed_output_path(path, self.settings).stat().st_mtime_ns >= signature[0]
+        except FileNotFoundError:
+            return False
+
+    def poll(self, now: float) -> list[Arrival]:
+        ready: list[Arrival] = []
+        present = set()
+        for path in self._paths():
+            present.add(path)
+            signature = _signature(path)
+            if signature is None or self._handled.get(path) == signature:
+                continue
+            candidate = self._candidates.get(path)
+            if candidate is None or candidate[0] != signature:
+                # New or still being written; report it once it is unchanged on the next poll.
+                self._candidates[path] = (signature, candidate[1] if candidate else now)
+                continue
+            del self._candidates[path]
+            self._handled[path] = signature
+            if self.failed is not None and self.failed.contains(path, signature):
+                continue
+            if not self._is_processed(path, signature):
+                ready.append((path, candidate[1]))
+        for path in self._candidates.keys() - present:
+            del self._candidates[path]
+        return ready
+
+
+class MicroBatcher:
+    """FIFO of arrivals released in batches of up to ``max_size``, or sooner once the oldest waited ``max_wait_s``."""
+
+    def __init__(self, max_size: int, max_wait_s: float) -> None:
+        self.max_size = max(1, max_size)
+        self.max_wait_s = max_wait_s
+        self._pending: deque[Arrival] = deque()
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def add(self, arrivals: Iterable[Arrival]) -> None:
+        self._pending.extend(arrivals)
+
+    def oldest_age(self, now: float) -> float:
+        return now - self._pending[0][1] if self._pending else 0.0
+
+    def take(self, now: float) -> list[Arrival]:
+        if len(self._pending) < self.max_size and self.oldest_age(now) < self.max_wait_s:
+            return []
+        return [self._pending.popleft() for _ in range(min(self.max_size, len(self._pending)))]
+
+
+class RetryQueue:
+    """Documents from failed batches, each retried in a batch of its own after an exponential backoff.
+
+    Retrying alone keeps one bad PDF from failing the documents it was batched
+    with again. A document leaves the queue when it succeeds, when a newer copy
+    arrives through the watcher, when it is deleted, or after ``max_attempts``
+    failures, when ``take_exhausted`` hands it over for parking.
+    """
+
+    def __init__(
+        self,
+        base_delay_s: float = RETRY_BASE_DELAY_S,
+        max_delay_s: float = RETRY_MAX_DELAY_S,
+        max_attempts: int = RETRY_MAX_ATTEMPTS,
+    ) -> None:
+        self.base_delay_s = base_delay_s
+        self.max_delay_s = max_delay_s
+        self.max_attempts = max(1, max_attempts)
+        self._attempts: dict[Path, int] = {}
+        self._due: dict[Path, tuple[float, float]] = {}
+        self._exhausted: list[tuple[Path, int]] = []
+
+    def __len__(self) -> int:
+        return len(self._attempts)
+
+    def fail(self, arrivals: Iterable[Arrival], now: float) -> float:
+        """Schedule ``arrivals`` for another attempt; returns the longest delay applied."""
+        longest = 0.0
+        for path, first_seen in arrivals:
+            attempts = self._attempts.get(path, 0) + 1
+            if attempts >= self.max_attempts:
+                self.discard([path])
+                self._exhausted.append((path, attempts))
+                continue
+            delay = min(self.base_delay_s * 2 ** (attempts - 1), self.max_delay_s)
+            self._attempts[path] = attempts
+            self._due[path] = (now + delay, first_seen)
+            longest = max(longest, delay)
+        return longest
+
+    def succeeded(self, arrivals: Iterable[Arrival]) -> None:
+        self.discard(path for path, _ in arrivals)
+
+    def discard(self, paths: Iterable[Path]) -> None:
+        for path in paths:
+            self._attempts.pop(path, None)
+            self._due.pop(path, None)
+
+    def take_exhausted(self) -> list[tuple[Path, int]]:
+        """Documents that used up their attempts since the last call, with their attempt counts."""
+        exhausted, self._exhausted = self._exhausted, []
+        return exhausted
+
+    def take_due(self, now: float) -> list[Arrival]:
+        due = [path for path, (due_at, _) in self._due.items() if due_at <= now]
+        ready: list[Arrival] = []
+        for path in due:
+            _, first_seen = self._due.pop(path)
+            if path.exists():
+                ready.append((path, first_seen))
+            else:
+                self._attempts.pop(path, None)
+        return ready
+
+
+class FailedDocuments:
+    """Dead letters: PDFs that failed every attempt, kept in ``output/watch_failed.json``.
+
+    An entry matches one version of a file (mtime and size), so the watcher
+    skips it across restarts until the file is replaced.
+    """
+
+    def __init__(self, output_dir: Path) -> None:
+        self.path = output_dir / FAILED_DOCUMENTS_FILE
+        self._entries: dict[str, dict[str, Any]] = {}
+        if self.path.exists():
+            try:
+                self._entries = {entry["path"]: entry for entry in json.loads(self.path.read_text(encoding="utf-8"))}
+            except (ValueError, KeyError, TypeError) as exc:
+                logger.warning(f"Ignoring unreadable {self.path}: {exc}")
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def contains(self, path: Path, signature: tuple[int, int]) -> bool:
+        entry = self._entries.get(str(path))
+        return entry is not None and (entry["mtime_ns"], entry["size"]) == signature
+
+    def add(self, path: Path, attempts: int) -> None:
+        signature = _signature(path)
+        if signature is None:
+            return
+        self._entries[str(path)] = {
+            "path": str(path),
+            "mtime_ns": signature[0],
+            "size": signature[1],
+            "attempts": attempts,
+            "failed_at": time.time(),
+        }
+        self._save()
+
+    def discard(self, paths: Iterable[Path]) -> None:
+        removed = [self._entries.pop(str(path)) for path in paths if str(path) in self._entries]
+        if removed:
+            self._save()
+
+    def _save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        _write_report(self.path, list(self._entries.values()))
+
+
+@dataclass
+class WatchMetrics:
+    batches: int = 0
+    documents: int = 0
+    chunks: int = 0
+    failed_batches: int = 0
+    failed_documents: int = 0
+    # Failed documents waiting for their next attempt.
+    retry_documents: int = 0
+    # Failed every attempt; listed in watch_failed.json and not retried until replaced.
+    dead_letter_documents: int = 0
+    last_batch_size: int = 0
+    last_batch_latency_s: float = 0.0
+    max_batch_latency_s: float = 0.0
+    total_batch_latency_s: float = 0.0
+    publishes: int = 0
+    failed_publishes: int = 0
+    # Processed into the staging index but not yet in a published version.
+    unpublished_documents: int = 0
+    # First seen in data_dir to published in the live index.
+    last_searchable_latency_s: float = 0.0
+    max_searchable_latency_s: float = 0.0
+    backlog_documents: int = 0
+    backlog_oldest_age_s: float = 0.0
+    index_version: str | None = None
+
+    def record_batch(self, size: int, chunks: int, latency_s: float) -> None:
+        self.batches += 1
+        self.documents += size
+        self.chunks += chunks
+        self.last_batch_size = size
+        self.last_batch_latency_s = latency_s
+        self.max_batch_latency_s = max(self.max_batch_latency_s, latency_s)
+        self.total_batch_latency_s += latency_s
+
+    def record_publish(self, version: str | None, searchable_latency_s: float) -> None:
+        if version is not None:
+            self.publishes += 1
+            self.index_version = version
+        self.last_searchable_latency_s = searchable_latency_s
+        self.max_searchable_latency_s = max(self.max_searchable_latency_s, searchable_latency_s)
+
+    def report(self) -> dict[str, Any]:
+        report = {key: round(value, 3) if isinstance(value, float) else value for key, value in asdict(self).items()}
+        report["mean_batch_latency_s"] = round(self.total_batch_latency_s / self.batches, 3) if self.batches else 0.0
+        return report
+
+    def metrics(self) -> dict[str, float]:
+        """Flat ``watch_<field>`` gauges for scraping or log shipping."""
+        return {f"watch_{key}": value for key, value in self.report().items() if isinstance(value, (int, float))}
+
+
+def _link_or_copy(source: Path, target: Path) -> None:
+    target.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        # Published versions are never modified, so the new version can share their files.
+        os.link(source, target)
+    except OSError:
+        shutil.copy2(source, target)
+
+
+@dataclass(frozen=True)
+class StagedDocument:
+    path: Path
+    processed: ProcessedDocument
+    first_seen: float
+    # The PDF's mtime before it was read; its output is stamped with it.
+    source_mtime_ns: int
+
+
+class StagingIndex:
+    """Writable copy of the live index that micro-batches append to in memory.
+
+    ``publish`` writes it out as a new version, so the cost of writing the whole
+    index is paid once per publish rather than once per batch. With the sharded
+    layout only shards changed since the last publish are written; the rest are
+    linked from the live version, and published shards are dropped from memory.
+    Documents are listed in ``unpublished`` until a publish includes them.
+    """
+
+    def __init__(self, index_root: Path, sharded: bool, compression: IndexCompression) -> None:
+        self.index_root = index_root
+        self.sharded = sharded
+        self.compression = compression
+        self.unpublished: list[StagedDocument] = []
+        self._shards: dict[str, WritableFaissIndex] = {}
+        self._dirty: set[str] = set()
+
+    def _shard(self, shard_key: str) -> WritableFaissIndex:
+        shard = self._shards.get(shard_key)
+        if shard is None:
+            base_dir = resolve_index_dir(self.index_root)
+            shard_dir = base_dir / shard_dirname(shard_key) if self.sharded else base_dir
+            shard = WritableFaissIndex.open(shard_dir, self.compression)
+            self._shards[shard_key] = shard
+        return shard
+
+    def add(
+        self,
+        groups: dict[str, list[EmbeddingItem]],
+        documents: Iterable[StagedDocument],
+    ) -> None:
+        for shard_key, items in groups.items():
+            self._shard(shard_key).add(items)
+            self._dirty.add(shard_key)
+        self.unpublished.extend(documents)
+
+    def publish(self) -> Path | None:
+        """Publish pending changes as a new version; ``None`` if no index changed."""
+        if not self._dirty:
+            return None
+        base_dir = resolve_index_dir(self.index_root)
+        dirty = set(self._dirty)
+
+        def build(staging_dir: Path) -> None:
+            if not self.sharded:
+                self._shards[""].write(staging_dir)
+                return
+            touched = {shard_dirname(shard_key) for shard_key in dirty}
+            for shard_dir in base_dir.iterdir() if base_dir.exists() else ():
+                if shard_dir.name not in touched and (shard_dir / "index.faiss").exists():
+                    for path in shard_dir.iterdir():
+                        _link_or_copy(path, staging_dir / shard_dir.name / path.name)
+            for shard_key in dirty:
+                self._shards[shard_key].write(staging_dir / shard_dirname(shard_key))
+
+        version_dir = publish_index_version(self.index_root, build)
+        self._dirty.clear()
+        if self.sharded:
+            for shard_key in dirty:
+                del self._shards[shard_key]
+        return version_dir
+
+
+def _run_batch(
+    settings: Settings,
+    batch: list[Arrival],
+    llm: LlmClient | None,
+    sharded: bool,
+    staging: StagingIndex,
+    metrics: WatchMetrics,
+) -> bool:
+    started = time.monotonic()
+    mtimes = {path: (_signature(path) or (0, 0))[0] for path, _ in batch}
+    # A micro-batch is a handful of documents, too few to pay for spawning a process pool each time.
+    staged = StagedPipeline(document_stages(settings, llm, cpu_kind="thread"), queue_size=settings.stage_queue_size)
+    try:
+        results = list(staged.run([path for path, _ in batch], ordered=True))
+        # Redaction did not converge; the stage logged it. The file is not retried until it changes.
+        results = [result for result in results if result[1] is not None]
+        groups: dict[str, list[EmbeddingItem]] = defaultdict(list)
+        for path, processed, chunks, vectors in results:
+            if vectors is not None:
+                shard_key = loan_id_for(path, settings) if sharded else ""
+                groups[shard_key].extend(
+                    embedding_items(processed, chunks, vectors, shard_key or settings.default_loan_id)
+                )
+        first_seen = dict(batch)
+        staging.add(
+            groups,
+            [StagedDocument(path, processed, first_seen[path], mtimes[path]) for path, processed, _, _ in results],
+        )
+    except Exception as exc:
+        metrics.failed_batches += 1
+        metrics.failed_documents += len(batch)
+        names = ", ".join(path.name for path, _ in batch)
+        logger.error(f"Watch batch failed ({names}): {exc}")
+        return False
+
+    chunks = sum(len(items) for items in groups.values())
+    metrics.record_batch(size=len(batch), chunks=chunks, latency_s=time.monotonic() - started)
+    metrics.unpublished_documents = len(staging.unpublished)
+    logger.info(
+        f"Watch batch {metrics.batches}: {len(batch)} documents, {chunks} chunks staged in "
+        f"{metrics.last_batch_latency_s:.2f}s, backlog {metrics.backlog_documents}"
+    )
+    return True
+
+
+def _publish(settings: Settings, staging: StagingIndex, metrics: WatchMetrics) -> None:
+    documents = staging.unpublished
+    try:
+        version_dir = staging.publish()
+    except Exception as exc:
+        metrics.failed_publishes += 1
+        logger.error(f"Watch publish failed: {exc}; {len(documents)} documents stay staged for the next attempt")
+        return
+    # Outputs mark documents done across restarts, so they are written only once their chunks are live.
+    # Stamping them with the PDF's mtime as read keeps a PDF replaced while staged from looking processed.
+    for document in documents:
+        output_path = write_processed(document.path, document.processed, settings)
+        os.utime(output_path, ns=(document.source_mtime_ns, document.source_mtime_ns))
+    staging.unpublished = []
+    finished = time.monotonic()
+    metrics.record_publish(
+        version_dir.name if version_dir else None, max(finished - document.first_seen for document in documents)
+    )
+    metrics.unpublished_documents = 0
+    logger.info(
+        f"Watch publish: {len(documents)} documents searchable in index version {metrics.index_version} "
+        f"(oldest arrival {metrics.last_searchable_latency_s:.2f}s ago)"
+    )
+
+
+def _write_report(path: Path, report: dict[str, Any]) -> None:
+    # Replaced in one step so a scraper never reads a half-written file.
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    tmp_path.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    os.replace(tmp_path, path)
+
+
+def _write_reports(settings: Settings, metrics: WatchMetrics, usage: UsageTracker) -> None:
+    _write_report(settings.output_dir / "watch_metrics.json", {**metrics.report(), "metrics": metrics.metrics()})
+    _write_report(settings.output_dir / "usage.json", {**usage.report(), "metrics": usage.metrics()})
+
+
+def run_watch(
+    settings: Settings,
+    stop: threading.Event | None = None,
+    llm: LlmClient | None = None,
+) -> WatchMetrics:
+    """Index PDFs as they arrive until ``stop`` is set; per-batch metrics go to ``output/watch_metrics.json``."""
+    stop = stop or threading.Event()
+    settings.output_dir.mkdir(parents=True, exist_ok=True)
+    settings.faiss_dir.mkdir(parents=True, exist_ok=True)
+    sharded = settings.faiss_layout == "sharded"
+    index_root = settings.faiss_dir / "shards" if sharded else settings.faiss_dir
+    configure_llm_concurrency(settings.openai_max_concurrency)
+    if llm is None:
+        llm = create_llm_client(settings)
+
+    failed = FailedDocuments(settings.output_dir)
+    watcher = PdfWatcher(settings, include_subdirs=sharded, failed=failed)
+    batcher = MicroBatcher(settings.watch_batch_size, settings.watch_batch_wait_s)
+    metrics = WatchMetrics()
+    compression = IndexCompression(settings.index_encoding, settings.index_pca_dimensions)
+    staging = StagingIndex(index_root, sharded, compression)
+    retries = RetryQueue(max_attempts=settings.watch_max_attempts)
+    last_publish = 0.0
+    usage = UsageTracker(embed_model=settings.openai_embed_model, chat_model=settings.openai_model)
+    logger.info(
+        f"Watching {settings.data_dir} every {settings.watch_poll_interval_s}s: batches of up to "
+        f"{batcher.max_size} documents or {batcher.max_wait_s}s, published every "
+        f"{settings.watch_publish_interval_s}s under {index_root}"
+    )
+    with track_usage(usage):
+        while not stop.is_set():
+            now = time.monotonic()
+            arrivals = watcher.poll(now)
+            # A newer copy of a failed document goes through the normal batches instead.
+            retries.discard(path for path, _ in arrivals)
+            failed.discard(path for path, _ in arrivals)
+            batcher.add(arrivals)
+            batch = batcher.take(now)
+            due = retries.take_due(now)
+            backlog = (len(batcher), round(batcher.oldest_age(now), 3))
+            changed = bool(batch or due) or backlog != (metrics.backlog_documents, metrics.backlog_oldest_age_s)
+            metrics.backlog_documents, metrics.backlog_oldest_age_s = backlog
+            runs = ([batch] if batch else []) + [[arrival] for arrival in due]
+            for run in runs:
+                if _run_batch(settings, run, llm, sharded, staging, metrics):
+                    retries.succeeded(run)
+                else:
+                    delay = retries.fail(run, time.monotonic())
+                    for path, attempts in retries.take_exhausted():
+                        failed.add(path, attempts)
+                        logger.error(f"Giving up on {path.name} after {attempts} attempts; recorded in {failed.path}")
+                    if delay:
+                        logger.warning(f"Retrying failed documents one at a time, next attempt in {delay:.0f}s")
+            metrics.retry_documents = len(retries)
+            metrics.dead_letter_documents = len(failed)
+            if staging.unpublished and time.monotonic() - last_publish >= settings.watch_publish_interval_s:
+                _publish(settings, staging, metrics)
+                last_publish = time.monotonic()
+                changed = True
+            if changed:
+                _write_reports(settings, metrics, usage)
+            if not runs:
+                stop.wait(settings.watch_poll_interval_s)
+        if staging.unpublished:
+            _publish(settings, staging, metrics)
+            _write_reports(settings, metrics, usage)
+    usage.log_report()
+    logger.info(f"Watch mode stopped: {metrics.batches} batches, {metrics.documents} documents")
+    return metrics
@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import time
+
+import numpy as np
+from fastapi.testclient import TestClient
+
+from src.aus.api import app
+from src.aus.schemas import AUSFinding, AUSRequest, AUSSweepRequest
+from src.aus.service import FINDING_ORDER, evaluate_aus
+from src.aus.sweep import sweep_aus
+
+
+client = TestClient(app)
+
+BASE = {
+    "credit_score": 700,
+    "dti": 35.0,
+    "ltv": 75.0,
+    "income": 120000,
+    "loan_amount": 420000,
+    "property_value": 560000,
+    "loan_type": "Conventional",
+    "reserves": 6,
+    "occupancy_type": "Primary",
+}
+
+
+def test_grid_matches_scalar_evaluation() -> None:
+    request = AUSSweepRequest(
+        base=AUSRequest(**BASE),
+        credit_score={"start": 580, "stop": 800, "step": 10},
+        dti={"start": 20, "stop": 50, "step": 2.5},
+        ltv={"start": 60, "stop": 95, "step": 5},
+    )
+    result = sweep_aus(request)
+    shape = [len(values) for values in result.axes.values()]
+    surface = np.asarray(result.surface).reshape(shape)
+
+    rng = np.random.default_rng(0)
+    for _ in range(200):
+        point = tuple(int(rng.integers(n)) for n in shape)
+        values = {name: result.axes[name][i] for name, i in zip(result.axes, point)}
+        ltv = values["ltv"]
+        scalar = evaluate_aus(
+            AUSRequest(
+                **{
+                    **BASE,
+                    "credit_score": int(values["credit_score"]),
+                    "dti": values["dti"],
+                    "ltv": ltv,
+                    "loan_amount": ltv * BASE["property_value"] / 100,
+                }
+            )
+        )
+        assert FINDING_ORDER[surface[point]] == scalar.finding
+
+
+def test_minimal_change_to_approve() -> None:
+    request = AUSSweepRequest(
+        base=AUSRequest(**BASE),
+        credit_score={"start": 700, "stop": 780, "step": 10},
+        dti={"start": 25, "stop": 35, "step": 1},
+    )
+
+    result = sweep_aus(request)
+    approve = next(c for c in result.minimal_changes if c.finding == AUSFinding.APPROVE_ELIGIBLE)
+
+    assert result.base_finding == AUSFinding.REFER_ELIGIBLE
+    assert approve.changes == {"credit_score": 740.0, "dti": 30.0}
+
+
+def test_sweep_endpoint_handles_100k_grid_quickly() -> None:
+    payload = {
+        "base": BASE,
+        "credit_score": {"start": 560, "stop": 810, "step": 10},
+        "dti": {"start": 10, "stop": 59, "step": 1},
+        "ltv": {"start": 50, "stop": 99, "step": 0.5},
+    }
+
+    started = time.perf_counter()
+    response = client.post("/aus/sweep", json=payload)
+    elapsed = time.perf_counter() - started
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["grid_size"] == 26 * 50 * 99
+    assert len(body["surface"]) == body["grid_size"]
+    assert sum(body["finding_counts"].values()) == body["grid_size"]
+    assert elapsed < 1.0
+
+
+def test_sweep_rejects_oversized_grid() -> None:
+    payload = {
+        "base": BASE,
+        "credit_score": {"start": 300, "stop": 850, "step": 1},
+        "dti": {"start": 0, "stop": 100, "step": 0.1},
+    }
+
+    assert client.post("/aus/sweep", json=payload).status_code == 422
+
+
+def test_sweep_rejects_ranges_outside_request_bounds() -> None:
+    for axis, sweep in (
+        ("credit_score", {"start": 250, "stop": 700, "step": 10}),
+        ("dti", {"start": 20, "stop": 120, "step": 5}),
+        ("ltv", {"start": 0, "stop": 80, "step": 5}),
+    ):
+        payload = {"base": BASE, axis: sweep}
+        response = client.post("/aus/sweep", json=payload)
+        assert response.status_code == 422, axis
+        assert axis in response.text
@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from src.doc_classifier import DocumentClassifier, classify_document
+
+
+def test_scores_all_types_instead_of_first_match() -> None:
+    # "Employer" used to classify anything that mentioned it as an employment letter
+    # unless an earlier rule fired first.
+    result = classify_document("upload.pdf", "Earnings Statement\nEmployer: Acme\nGross Pay: $4000\nNet Pay: $3100")
+
+    assert result.document_type == "pay_stub"
+    assert 0.5 < result.confidence < 1.0
+    assert set(result.scores) == {"pay_stub", "employment_letter"}
+
+
+def test_short_tokens_need_word_boundaries() -> None:
+    # "id" inside "Ridge" or "paid" must not make this an ID document.
+    result = classify_document("scan.pdf", "Property Address: 12 Oak Ridge Dr\nAmount paid in full")
+
+    assert result.document_type == "unknown"
+    assert result.confidence == 0.0
+
+
+def test_file_name_contributes_and_prefix_is_configurable() -> None:
+    text = "x" * 50 + " Bank Statement"
+
+    assert classify_document("sample_w2.pdf", "").document_type == "tax_return"
+    assert DocumentClassifier(prefix_chars=40).classify("a.pdf", text).document_type == "unknown"
+    assert DocumentClassifier(prefix_chars=100).classify("a.pdf", text).document_type == "bank_statement"
+
+
+def test_classify_directory(tmp_path: Path, monkeypatch) -> None:
+    (tmp_path / "a.pdf").write_bytes(b"")
+    (tmp_path / "b.pdf").write_bytes(b"")
+    texts = {"a.pdf": "Passport\nID Number: X1", "b.pdf": "Form W-2 Wage and Tax Statement"}
+
+    class _Text:
+        def __init__(self, text: str) -> None:
+            self.text = text
+
+    monkeypatch.setattr("src.doc_classifier.extract_text_from_pdf", lambda path, **_: _Text(texts[path.name]))
+
+    results = DocumentClassifier().classify_directory(tmp_path)
+
+    assert {name: r.document_type for name, r in results.items()} == {"a.pdf": "id_document", "b.pdf": "tax_return"}
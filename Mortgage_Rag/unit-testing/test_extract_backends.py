@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+from reportlab.lib.pagesizes import LETTER
+from reportlab.pdfgen import canvas
+
+from src.extract import (
+    ExtractionCache,
+    available_pdf_backends,
+    extract_fields,
+    extract_text_from_pdf,
+    get_pdf_backend,
+)
+
+
+def _write_paystub(path: Path) -> Path:
+    c = canvas.Canvas(str(path), pagesize=LETTER)
+    c.setFont("Helvetica", 12)
+    c.drawString(72, 720, "Paystub")
+    c.drawString(72, 690, "Gross Pay: $3,400.00")
+    c.drawString(72, 670, "Net Pay: $2,720.00")
+    c.showPage()
+    c.drawString(72, 720, "YTD Gross: $6,800.00")
+    c.showPage()
+    c.save()
+    return path
+
+
+class CountingBackend:
+    name = "counting"
+
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def extract_pages(self, data: bytes) -> list[str]:
+        self.calls += 1
+        return [f"page of {len(data)} bytes"]
+
+
+@pytest.mark.parametrize("backend_name", available_pdf_backends())
+def test_backends_extract_sample_fields(tmp_path: Path, backend_name: str) -> None:
+    pdf_path = _write_paystub(tmp_path / "paystub.pdf")
+
+    document = extract_text_from_pdf(pdf_path, backend=get_pdf_backend(backend_name))
+    fields = extract_fields(document.text)
+
+    assert fields["gross_pay"] == "3,400.00"
+    assert fields["net_pay"] == "2,720.00"
+    assert "YTD Gross" in document.text
+
+
+def test_cache_skips_backend_for_identical_content(tmp_path: Path) -> None:
+    first = _write_paystub(tmp_path / "first.pdf")
+    copy = tmp_path / "copy.pdf"
+    copy.write_bytes(first.read_bytes())
+    backend = CountingBackend()
+    cache = ExtractionCache()
+
+    extract_text_from_pdf(first, backend=backend, cache=cache)
+    extract_text_from_pdf(copy, backend=backend, cache=cache)
+
+    assert backend.calls == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_disk_cache_survives_new_instance(tmp_path: Path) -> None:
+    pdf_path = _write_paystub(tmp_path / "paystub.pdf")
+    backend = CountingBackend()
+
+    extract_text_from_pdf(pdf_path, backend=backend, cache=ExtractionCache(tmp_path / "cache"))
+    text = extract_text_from_pdf(pdf_path, backend=backend, cache=ExtractionCache(tmp_path / "cache")).text
+
+    assert backend.calls == 1
+    assert text.startswith("page of")
+
+
+def test_unknown_backend_is_rejected() -> None:
+    with pytest.raises(ValueError, match="Unknown PDF backend"):
+        get_pdf_backend("tesseract")
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+
+HEAVY_MODULES = ["faiss", "openai", "httpx", "langgraph", "langchain_core", "langchain_community", "langchain_openai", "pypdf"]
+
+# Cumulative import time budgets in seconds (cold interpreter, measured with -X importtime).
+# fastapi alone accounts for most of the AUS service budget.
+ENTRY_POINTS = {
+    "main": 0.6,
+    "src.pipeline": 0.6,
+    "src.aus.api": 1.5,
+}
+
+
+def _import_in_subprocess(module: str, cwd: Path) -> tuple[float, list[str]]:
+    probe = f"import {module}, json, sys; print(json.dumps(sorted(m for m in {HEAVY_MODULES!r} if m in sys.modules)))"
+    env = {**os.environ, "PYTHONPATH": str(ROOT), "PYTHONDONTWRITEBYTECODE": "1"}
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", probe],
+        cwd=cwd,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    cumulative_us = 0
+    for line in completed.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package"
+        parts = [part.strip() for part in line.removeprefix("import time:").split("|")]
+        if len(parts) == 3 and parts[2] == module:
+            cumulative_us = int(parts[1])
+    return cumulative_us / 1_000_000, json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+@pytest.mark.parametrize("module,budget_s", ENTRY_POINTS.items())
+def test_entry_point_import_budget(module: str, budget_s: float, tmp_path: Path) -> None:
+    elapsed_s, loaded_heavy = _import_in_subprocess(module, tmp_path)
+
+    assert loaded_heavy == []
+    assert elapsed_s < budget_s, f"import {module} took {elapsed_s:.3f}s (budget {budget_s}s)"
+    # Loggers must not create logs/ (or open files) until something is logged.
+    assert not (tmp_path / "logs").exists()
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import faiss
+import numpy as np
+import pytest
+
+from src.embedding import EmbeddingItem, IndexCompression, build_faiss_index
+from src.pii import redact_pii
+from src.streaming import IncrementalIndexWriter
+
+DIM = 64
+
+
+def _items(count: int, seed: int = 0) -> list[EmbeddingItem]:
+    rng = np.random.default_rng(seed)
+    # Low-rank vectors so PCA has structure to keep, as real embeddings do.
+    vectors = rng.standard_normal((count, 8)) @ rng.standard_normal((8, DIM)) + 0.05 * rng.standard_normal((count, DIM))
+    return [
+        EmbeddingItem(doc_id="doc", chunk_id=idx, text=redact_pii(f"chunk {idx}"), vector=vector.astype("float32"))
+        for idx, vector in enumerate(vectors)
+    ]
+
+
+def _recall(index_path: Path, reference_path: Path, queries: np.ndarray, k: int = 5) -> float:
+    found = faiss.read_index(str(index_path)).search(queries, k)[1]
+    expected = faiss.read_index(str(reference_path)).search(queries, k)[1]
+    return float(np.mean([len(set(a) & set(b)) / k for a, b in zip(found, expected)]))
+
+
+@pytest.mark.parametrize(
+    "compression,max_size_ratio",
+    [
+        (IndexCompression("fp16"), 0.55),
+        (IndexCompression("sq8"), 0.3),
+        (IndexCompression("fp16", pca_dimensions=16), 0.2),
+    ],
+)
+def test_compressed_index_is_smaller_and_keeps_recall(tmp_path: Path, compression: IndexCompression, max_size_ratio: float) -> None:
+    items = _items(2000)
+    reference = build_faiss_index(items, tmp_path / "flat")
+    compressed = build_faiss_index(items, tmp_path / "compressed", compression)
+    queries = np.asarray([item.vector for item in _items(50, seed=1)], dtype="float32")
+
+    assert compressed.stat().st_size < reference.stat().st_size * max_size_ratio
+    assert _recall(compressed, reference, queries) >= 0.9
+    # Queries stay full width whatever the stored encoding.
+    assert faiss.read_index(str(compressed), faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY).d == DIM
+
+
+def test_streamed_compressed_index_matches_in_memory_build(tmp_path: Path) -> None:
+    items = _items(300)
+    compression = IndexCompression("sq8")
+    writer = IncrementalIndexWriter(tmp_path / "spool")
+    writer.add(items[:100])
+    writer.add(items[100:])
+    streamed = writer.finalize(tmp_path / "streamed", compression)
+    reference = build_faiss_index(items, tmp_path / "reference", compression)
+    queries = np.asarray([item.vector for item in items[:10]], dtype="float32")
+
+    np.testing.assert_array_equal(
+        faiss.read_index(str(streamed)).search(queries, 3)[1],
+        faiss.read_index(str(reference)).search(queries, 3)[1],
+    )
+
+
+def test_pca_needs_enough_vectors_and_known_encoding(tmp_path: Path) -> None:
+    index_path = build_faiss_index(_items(10), tmp_path / "small", IndexCompression("fp16", pca_dimensions=32))
+
+    assert isinstance(faiss.read_index(str(index_path)), faiss.IndexScalarQuantizer)
+    with pytest.raises(ValueError, match="Unknown index encoding"):
+        IndexCompression("pq")
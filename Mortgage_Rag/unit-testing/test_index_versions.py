@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import threading
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from src.embedding import EmbeddingItem, build_faiss_index, load_faiss_index
+from src.index_versions import (
+    CURRENT_FILE,
+    VERSIONS_DIR,
+    VersionedIndexReader,
+    collect_garbage,
+    current_version,
+    publish_index_version,
+)
+from src.shards import ShardManager, build_sharded_faiss_index
+
+DIM = 8
+
+
+def _items(doc_id: str, count: int, shard_key: str = "default") -> list[EmbeddingItem]:
+    return [
+        EmbeddingItem(doc_id=doc_id, chunk_id=idx, text=f"{doc_id} {idx}", vector=np.full(DIM, idx, dtype="float32"), shard_key=shard_key)
+        for idx in range(count)
+    ]
+
+
+def _publish(root: Path, doc_id: str, count: int = 3, keep_previous: int = 1) -> Path:
+    return publish_index_version(root, lambda out: build_faiss_index(_items(doc_id, count), out), keep_previous=keep_previous)
+
+
+def test_reader_swaps_to_new_version_while_old_snapshot_keeps_serving(tmp_path: Path) -> None:
+    root = tmp_path / "faiss"
+    first = _publish(root, "v1")
+    reader = VersionedIndexReader(root, load_faiss_index, poll_interval_s=0)
+
+    in_flight = reader.get()
+    second = _publish(root, "v2", count=5)
+    latest = reader.get()
+
+    assert (root / CURRENT_FILE).read_text() == second.name == reader.version
+    assert in_flight.index_dir == first and latest.index_dir == second
+    assert in_flight.search(np.zeros(DIM), k=1)[0][0]["doc_id"] == "v1"
+    assert latest.index.ntotal == 5 and reader.swaps == 1
+
+
+def test_leased_versions_survive_gc_until_readers_move_on(tmp_path: Path) -> None:
+    root = tmp_path / "faiss"
+    first = _publish(root, "v1")
+    reader = VersionedIndexReader(root, load_faiss_index, poll_interval_s=3600)
+    reader.get()
+
+    _publish(root, "v2", keep_previous=0)
+    _publish(root, "v3", keep_previous=0)
+
+    # The reader has not polled yet, so v1 is still pinned; v2 was never used and is gone.
+    assert sorted(p.name for p in (root / VERSIONS_DIR).iterdir()) == sorted([first.name, current_version(root)])
+
+    reader.close()
+    assert collect_garbage(root, keep_previous=0) == [first.name]
+
+
+def test_failed_build_leaves_current_version_untouched(tmp_path: Path) -> None:
+    root = tmp_path / "faiss"
+    first = _publish(root, "v1")
+
+    def broken(out: Path) -> None:
+        (out / "index.faiss").write_bytes(b"partial")
+        raise RuntimeError("embedding call failed")
+
+    with pytest.raises(RuntimeError):
+        publish_index_version(root, broken)
+
+    assert current_version(root) == first.name
+    assert [p.name for p in (root / VERSIONS_DIR).iterdir()] == [first.name]
+
+
+def test_queries_never_see_a_torn_index_during_publishes(tmp_path: Path) -> None:
+    root = tmp_path / "faiss"
+    _publish(root, "v0", count=2)
+    reader = VersionedIndexReader(root, load_faiss_index, poll_interval_s=0)
+    errors: list[BaseException] = []
+    stop = threading.Event()
+
+    def query() -> None:
+        while not stop.is_set():
+            try:
+                loaded = reader.get()
+                hits = loaded.search(np.zeros(DIM), k=10)
+                assert len(hits) == loaded.index.ntotal == len(loaded.metadata)
+                assert {meta["doc_id"] for meta, _ in hits} == {loaded.metadata[0]["doc_id"]}
+            except BaseException as exc:  # noqa: BLE001 - surfaced by the assert below
+                errors.append(exc)
+
+    threads = [threading.Thread(target=query) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    try:
+        for version in range(1, 8):
+            _publish(root, f"v{version}", count=2 + version)
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+    assert errors == []
+    assert reader.get().index.ntotal == 9
+
+
+def test_legacy_unversioned_directory_still_loads(tmp_path: Path) -> None:
+    build_faiss_index(_items("legacy", 2), tmp_path)
+
+    loaded = VersionedIndexReader(tmp_path, load_faiss_index).get()
+
+    assert loaded.index_dir == tmp_path and loaded.index.ntotal == 2
+
+
+def test_shard_manager_follows_published_versions(tmp_path: Path) -> None:
+    root = tmp_path / "shards"
+    publish_index_version(root, lambda out: build_sharded_faiss_index(_items("old", 2, "LN-1"), out))
+    manager = ShardManager(root, poll_interval_s=0)
+    assert manager.search("LN-1", np.zeros(DIM), k=5)[0][0]["doc_id"] == "old"
+
+    publish_index_version(root, lambda out: build_sharded_faiss_index(_items("new", 4, "LN-1"), out))
+
+    results = manager.search("LN-1", np.zeros(DIM), k=5)
+    assert len(results) == 4 and results[0][0]["doc_id"] == "new"
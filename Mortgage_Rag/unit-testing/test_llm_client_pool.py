@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+import asyncio
+import base64
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pytest
+from openai import OpenAI
+
+from src.llm import LlmClient, LlmConcurrencyLimiter, aclose_llm_clients, close_llm_clients
+from src.usage import UsageTracker, track_usage
+
+
+class _StubOpenAIHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    connections = 0
+    lock = threading.Lock()
+
+    def setup(self) -> None:
+        super().setup()
+        with _StubOpenAIHandler.lock:
+            _StubOpenAIHandler.connections += 1
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def do_POST(self) -> None:
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        inputs = body["input"] if isinstance(body["input"], list) else [body["input"]]
+        vector = np.ones(body.get("dimensions", 4), dtype="float32")
+        if body.get("encoding_format") == "base64":
+            embedding = base64.b64encode(vector.tobytes()).decode("ascii")
+        else:
+            embedding = vector.tolist()
+        payload = json.dumps(
+            {
+                "object": "list",
+                "model": body["model"],
+                "data": [{"object": "embedding", "index": idx, "embedding": embedding} for idx in range(len(inputs))],
+                "usage": {"prompt_tokens": len(inputs), "total_tokens": len(inputs)},
+            }
+        ).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+@pytest.fixture()
+def stub_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubOpenAIHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    _StubOpenAIHandler.connections = 0
+    yield f"http://127.0.0.1:{server.server_address[1]}/v1"
+    server.shutdown()
+    server.server_close()
+    close_llm_clients()
+
+
+def test_pooled_client_reuses_connections(stub_server) -> None:
+    calls = 25
+    texts = ["Gross Pay: $3,400.00"]
+
+    start = time.perf_counter()
+    for _ in range(calls):
+        client = OpenAI(api_key="test", base_url=stub_server, max_retries=0)
+        client.embeddings.create(model="text-embedding-3-small", input=texts)
+        client.close()
+    per_call_elapsed = time.perf_counter() - start
+    per_call_connections = _StubOpenAIHandler.connections
+
+    _StubOpenAIHandler.connections = 0
+    llm = LlmClient(api_key="test", model="gpt-4o-mini", embed_model="text-embedding-3-small", base_url=stub_server)
+    start = time.perf_counter()
+    for _ in range(calls):
+        vectors = llm.embed_texts(texts)
+    pooled_elapsed = time.perf_counter() - start
+    pooled_connections = _StubOpenAIHandler.connections
+
+    print(
+        f"\nclient-per-call: {per_call_elapsed * 1000:.1f}ms / {per_call_connections} connections; "
+        f"pooled: {pooled_elapsed * 1000:.1f}ms / {pooled_connections} connections"
+    )
+    assert len(vectors) == 1
+    assert per_call_connections == calls
+    assert pooled_connections == 1
+    assert llm._client() is llm._client()
+
+
+def test_langchain_store_embeddings_are_tracked_and_batched(stub_server) -> None:
+    from langchain_community.vectorstores import FAISS
+
+    from src.langchain_embeddings import LlmClientEmbeddings
+
+    llm = LlmClient(api_key="test", model="gpt-4o-mini", embed_model="text-embedding-3-small", base_url=stub_server)
+    texts = [f"Policy chunk {idx}" for idx in range(5)]
+
+    with track_usage() as usage:
+        store = FAISS.from_texts(texts, LlmClientEmbeddings(llm, batch_size=2))
+        store.similarity_search_with_score("Maximum DTI", k=1)
+
+    (model,) = usage.report()["models"]
+    assert model["kind"] == "embedding"
+    assert model["calls"] == 4 and model["items"] == 6
+
+
+def test_embed_dimensions_are_requested_from_provider(stub_server) -> None:
+    full = LlmClient(api_key="test", model="gpt-4o-mini", embed_model="text-embedding-3-small", base_url=stub_server)
+    reduced = LlmClient(
+        api_key="test",
+        model="gpt-4o-mini",
+        embed_model="text-embedding-3-small",
+        base_url=stub_server,
+        embed_dimensions=2,
+    )
+
+    assert len(full.embed_texts(["Gross Pay"])[0]) == 4
+    assert len(reduced.embed_texts(["Gross Pay"])[0]) == 2
+
+
+def test_embedding_calls_are_accounted_per_document(stub_server) -> None:
+    llm = LlmClient(api_key="test", model="gpt-4o-mini", embed_model="text-embedding-3-small", base_url=stub_server)
+
+    with track_usage() as usage:
+        with usage.document("paystub"):
+            llm.embed_texts(["Gross Pay: $3,400.00", "Net Pay: $2,900.00"])
+        llm.embed_texts(["Form W-2"])
+    llm.embed_texts(["not tracked"])
+
+    report = usage.report()
+    (model,) = report["models"]
+    assert (model["calls"], model["items"], model["max_batch"], model["calls_saved_by_batching"]) == (2, 3, 2, 1)
+    assert model["input_tokens"] > 0
+    # The stub reports one prompt token per input; billing follows the API's numbers.
+    assert model["billed_input_tokens"] == 3
+    assert list(report["documents"]) == ["paystub"]
+    assert (report["documents"]["paystub"]["calls"], report["documents"]["paystub"]["input_tokens"]) == (1, 2)
+
+
+def test_concurrency_limiter_caps_in_flight_calls() -> None:
+    limiter = LlmConcurrencyLimiter(2)
+    in_flight = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def work() -> None:
+        nonlocal in_flight, peak
+        with limiter:
+            with lock:
+                in_flight += 1
+                peak = max(peak, in_flight)
+            time.sleep(0.01)
+            with lock:
+                in_flight -= 1
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert peak == 2
+
+
+def test_cancelled_async_acquire_does_not_leak_a_slot() -> None:
+    limiter = LlmConcurrencyLimiter(1)
+
+    async def scenario() -> None:
+        limiter.__enter__()
+        waiter = asyncio.create_task(limiter.__aenter__())
+        await asyncio.sleep(0.05)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        limiter.__exit__(None, None, None)
+        await asyncio.sleep(0.05)
+
+    asyncio.run(scenario())
+    assert limiter._semaphore.acquire(timeout=1)
+
+
+def test_async_clients_are_scoped_to_their_event_loop(stub_server) -> None:
+    llm = LlmClient(api_key="test", model="gpt-4o-mini", embed_model="text-embedding-3-small", base_url=stub_server)
+
+    async def embed_and_close() -> object:
+        vectors = await llm.aembed_texts(["Gross Pay"])
+        assert len(vectors) == 1
+        client = llm._async_client()
+        await aclose_llm_clients()
+        assert client.is_closed()
+        return client
+
+    first = asyncio.run(embed_and_close())
+    second = asyncio.run(embed_and_close())
+    assert first is not second
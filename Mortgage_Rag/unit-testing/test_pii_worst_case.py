@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import random
+import time
+
+import pytest
+
+from src.pii import _PII_PATTERNS, contains_pii, detect_pii, redact_pii
+
+# Linear matching scans these inputs at <=2.5 s/MB; the budget allows 2x that. The
+# previous, quadratic ADDRESS pattern needed ~50s for 40KB of "1 1 1 ...".
+MAX_SECONDS_PER_MB = 5.0
+INPUT_BYTES = 128 * 1024
+
+_ADVERSARIAL = {
+    "address_digits": "1 ",
+    "address_letters": "1 a ",
+    "address_words": "12 Main Main Main ",
+    "address_spaces": "1" + " " * 30,
+    "address_newlines": "12 Main\n\n\n\n",
+    "email_local_dots": "a.",
+    "email_domain_dots": "a@" + "a.",
+    "ssn_label_spaces": "SSN ",
+    "digit_runs": "1234567890 ",
+}
+
+
+def _repeat(unit: str, size: int) -> str:
+    return (unit * (size // len(unit) + 1))[:size]
+
+
+def _garble(seed: int, size: int) -> str:
+    # OCR-like noise dense in the characters the patterns care about.
+    rng = random.Random(seed)
+    alphabet = "0123456789     ..--@@::/()abcxyzSSNStreetWayAveDr\n"
+    return "".join(rng.choice(alphabet) for _ in range(size))
+
+
+def _seconds_per_mb(func, text: str) -> float:
+    start = time.perf_counter()
+    func(text)
+    return (time.perf_counter() - start) / len(text) * 1024 * 1024
+
+
+@pytest.mark.parametrize("func", [detect_pii, redact_pii])
+@pytest.mark.parametrize("case", sorted(_ADVERSARIAL))
+def test_adversarial_input_scans_within_budget(case: str, func) -> None:
+    text = _repeat(_ADVERSARIAL[case], INPUT_BYTES)
+
+    assert _seconds_per_mb(func, text) < MAX_SECONDS_PER_MB
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_garbled_input_scans_within_budget(seed: int) -> None:
+    text = _garble(seed, INPUT_BYTES)
+
+    assert _seconds_per_mb(detect_pii, text) < MAX_SECONDS_PER_MB
+    assert _seconds_per_mb(redact_pii, text) < MAX_SECONDS_PER_MB
+
+
+def test_scan_time_grows_linearly() -> None:
+    patterns = dict(_PII_PATTERNS)
+    for label, unit in (("ADDRESS", "1 "), ("ADDRESS", "1 a "), ("EMAIL", "a.")):
+        small = _repeat(unit, INPUT_BYTES // 2)
+        large = _repeat(unit, INPUT_BYTES * 2)
+        timings = []
+        for text in (small, large):
+            start = time.perf_counter()
+            patterns[label].findall(text)
+            timings.append(time.perf_counter() - start)
+        # 4x the input: ~4x the time when linear, ~16x when quadratic.
+        assert timings[1] < timings[0] * 10 + 0.05, label
+
+
+@pytest.mark.parametrize(
+    "text,label,expected",
+    [
+        ("Property: 1234 Oak Ridge Drive, Austin TX", "ADDRESS", "1234 Oak Ridge Drive"),
+        ("lives at 12 N. Main St. Apt 4", "ADDRESS", "12 N. Main St"),
+        ("500 Martin Luther King Jr Blvd", "ADDRESS", "500 Martin Luther King Jr Blvd"),
+        ("42 Elm  Street", "ADDRESS", "42 Elm  Street"),
+        ("Address: 1234        Oak Ridge        Drive", "ADDRESS", "1234        Oak Ridge        Drive"),
+        ("1234 Oak\n\n\n\n\nRidge Drive", "ADDRESS", "1234 Oak\n\n\n\n\nRidge Drive"),
+        (
+            "1234 Old Mill Creek Farm Road Extension North Lane",
+            "ADDRESS",
+            "1234 Old Mill Creek Farm Road Extension North Lane",
+        ),
+        ("Mail john.doe@example.com.", "EMAIL", "john.doe@example.com"),
+        ("cc a.b-c@mail.sub.example.co.uk, thanks", "EMAIL", "a.b-c@mail.sub.example.co.uk"),
+        ("SSN:  123456789", "SSN", "SSN:  123456789"),
+        ("SSN:            123456789", "SSN", "SSN:            123456789"),
+    ],
+)
+def test_hardened_patterns_still_match(text: str, label: str, expected: str) -> None:
+    assert (label, expected) in {(match.label, match.value) for match in detect_pii(text)}
+
+
+def test_garbled_input_redacts_everything_detected() -> None:
+    text = _garble(99, 20_000)
+
+    redacted = redact_pii(text)
+
+    assert not contains_pii(redacted)
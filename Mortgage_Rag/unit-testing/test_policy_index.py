@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import re
+import zlib
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from src.policy_index import RULE_QUERIES, build_policy_index, load_policy_index
+from src.underwriting_agents import run_underwriting_workflow
+from src.usage import UsageTracker, track_usage
+
+DIM = 64
+
+
+def _embed(text: str) -> list[float]:
+    vector = np.zeros(DIM, dtype="float32")
+    for token in re.findall(r"[a-z]+", text.lower()):
+        vector[zlib.crc32(token.encode("utf-8")) % DIM] += 1.0
+    norm = np.linalg.norm(vector)
+    return (vector / norm if norm else vector).tolist()
+
+
+def _embed_texts(texts: list[str]) -> list[list[float]]:
+    return [_embed(text) for text in texts]
+
+
+@pytest.fixture()
+def policy_dir(tmp_path: Path) -> Path:
+    corpus = tmp_path / "policies"
+    corpus.mkdir()
+    (corpus / "credit.txt").write_text("Minimum credit score requirement for mortgage eligibility is 620.")
+    (corpus / "dti.txt").write_text("Maximum debt-to-income ratio DTI limit is 43 percent.")
+    (corpus / "ltv.txt").write_text("Maximum loan-to-value ratio LTV limit is 80 percent without mortgage insurance.")
+    (corpus / "employment.txt").write_text("Employment history tenure stability requirement is two years.")
+    index_dir = tmp_path / "index"
+    build_policy_index(sorted(corpus.glob("*.txt")), index_dir, embed_texts=_embed_texts, k=2)
+    return index_dir
+
+
+def test_rule_citations_are_precomputed(policy_dir: Path) -> None:
+    index = load_policy_index(policy_dir)
+
+    assert index is not None
+    assert index.rules == list(RULE_QUERIES)
+    assert index.citations_for("Maximum DTI")[0]["source"] == "dti.txt"
+    assert index.citations_for("Maximum LTV")[0]["source"] == "ltv.txt"
+    assert all(c["rule"] == "Minimum credit score" for c in index.citations_for("Minimum credit score"))
+
+
+def test_workflow_uses_index_without_live_search(policy_dir: Path) -> None:
+    index = load_policy_index(policy_dir)
+
+    result = run_underwriting_workflow(
+        query="Batch underwriting assessment",
+        borrower_documents=[{"name": "paystub.pdf", "text": "Gross Pay: $4000\nCredit Score: 700"}],
+        policy_vector_store=None,
+        policy_index=index,
+    )
+
+    citations = result.output["policy_citations"]
+    assert {c["rule"] for c in citations} == set(RULE_QUERIES)
+    assert "Policy retrieval unavailable; refer for manual policy verification" not in result.output["risk_factors"]
+
+
+def test_free_form_query_searches_mapped_index(policy_dir: Path) -> None:
+    index = load_policy_index(policy_dir, embed_query=_embed)
+
+    results = index.similarity_search_with_score("LTV without mortgage insurance", k=1)
+
+    assert results[0][0].metadata["source"] == "ltv.txt"
+
+
+def test_missing_index_returns_none(tmp_path: Path) -> None:
+    assert load_policy_index(tmp_path / "absent") is None
+
+
+def test_precomputed_rule_citations_are_recorded_as_avoided_embeddings(policy_dir: Path) -> None:
+    with track_usage(UsageTracker(embed_model="text-embedding-3-small")) as usage:
+        run_underwriting_workflow(
+            query="Batch underwriting assessment",
+            borrower_documents=[{"name": "paystub.pdf", "text": "Gross Pay: $4000"}],
+            policy_vector_store=None,
+            policy_index=load_policy_index(policy_dir),
+        )
+
+    (model,) = usage.report()["models"]
+    assert model["model"] == "text-embedding-3-small" and model["calls"] == 0
+    assert model["cache_hits"] == len(RULE_QUERIES) and model["avoided_tokens"] > 0
@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import pickle
+
+import pytest
+
+import src.pii as pii
+from src.guardrails import OutputGuardrails, apply_output_guardrails
+from src.pii import RedactedText, ensure_redacted, is_verified_redacted, redact_pii, restore_provenance
+
+
+def test_redact_pii_returns_verified_text() -> None:
+    redacted = redact_pii("Applicant SSN: 123-45-6789, email jane@example.com")
+
+    assert isinstance(redacted, RedactedText)
+    assert redacted.ruleset_version == pii.REDACTION_RULESET_VERSION
+    assert "[SSN_REDACTED]" in redacted
+    assert "[EMAIL_REDACTED]" in redacted
+
+
+def test_verified_text_skips_rescanning(monkeypatch) -> None:
+    redacted = redact_pii("Routing Number: 021000021")
+    scans = []
+    monkeypatch.setattr(pii, "contains_pii", lambda text: scans.append(text) or False)
+
+    assert ensure_redacted(redacted) is redacted
+    assert redact_pii(redacted) is redacted
+    assert apply_output_guardrails([redacted])[0] == [redacted]
+    assert scans == []
+
+
+def test_unverified_input_hard_fails_when_pii_survives(monkeypatch) -> None:
+    monkeypatch.setattr(pii, "contains_pii", lambda text: True)
+
+    with pytest.raises(ValueError, match="PII detected after redaction"):
+        ensure_redacted("Applicant SSN: 123-45-6789")
+
+
+def test_stale_or_edited_text_loses_provenance() -> None:
+    redacted = redact_pii("Phone: (555) 123-4567")
+
+    assert not is_verified_redacted(RedactedText(str(redacted), ruleset_version="old"))
+    assert not is_verified_redacted(redacted + " 123-45-6789")
+    assert is_verified_redacted(redacted.derive(redacted[:10]))
+    assert is_verified_redacted(pickle.loads(pickle.dumps(redacted)))
+
+
+def test_derive_rescans_slices_that_cut_through_a_token() -> None:
+    redacted = redact_pii("Ref 1234-56-78901 filed")
+    assert is_verified_redacted(redacted)
+
+    cut = redacted.derive(redacted[5:16])
+    assert "234-56-7890" not in cut
+    assert "[SSN_REDACTED]" in cut
+    assert is_verified_redacted(cut)
+
+    assert is_verified_redacted(redacted.derive(redacted[4:17]))
+    assert is_verified_redacted(redacted.derive(redacted.replace(" ", "\n")))
+
+
+def test_restore_provenance_requires_matching_ruleset() -> None:
+    assert is_verified_redacted(restore_provenance("chunk", pii.REDACTION_RULESET_VERSION))
+    assert not is_verified_redacted(restore_provenance("chunk", "old"))
+    assert not is_verified_redacted(restore_provenance("chunk", None))
+
+
+def test_sanitize_result_strips_scripts_before_redacting() -> None:
+    sanitized = OutputGuardrails.sanitize_result("SSN 123-45-<script>6789")
+
+    assert "6789" not in sanitized
+    assert "<script>" not in sanitized
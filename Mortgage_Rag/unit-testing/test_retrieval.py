@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import re
+import zlib
+
+import numpy as np
+import pytest
+from langchain_community.vectorstores import FAISS
+from langchain_community.vectorstores.utils import DistanceStrategy
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from src.policy_index import RULE_QUERIES
+from src.retrieval import batch_similarity_search_with_score
+from src.underwriting_agents import run_underwriting_workflow
+
+DIM = 64
+
+POLICIES = {
+    "credit.txt": "Minimum credit score requirement for mortgage eligibility is 620.",
+    "dti.txt": "Maximum debt-to-income ratio DTI limit is 43 percent.",
+    "ltv.txt": "Maximum loan-to-value ratio LTV limit is 80 percent without mortgage insurance.",
+    "employment.txt": "Employment history tenure stability requirement is two years.",
+    "docs.txt": "Required documentation includes pay stubs, bank statements, tax returns and ID.",
+}
+
+
+class HashEmbeddings(Embeddings):
+    def __init__(self) -> None:
+        self.document_calls = 0
+        self.query_calls = 0
+
+    @staticmethod
+    def _embed(text: str) -> list[float]:
+        vector = np.zeros(DIM, dtype="float32")
+        for token in re.findall(r"[a-z]+", text.lower()):
+            vector[zlib.crc32(token.encode("utf-8")) % DIM] += 1.0
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        self.document_calls += 1
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        self.query_calls += 1
+        return self._embed(text)
+
+
+class CountingIndex:
+    def __init__(self, index) -> None:
+        self.index = index
+        self.searches = 0
+
+    def search(self, *args, **kwargs):
+        self.searches += 1
+        return self.index.search(*args, **kwargs)
+
+    def __getattr__(self, name: str):
+        return getattr(self.index, name)
+
+
+def _store(**kwargs) -> tuple[FAISS, HashEmbeddings]:
+    embeddings = HashEmbeddings()
+    documents = [Document(page_content=text, metadata={"source": name, "chunk": 0}) for name, text in POLICIES.items()]
+    store = FAISS.from_documents(documents, embeddings, **kwargs)
+    embeddings.document_calls = 0
+    return store, embeddings
+
+
+@pytest.mark.parametrize(
+    "store_kwargs",
+    [{}, {"normalize_L2": True}, {"distance_strategy": DistanceStrategy.MAX_INNER_PRODUCT}],
+)
+def test_langchain_faiss_batch_matches_single_searches(store_kwargs: dict) -> None:
+    store, embeddings = _store(**store_kwargs)
+    store.index = counting = CountingIndex(store.index)
+    queries = list(RULE_QUERIES.values())
+
+    batched = batch_similarity_search_with_score(store, queries, k=2)
+
+    # One embedding call and one FAISS search for every query, not one per query.
+    assert embeddings.document_calls == 1 and embeddings.query_calls == 0
+    assert counting.searches == 1
+    for query, hits in zip(queries, batched):
+        single = store.similarity_search_with_score(query, k=2)
+        assert [doc.metadata["source"] for doc, _ in hits] == [doc.metadata["source"] for doc, _ in single]
+        np.testing.assert_allclose([score for _, score in hits], [float(score) for _, score in single], rtol=1e-5)
+
+
+def test_workflow_cites_each_rule_from_the_policy_store() -> None:
+    store, embeddings = _store()
+
+    result = run_underwriting_workflow(
+        query="Batch underwriting assessment",
+        borrower_documents=[{"name": "paystub.pdf", "text": "Gross Pay: $4000\nCredit Score: 700"}],
+        policy_vector_store=store,
+    )
+
+    citations = result.output["policy_citations"]
+    assert embeddings.document_calls == 1 and embeddings.query_calls == 0
+    assert {c["source"] for c in citations} == set(POLICIES)
+    # Deduplicated within each rule only; overlapping rules each keep their passages.
+    assert len({(c.get("rule"), c["source"], c["section"]) for c in citations}) == len(citations)
+    assert {c.get("rule") for c in citations} >= {"Maximum DTI", "Maximum LTV", "Minimum credit score"}
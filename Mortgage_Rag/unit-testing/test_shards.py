@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from src.embedding import EmbeddingItem
+from src.shards import ShardManager, build_sharded_faiss_index, shard_dirname
+
+
+def _items(loan_id: str, count: int, offset: float) -> list[EmbeddingItem]:
+    return [
+        EmbeddingItem(
+            doc_id=f"{loan_id}-doc",
+            chunk_id=idx,
+            text=f"{loan_id} chunk {idx}",
+            vector=np.full(8, offset + idx, dtype="float32"),
+            shard_key=loan_id,
+        )
+        for idx in range(count)
+    ]
+
+
+@pytest.fixture()
+def shards_root(tmp_path: Path) -> Path:
+    root = tmp_path / "shards"
+    build_sharded_faiss_index(_items("LN-1", 3, 0.0) + _items("LN-2", 3, 0.0) + _items("LN-3", 3, 0.0), root)
+    return root
+
+
+def test_scoped_search_only_sees_own_loan(shards_root: Path) -> None:
+    manager = ShardManager(shards_root)
+
+    results = manager.search("LN-2", np.zeros(8, dtype="float32"), k=10)
+
+    assert len(results) == 3
+    assert {meta["doc_id"] for meta, _ in results} == {"LN-2-doc"}
+    assert results[0][0]["chunk_id"] == 0
+
+
+def test_lru_respects_byte_budget(shards_root: Path) -> None:
+    one_shard = ShardManager(shards_root).get("LN-1").nbytes
+    manager = ShardManager(shards_root, max_bytes=int(one_shard * 2.5))
+
+    manager.get("LN-1")
+    manager.get("LN-2")
+    manager.get("LN-1")
+    manager.get("LN-3")
+
+    stats = manager.stats()
+    assert stats["loaded_shards"] == 2
+    assert stats["evictions"] == 1
+    assert stats["loaded_bytes"] <= manager.max_bytes
+    manager.get("LN-1")
+    assert manager.stats()["hits"] == 2
+
+
+def test_unknown_loan_raises(shards_root: Path) -> None:
+    manager = ShardManager(shards_root)
+
+    assert not manager.has_shard("LN-404")
+    with pytest.raises(KeyError):
+        manager.get("LN-404")
+
+
+def test_shard_dirname_is_path_safe() -> None:
+    name = shard_dirname("../../etc/passwd")
+
+    assert "/" not in name and not name.startswith(".")
+    assert shard_dirname("loan a") != shard_dirname("loan-a")
+
+
+def test_sharded_pipeline_underwrites_each_loan_on_its_own_shard(tmp_path: Path) -> None:
+    import json
+
+    from src.pipeline import _run_documents
+    from test_stages import _minimal_pdf
+    from test_watch import _HashEmbedder, _settings
+
+    settings = _settings(tmp_path, faiss_layout="sharded", shard_cache_bytes=1)
+    for loan_id, lines in {"LN-1": ["Credit Score: 700"], "LN-2": ["Form W-2 Wages: $52000"]}.items():
+        (settings.data_dir / loan_id).mkdir()
+        (settings.data_dir / loan_id / f"{loan_id.lower()}.pdf").write_bytes(_minimal_pdf(lines))
+
+    _run_documents(settings, sorted(settings.data_dir.glob("*/*.pdf")), _HashEmbedder(), True, None)
+
+    for loan_id, credit_score in (("LN-1", 700.0), ("LN-2", "MISSING")):
+        output = json.loads((settings.output_dir / loan_id / "underwriting_recommendation.json").read_text())
+        # First-match fields and citations come from this loan's documents only.
+        assert output["profile"]["credit_score"] == credit_score
+        assert output["policy_citations"]
+        assert {citation["source"] for citation in output["policy_citations"]} == {f"{loan_id.lower()}.pdf"}
@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import json
+import math
+import time
+from pathlib import Path
+
+import pytest
+
+from src import pipeline
+from src.config import Settings
+from src.pii import RedactionError
+from src.pipeline import run_pipeline
+from src.stages import Stage, StagedPipeline
+
+
+def _minimal_pdf(lines: list[str]) -> bytes:
+    content = "BT /F1 12 Tf 72 720 Td 14 TL " + " ".join(f"({line}) '" for line in lines) + " ET"
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        "<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R "
+        "/Resources << /Font << /F1 5 0 R >> >> >>",
+        f"<< /Length {len(content)} >>\nstream\n{content}\nendstream",
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    out = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n".encode()
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += b"".join(f"{offset:010d} 00000 n \n".encode() for offset in offsets)
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return out
+
+
+def _sleep_then(value: int, seconds: float) -> int:
+    time.sleep(seconds)
+    return value
+
+
+def test_stages_overlap_instead_of_adding_up() -> None:
+    staged = StagedPipeline(
+        [
+            Stage("a", lambda x: _sleep_then(x, 0.05)),
+            Stage("b", lambda x: _sleep_then(x, 0.05)),
+            Stage("c", lambda x: _sleep_then(x, 0.05)),
+        ]
+    )
+
+    results = sorted(staged.run(range(10)))
+
+    assert results == list(range(10))
+    # Serial execution would take ~1.5s; pipelined it approaches one stage (~0.5s).
+    assert staged.wall_s < 1.0
+    assert [row["items"] for row in staged.report()] == [10, 10, 10]
+
+
+def test_bounded_queues_apply_backpressure() -> None:
+    staged = StagedPipeline([Stage("fast", lambda x: x), Stage("slow", lambda x: _sleep_then(x, 0.01))], queue_size=2)
+
+    assert len(list(staged.run(range(30)))) == 30
+    assert all(row["max_queue_depth"] <= 2 for row in staged.report())
+    assert staged.report()[1]["utilisation"] > 0.5
+
+
+def test_process_stage_and_error_propagation() -> None:
+    assert sorted(StagedPipeline([Stage("sqrt", math.sqrt, workers=2, kind="process")]).run([4, 9])) == [2.0, 3.0]
+
+    with pytest.raises(RuntimeError, match="stage 'sqrt' failed"):
+        list(StagedPipeline([Stage("sqrt", math.sqrt, workers=2)]).run([4, -1, 9]))
+
+
+def test_ordered_stage_and_run_restore_input_order() -> None:
+    # Later items finish first on the parallel stage.
+    shuffle = Stage("shuffle", lambda x: _sleep_then(x, 0.05 - x * 0.004), workers=4)
+    seen: list[int] = []
+    staged = StagedPipeline([shuffle, Stage("collect", lambda x: seen.append(x) or x, ordered=True)])
+
+    assert list(staged.run(range(10))) == list(range(10))
+    assert seen == list(range(10))
+    assert list(StagedPipeline([shuffle]).run(range(10), ordered=True)) == list(range(10))
+
+    with pytest.raises(ValueError, match="single worker"):
+        StagedPipeline([Stage("collect", lambda x: x, workers=2, ordered=True)])
+
+
+def test_run_pipeline_with_process_workers(tmp_path: Path) -> None:
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    (data_dir / "paystub.pdf").write_bytes(_minimal_pdf(["Gross Pay: $4000", "SSN 123-45-6789"]))
+    (data_dir / "w2.pdf").write_bytes(_minimal_pdf(["Form W-2 Wages: $52000"]))
+    settings = Settings(
+        data_dir=data_dir,
+        output_dir=tmp_path / "output",
+        faiss_dir=tmp_path / "faiss",
+        openai_api_key=None,
+        openai_model="gpt-4o-mini",
+        openai_embed_model="text-embedding-3-small",
+        chunk_size=800,
+        chunk_overlap=120,
+        min_credit_score=620,
+        max_dti=43,
+        max_ltv=80,
+        min_employment_months=24,
+        extract_workers=2,
+    )
+
+    run_pipeline(settings)
+
+    paystub = json.loads((settings.output_dir / "paystub.json").read_text())
+    assert "123-45-6789" not in paystub["redacted_text"]
+    assert (settings.output_dir / "w2.json").exists()
+    assert (settings.output_dir / "underwriting_recommendation.json").exists()
+    # No API key, so no calls; the usage report is still written for the run.
+    assert json.loads((settings.output_dir / "usage.json").read_text())["totals"]["calls"] == 0
+
+
+def test_run_pipeline_skips_documents_whose_redaction_fails(tmp_path: Path, monkeypatch) -> None:
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    (data_dir / "paystub.pdf").write_bytes(_minimal_pdf(["Gross Pay: $4000"]))
+    (data_dir / "w2.pdf").write_bytes(_minimal_pdf(["Form W-2 Wages: $52000"]))
+    settings = Settings(
+        data_dir=data_dir,
+        output_dir=tmp_path / "output",
+        faiss_dir=tmp_path / "faiss",
+        openai_api_key=None,
+        openai_model="gpt-4o-mini",
+        openai_embed_model="text-embedding-3-small",
+        chunk_size=800,
+        chunk_overlap=120,
+        min_credit_score=620,
+        max_dti=43,
+        max_ltv=80,
+        min_employment_months=24,
+    )
+    ensure_redacted = pipeline.ensure_redacted
+
+    def fail_on_w2(text: str):
+        if "W-2" in text:
+            raise RedactionError("PII detected after redaction")
+        return ensure_redacted(text)
+
+    monkeypatch.setattr(pipeline, "ensure_redacted", fail_on_w2)
+
+    run_pipeline(settings)
+
+    assert (settings.output_dir / "paystub.json").exists()
+    assert not (settings.output_dir / "w2.json").exists()
+    assert (settings.output_dir / "underwriting_recommendation.json").exists()
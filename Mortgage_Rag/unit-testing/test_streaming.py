@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import faiss
+import numpy as np
+
+from src.embedding import EmbeddingItem, build_faiss_index
+from src.pii import redact_pii
+from src.streaming import IncrementalIndexWriter, SpooledDocuments
+from src.underwriting_agents import run_underwriting_workflow
+
+DIM = 16
+
+
+def _items(doc_id: str, count: int, seed: int) -> list[EmbeddingItem]:
+    rng = np.random.default_rng(seed)
+    return [
+        EmbeddingItem(doc_id=doc_id, chunk_id=idx, text=redact_pii(f"{doc_id} chunk {idx}"), vector=rng.random(DIM).tolist())
+        for idx in range(count)
+    ]
+
+
+def test_streamed_index_matches_in_memory_build(tmp_path: Path) -> None:
+    batches = [_items("paystub", 5, 1), _items("w2", 7, 2), _items("bank", 3, 3)]
+    writer = IncrementalIndexWriter(tmp_path / "spool")
+    for batch in batches:
+        writer.add(batch)
+    streamed_path = writer.finalize(tmp_path / "streamed")
+    reference_path = build_faiss_index([item for batch in batches for item in batch], tmp_path / "reference")
+
+    streamed = faiss.read_index(str(streamed_path))
+    reference = faiss.read_index(str(reference_path))
+    queries = np.random.default_rng(9).random((4, DIM)).astype("float32")
+
+    assert streamed.ntotal == reference.ntotal == 15
+    np.testing.assert_array_equal(streamed.search(queries, 5)[1], reference.search(queries, 5)[1])
+    assert json.loads((tmp_path / "streamed" / "metadata.json").read_text()) == json.loads(
+        (tmp_path / "reference" / "metadata.json").read_text()
+    )
+
+
+def test_spilled_vector_store_reads_chunks_back(tmp_path: Path) -> None:
+    items = _items("paystub", 6, 4)
+    writer = IncrementalIndexWriter(tmp_path / "spool")
+    writer.add(items)
+    store = writer.as_vector_store(writer.finalize(tmp_path / "out"), embed_query=lambda _: items[3].vector)
+
+    chunk, score = store.similarity_search_with_score("anything", k=1)[0]
+
+    assert chunk.page_content == "paystub chunk 3"
+    assert chunk.metadata["source"] == "paystub.pdf" and chunk.metadata["chunk"] == 3
+    assert score == 0.0
+
+
+def test_spooled_documents_feed_underwriting(tmp_path: Path) -> None:
+    documents = SpooledDocuments(tmp_path / "docs")
+    documents.append({"name": "paystub.pdf", "text": "Gross Pay: $4000\nCredit Score: 700"})
+    documents.append({"name": "w2.pdf", "text": "Form W-2 Wages: $52000"})
+
+    assert len(documents) == 2
+    assert [doc["name"] for doc in documents] == ["paystub.pdf", "w2.pdf"]
+    result = run_underwriting_workflow(
+        query="Batch underwriting assessment",
+        borrower_documents=documents,
+        policy_vector_store=None,
+    )
+    assert result.output["decision"]
@@ -1,8 +1,12 @@
 from __future__ import annotations
 
+from collections import Counter
 from dataclasses import dataclass
 
-from src.underwriting_agents import run_underwriting_workflow
+import pytest
+
+from src import underwriting_agents
+from src.underwriting_agents import assess_borrower_documents, document_set_key, run_underwriting_workflow
 
 
 @dataclass
@@ -78,3 +82,52 @@ def test_hard_rule_fail_can_decline_recommendation() -> None:
     hard_rules = result.output["hard_rules"]
     assert any(rule["type"] == "HARD" for rule in hard_rules)
     assert len(result.output["policy_citations"]) >= 1
+
+
+PACKAGE = [
+    {"name": "paystub_jan.pdf", "text": "Borrower: Jane Doe\nGross Pay: $4000\nNet Pay: $3000\nCredit Score: 700"},
+    {"name": "bank_statement.pdf", "text": "Bank statement period Jan-Feb\nMonthly Debt: $1200"},
+]
+
+
+@pytest.fixture()
+def agent_calls(monkeypatch):
+    """Counts calls to the document-assessment agents in the graphs the workflow actually builds."""
+    calls: Counter[str] = Counter()
+    for name in ("_document_analysis_agent", "_income_risk_analysis_agent", "_rules_engine_agent"):
+        agent = getattr(underwriting_agents, name)
+
+        def counted(state, name=name, agent=agent):
+            calls[name] += 1
+            return agent(state)
+
+        monkeypatch.setattr(underwriting_agents, name, counted)
+    # Compiled graphs are cached with whatever agent functions existed when they were built.
+    underwriting_agents._build_graph.cache_clear()
+    yield calls
+    underwriting_agents._build_graph.cache_clear()
+
+
+def test_precomputed_assessment_matches_full_workflow(agent_calls) -> None:
+    thresholds = {"min_credit_score": 640.0, "max_dti": 40.0, "max_ltv": 80.0, "min_employment_months": 24.0}
+    full = run_underwriting_workflow("Is DTI within policy?", PACKAGE, MockVectorStore(), thresholds=thresholds)
+    assert agent_calls["_document_analysis_agent"] == 1
+    assessment = assess_borrower_documents(PACKAGE, thresholds)
+    assert agent_calls["_document_analysis_agent"] == 2
+
+    agent_calls.clear()
+    cached = run_underwriting_workflow(
+        "Is DTI within policy?", PACKAGE, MockVectorStore(), thresholds=thresholds, assessment=assessment
+    )
+
+    assert not agent_calls, "document assessment reran despite a cached assessment"
+    assert cached.output == full.output
+    assert cached.summary_markdown == full.summary_markdown
+
+
+def test_document_set_key_tracks_content_and_order() -> None:
+    key = document_set_key(PACKAGE)
+
+    assert key == document_set_key([dict(item) for item in PACKAGE])
+    assert key != document_set_key(list(reversed(PACKAGE)))
+    assert key != document_set_key([PACKAGE[0], {**PACKAGE[1], "text": "Bank statement period Mar"}])
@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+import pytest
+
+from src import usage as usage_module
+from src.usage import UsageTracker, count_tokens, estimate_cost_usd
+
+
+def test_cost_and_savings_per_model() -> None:
+    tracker = UsageTracker(embed_model="text-embedding-3-small")
+
+    tracker.record_call("embedding", "text-embedding-3-small", ["a b c"] * 4, reported_input_tokens=1_000_000)
+    tracker.record_call("chat", "gpt-4o-mini", ["system", "user"], output_text="answer", reported_input_tokens=2_000_000, reported_output_tokens=1_000_000)
+    tracker.record_avoided("embedding", ["cached chunk text"] * 3)
+
+    report = tracker.report()
+    by_kind = {model["kind"]: model for model in report["models"]}
+    assert by_kind["embedding"]["cost_usd"] == pytest.approx(0.02)
+    assert by_kind["chat"]["cost_usd"] == pytest.approx(0.15 * 2 + 0.60)
+    assert by_kind["embedding"]["cache_hits"] == 3 and by_kind["embedding"]["avoided_calls"] == 1
+    assert by_kind["embedding"]["saved_usd"] == pytest.approx(
+        estimate_cost_usd("text-embedding-3-small", 3 * count_tokens("cached chunk text", "text-embedding-3-small"))
+    )
+    assert report["totals"]["calls"] == 2 and report["totals"]["cost_usd"] == pytest.approx(0.92)
+    assert tracker.metrics()['llm_chat_calls{model="gpt-4o-mini"}'] == 1
+    assert "## API Usage" in tracker.summary_markdown()
+
+
+def test_token_count_falls_back_to_estimate_without_tiktoken(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(usage_module, "_encoding", lambda model: None)
+
+    assert count_tokens("x" * 10, "text-embedding-3-small") == 3
+    assert usage_module.token_counter_name("text-embedding-3-small") == "estimate"
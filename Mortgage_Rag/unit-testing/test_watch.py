@@ -0,0 +1,231 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from src.config import Settings
+from src.embedding import EmbeddingItem, IndexCompression, append_faiss_index, build_faiss_index, load_faiss_index
+from src.index_versions import VERSIONS_DIR, resolve_index_dir
+from src.shards import ShardManager, shard_dirname
+from src.watch import FailedDocuments, MicroBatcher, PdfWatcher, RetryQueue, StagingIndex, run_watch
+from test_stages import _minimal_pdf
+
+DIM = 8
+
+
+class _HashEmbedder:
+    def embed_texts(self, texts) -> list[list[float]]:
+        return [list(np.frombuffer(hashlib.sha256(text.encode()).digest()[: DIM * 4], dtype="uint32") / 2**32) for text in texts]
+
+
+def _settings(tmp_path: Path, **overrides) -> Settings:
+    data_dir = tmp_path / "data"
+    data_dir.mkdir(exist_ok=True)
+    return Settings(
+        data_dir=data_dir,
+        output_dir=tmp_path / "output",
+        faiss_dir=tmp_path / "faiss",
+        openai_api_key=None,
+        openai_model="gpt-4o-mini",
+        openai_embed_model="text-embedding-3-small",
+        chunk_size=40,
+        chunk_overlap=0,
+        min_credit_score=620,
+        max_dti=43,
+        max_ltv=80,
+        min_employment_months=24,
+        extract_workers=1,
+        **overrides,
+    )
+
+
+def _items(doc_id: str, count: int) -> list[EmbeddingItem]:
+    return [
+        EmbeddingItem(doc_id=doc_id, chunk_id=idx, text=f"{doc_id} {idx}", vector=np.full(DIM, idx, dtype="float32"))
+        for idx in range(count)
+    ]
+
+
+def test_micro_batcher_closes_on_size_or_age() -> None:
+    batcher = MicroBatcher(max_size=3, max_wait_s=2.0)
+    batcher.add([(Path("a.pdf"), 0.0), (Path("b.pdf"), 0.5)])
+
+    assert batcher.take(now=1.0) == []
+    assert [path.name for path, _ in batcher.take(now=2.0)] == ["a.pdf", "b.pdf"]
+
+    batcher.add((Path(f"{idx}.pdf"), 3.0) for idx in range(5))
+    assert len(batcher.take(now=3.0)) == 3
+    assert len(batcher) == 2 and batcher.oldest_age(now=4.0) == 1.0
+
+
+def test_retry_queue_backs_off_until_success_or_newer_copy(tmp_path: Path) -> None:
+    bad, good = tmp_path / "bad.pdf", tmp_path / "good.pdf"
+    bad.write_bytes(b"%PDF"), good.write_bytes(b"%PDF")
+    retries = RetryQueue(base_delay_s=1.0, max_delay_s=3.0)
+
+    assert retries.fail([(bad, 0.0), (good, 0.5)], now=10.0) == 1.0
+    assert retries.take_due(now=10.5) == []
+    assert retries.take_due(now=11.0) == [(bad, 0.0), (good, 0.5)]
+    retries.succeeded([(good, 0.5)])
+    # Each further failure doubles the wait, up to the cap.
+    assert [retries.fail([(bad, 0.0)], now=now) for now in (11.0, 13.0, 16.0)] == [2.0, 3.0, 3.0]
+    assert len(retries) == 1 and retries.take_due(now=18.9) == []
+
+    retries.discard([bad])
+    assert len(retries) == 0 and retries.take_due(now=100.0) == []
+    retries.fail([(bad, 0.0)], now=0.0)
+    bad.unlink()
+    assert retries.take_due(now=100.0) == [] and len(retries) == 0
+
+
+def test_documents_failing_every_attempt_are_parked_until_replaced(tmp_path: Path) -> None:
+    settings = _settings(tmp_path)
+    pdf = settings.data_dir / "corrupt.pdf"
+    pdf.write_bytes(b"not a pdf")
+    retries = RetryQueue(base_delay_s=1.0, max_attempts=3)
+    failed = FailedDocuments(settings.output_dir)
+
+    assert retries.fail([(pdf, 0.0)], now=0.0) == 1.0
+    assert retries.fail(retries.take_due(now=1.0), now=1.0) == 2.0
+    assert retries.fail(retries.take_due(now=3.0), now=3.0) == 0.0
+    assert len(retries) == 0 and retries.take_due(now=100.0) == []
+    for path, attempts in retries.take_exhausted():
+        failed.add(path, attempts)
+    assert retries.take_exhausted() == []
+
+    # Parked across restarts: a fresh watcher skips the file until it changes.
+    reloaded = FailedDocuments(settings.output_dir)
+    assert len(reloaded) == 1
+    watcher = PdfWatcher(settings, failed=reloaded)
+    assert watcher.poll(now=0.0) == [] and watcher.poll(now=1.0) == []
+    pdf.write_bytes(b"%PDF-1.4 fixed upload")
+    assert watcher.poll(now=2.0) == [] and watcher.poll(now=3.0) == [(pdf, 2.0)]
+    reloaded.discard([pdf])
+    assert len(FailedDocuments(settings.output_dir)) == 0
+
+
+def test_watcher_reports_files_once_they_stop_changing(tmp_path: Path) -> None:
+    settings = _settings(tmp_path)
+    pdf = settings.data_dir / "paystub.pdf"
+    pdf.write_bytes(b"%PDF-1.4 partial")
+    watcher = PdfWatcher(settings)
+
+    assert watcher.poll(now=0.0) == []
+    pdf.write_bytes(b"%PDF-1.4 partial, now complete")
+    assert watcher.poll(now=1.0) == []
+    assert watcher.poll(now=2.0) == [(pdf, 0.0)]
+    assert watcher.poll(now=3.0) == []
+
+    # Already processed on an earlier run: the output is newer than the PDF.
+    output = settings.output_dir / "paystub.json"
+    output.parent.mkdir(parents=True)
+    output.write_text("{}")
+    os.utime(output, ns=(pdf.stat().st_mtime_ns + 1, pdf.stat().st_mtime_ns + 1))
+    restarted = PdfWatcher(settings)
+    assert restarted.poll(now=0.0) == [] and restarted.poll(now=1.0) == []
+
+
+def test_append_replaces_chunks_of_resent_documents(tmp_path: Path) -> None:
+    build_faiss_index(_items("a", 3) + _items("b", 2), tmp_path / "base")
+
+    append_faiss_index(tmp_path / "base", _items("a", 1) + _items("c", 2), tmp_path / "next")
+
+    loaded = load_faiss_index(tmp_path / "next")
+    assert loaded.index.ntotal == len(loaded.metadata) == 5
+    assert Counter(record["doc_id"] for record in loaded.metadata) == {"a": 1, "b": 2, "c": 2}
+    # Positions still line up with metadata after the removal.
+    assert loaded.search(np.full(DIM, 1, dtype="float32"), k=1)[0][0] == {"doc_id": "b", "chunk_id": 1, "text": "b 1"}
+
+
+def test_staging_index_publishes_batches_together_and_only_changed_shards(tmp_path: Path) -> None:
+    staging = StagingIndex(tmp_path / "shards", sharded=True, compression=IndexCompression())
+    staging.add({"loan-1": _items("a", 2), "loan-2": _items("b", 2)}, [])
+    first = staging.publish()
+    assert staging.publish() is None
+
+    staging.add({"loan-1": _items("c", 1)}, [])
+    staging.add({"loan-1": _items("a", 1)}, [])
+    second = staging.publish()
+
+    assert len(list((tmp_path / "shards" / VERSIONS_DIR).glob("2*"))) == 2
+    loan_1 = load_faiss_index(second / shard_dirname("loan-1"))
+    assert Counter(record["doc_id"] for record in loan_1.metadata) == {"a": 1, "c": 1}
+    # The untouched shard is carried over from the previous version, not rewritten.
+    loan_2 = shard_dirname("loan-2")
+    assert (second / loan_2 / "index.faiss").stat().st_ino == (first / loan_2 / "index.faiss").stat().st_ino
+
+
+def _wait_for(predicate, timeout_s: float = 20.0) -> None:
+    deadline = time.monotonic() + timeout_s
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not met before timeout")
+        time.sleep(0.05)
+
+
+def _watch_report(settings: Settings) -> dict:
+    path = settings.output_dir / "watch_metrics.json"
+    return json.loads(path.read_text()) if path.exists() else {}
+
+
+@pytest.mark.parametrize("layout", ["single", "sharded"])
+def test_watch_mode_appends_new_pdfs_to_live_index(tmp_path: Path, layout: str) -> None:
+    settings = _settings(tmp_path, faiss_layout=layout, watch_poll_interval_s=0.05, watch_batch_wait_s=0.1)
+    pdf_dir = settings.data_dir / "loan-1" if layout == "sharded" else settings.data_dir
+    pdf_dir.mkdir(exist_ok=True)
+    (pdf_dir / "paystub.pdf").write_bytes(_minimal_pdf(["Gross Pay: $4000", "SSN 123-45-6789"]))
+    embedder = _HashEmbedder()
+    stop = threading.Event()
+    watcher = threading.Thread(target=run_watch, args=(settings, stop, embedder))
+    watcher.start()
+    try:
+        _wait_for(lambda: _watch_report(settings).get("documents") == 1)
+        (pdf_dir / "w2.pdf").write_bytes(_minimal_pdf(["Form W-2 Wages: $52000"]))
+        (pdf_dir / "paystub.pdf").write_bytes(_minimal_pdf(["Gross Pay: $4100"]))
+        _wait_for(lambda: _watch_report(settings).get("documents") == 3)
+    finally:
+        stop.set()
+        watcher.join()
+
+    report = _watch_report(settings)
+    assert report["failed_batches"] == 0 and report["backlog_documents"] == 0
+    assert report["metrics"]["watch_last_searchable_latency_s"] < 20
+    if layout == "sharded":
+        shard = ShardManager(settings.faiss_dir / "shards").get("loan-1")
+        metadata = shard.metadata
+        assert shard.index.ntotal == len(metadata)
+    else:
+        metadata = load_faiss_index(resolve_index_dir(settings.faiss_dir)).metadata
+    doc_ids = {record["doc_id"] for record in metadata}
+    texts = {doc_id: "".join(record["text"] for record in metadata if record["doc_id"] == doc_id) for doc_id in doc_ids}
+    # The re-uploaded paystub replaced its earlier chunks instead of duplicating them.
+    assert set(texts) == {"paystub", "w2"}
+    assert "4100" in texts["paystub"] and "4000" not in texts["paystub"]
+    assert "123-45-6789" not in json.dumps(metadata)
+    assert (settings.output_dir / ("loan-1" if layout == "sharded" else "") / "w2.json").exists()
+
+
+def test_watch_reports_dead_letter_documents(tmp_path: Path) -> None:
+    settings = _settings(tmp_path, watch_poll_interval_s=0.05, watch_batch_wait_s=0.0, watch_max_attempts=1)
+    (settings.data_dir / "corrupt.pdf").write_bytes(b"not a pdf at all")
+    stop = threading.Event()
+    watcher = threading.Thread(target=run_watch, args=(settings, stop, _HashEmbedder()))
+    watcher.start()
+    try:
+        _wait_for(lambda: _watch_report(settings).get("dead_letter_documents") == 1)
+    finally:
+        stop.set()
+        watcher.join()
+
+    report = _watch_report(settings)
+    assert report["failed_batches"] == 1 and report["retry_documents"] == 0
+    parked = json.loads((settings.output_dir / "watch_failed.json").read_text(encoding="utf-8"))
+    assert [entry["attempts"] for entry in parked] == [1]